@@ -1,10 +1,15 @@
+import csv
 import io
+import tempfile
+from datetime import date, datetime, time
 
-import pandas as pd
+import xlsxwriter
+from django.utils import translation
 from falcon.media import BaseHandler
 
-from mcod.core.utils import XMLWriter, save_as_csv, save_as_xml
-from mcod.settings import RDF_FORMAT_TO_MIMETYPE
+from mcod.core.utils import XMLWriter, iter_in_chunks, save_as_xml
+from mcod.lib.extended_graph import STREAMED_FORMATS, ExtendedGraph
+from mcod.settings import EXPORT_CHUNK_SIZE, RDF_FORMAT_TO_MIMETYPE
 from mcod.unleash import is_enabled
 
 
@@ -19,6 +24,9 @@ class RDFHandler(BaseHandler):
         if content_type not in RDF_FORMAT_TO_MIMETYPE.values():
             content_type = RDF_FORMAT_TO_MIMETYPE["jsonld"]
 
+        if isinstance(media, ExtendedGraph) and content_type in STREAMED_FORMATS:
+            return b"".join(media.iter_serialize(content_type))
+
         if content_type == "application/ld+json":
             result = media.serialize(
                 format=content_type, auto_compact=True, encoding="utf-8"
@@ -60,23 +68,42 @@ class XMLHandler(BaseHandler):
 
 
 class ExportHandler(BaseHandler):
+    """
+    Exports data of the context as CSV or XLSX.
+    Data is fetched from the database and serialized once, chunk by chunk - `stream` sets response's stream,
+    so the whole export is never kept in memory (XLSX is written in constant memory mode to a temporary file).
+    """
+    csv_content_type = "text/csv"
+    xlsx_content_type = "application/vnd.ms-excel"
+    streamed_content_types = (csv_content_type, xlsx_content_type)
+    xlsx_header_format = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
     def deserialize(self, stream, content_type, content_length):
         # Todo - to be implemented. For now do nothing
         return stream
 
     def serialize(self, context, content_type):
-        if content_type == "application/vnd.ms-excel":
+        if content_type == self.xlsx_content_type:
             return self.to_xlsx(context)
         return self.to_csv(context)
 
+    def stream(self, response, context):
+        if response.content_type == self.xlsx_content_type:
+            output = tempfile.TemporaryFile()
+            self.write_xlsx(context, output)
+            length = output.tell()
+            output.seek(0)
+            response.set_stream(output, length)
+        else:
+            response.stream = self.iter_csv(context)
+
     def to_csv(self, context):
         output = context
         if hasattr(context, "data"):
-            csv_file = self._as_csv(context)
-            output = csv_file.getvalue().encode("utf-8")
+            output = b"".join(self.iter_csv(context))
         return output
 
-    def _as_csv(self, context):
+    def get_schema(self, context):
         if not getattr(context, "serializer_schema", None):
             schema_class = context.data.model.get_csv_serializer_schema()
             exclude = (
@@ -90,23 +117,49 @@ class ExportHandler(BaseHandler):
                     "resource_link",
                     "is_resource_added_notes",
                 ]
-            schema = schema_class(many=True, exclude=exclude)
-        else:
-            schema = context.serializer_schema
-        csv_data = schema.dump(context.data)
-        output = io.StringIO()
-        save_as_csv(output, schema.get_csv_headers(), csv_data)
-        return output
+            return schema_class(many=True, exclude=exclude)
+        return context.serializer_schema
+
+    def iter_rows(self, context, schema):
+        for chunk in iter_in_chunks(context.data, EXPORT_CHUNK_SIZE):
+            yield from schema.dump(chunk)
+
+    def iter_csv(self, context):
+        # the generator is consumed after the view returns, language of the request is kept for it.
+        return self._iter_csv(context, self.get_schema(context), translation.get_language())
+
+    def _iter_csv(self, context, schema, language):
+        with translation.override(language):
+            output = io.StringIO()
+            writer = csv.DictWriter(output, fieldnames=schema.get_csv_headers(), delimiter=";")
+            writer.writeheader()
+            for chunk in iter_in_chunks(context.data, EXPORT_CHUNK_SIZE):
+                writer.writerows(schema.dump(chunk))
+                yield output.getvalue().encode("utf-8")
+                output.seek(0)
+                output.truncate()
+            if output.tell():
+                yield output.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _xlsx_value(value):
+        if value is None or isinstance(value, (str, int, float, bool, date, datetime, time)):
+            return value
+        return str(value)
+
+    def write_xlsx(self, context, file_object):
+        schema = self.get_schema(context)
+        headers = schema.get_csv_headers()
+        workbook = xlsxwriter.Workbook(file_object, {"constant_memory": True, "strings_to_numbers": True})
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, [str(header) for header in headers], workbook.add_format(self.xlsx_header_format))
+        for row_no, row in enumerate(self.iter_rows(context, schema), 1):
+            worksheet.write_row(row_no, 0, [self._xlsx_value(row.get(header)) for header in headers])
+        workbook.close()
 
     def to_xlsx(self, context):
         output = io.BytesIO()
-        writer = pd.ExcelWriter(
-            output, engine="xlsxwriter"
-        )  # https://stackoverflow.com/a/28065603
-        csv_output = self._as_csv(context)
-        csv_output.seek(0)
-        pd.read_csv(csv_output, sep=";").to_excel(writer, index=False)
-        writer.save()
+        self.write_xlsx(context, output)
         return output.getvalue()
 
 
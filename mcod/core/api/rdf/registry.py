@@ -1,5 +1,6 @@
 from collections import defaultdict
 
+from django.apps import apps
 from django.db.models import Model
 
 from mcod.core.api.search.tasks import _instance
@@ -27,6 +28,24 @@ class SparqlGraphRegistry:
             self.sparql_store.rollback()
             raise e
 
+    def process_graphs(self, action, app_label, object_name, ids):
+        """Sends queries of the action for all the objects of the model in a single update."""
+        model = apps.get_model(app_label, object_name)
+        queries = []
+        ns = {}
+        for instance in model.objects.filter(pk__in=ids):
+            query, _ns = getattr(self, action)(instance)
+            if query.strip():
+                queries.append(query)
+                ns.update(**_ns)
+        if not queries:
+            return
+        try:
+            self.sparql_store.update("; ".join(queries), initNs=ns)
+        except Exception as e:
+            self.sparql_store.rollback()
+            raise e
+
     def register_graph(self, graph_cls):
         self._models[graph_cls.model].add(graph_cls)
         related_models = graph_cls.related_models or []
@@ -62,6 +81,20 @@ class SparqlGraphRegistry:
         full_query = "; ".join(queries)
         return full_query, ns
 
+    def update_related_many(self, model_cls, instances):
+        """Returns [(query, ns)] updating graphs related to the instances, each related object is updated once."""
+        queries = []
+        for related_graph_cls in self._get_related_graphs(model_cls):
+            related_graph = related_graph_cls(named_graph=self._named_graph)
+            related_instances = {}
+            for instance in instances:
+                related = related_graph.get_related_from_instance(instance)
+                for obj in [related] if isinstance(related, Model) else related or []:
+                    related_instances[obj.pk] = obj
+            if related_instances:
+                queries.append(related_graph.update(list(related_instances.values())))
+        return queries
+
     def update_with_related(self, instance):
         update_q, update_ns = self.update(instance)
         related_q, related_ns = self.update_related(instance)
@@ -159,6 +192,9 @@ class SparqlGraphRegistry:
     def get_graph(self, instance):
         return self._models[instance.__class__]
 
+    def get_graph_classes(self, model_cls):
+        return self._models.get(model_cls, set())
+
     def is_parent_model(self, instance):
         return instance.__class__ in self._parent_models
 
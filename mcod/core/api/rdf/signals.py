@@ -1,3 +1,6 @@
+from django.db import transaction
+
+from mcod import settings
 from mcod.core.api.rdf.registry import registry
 from mcod.core.api.rdf.tasks import (
     create_graph_task,
@@ -9,6 +12,7 @@ from mcod.core.api.rdf.tasks import (
     update_graph_with_related_task,
     update_related_graph_task,
 )
+from mcod.core.api.rdf.update_queue import CREATE, UPDATE, UPDATE_RELATED, GraphUpdateQueue
 from mcod.core.mixins.signals import SignalLoggerMixin
 from mcod.core.signals import ExtendedSignal
 
@@ -42,13 +46,26 @@ class SparqlSignalProcessor(SignalLoggerMixin):
             'instance_id': instance.id
         }
 
+    def _enqueue(self, instance, task, *actions):
+        """Adds actions to the update queue or, if it's disabled, schedules the task."""
+        task_kwargs = self.get_task_kwargs(instance)
+        if settings.RDF_UPDATE_QUEUE_ENABLED:
+            GraphUpdateQueue().push_on_commit(*task_kwargs.values(), *actions)
+        else:
+            task.s(**task_kwargs).apply_async_on_commit()
+
+    def _discard_queued(self, instance):
+        if settings.RDF_UPDATE_QUEUE_ENABLED:
+            task_kwargs = self.get_task_kwargs(instance)
+            transaction.on_commit(lambda: GraphUpdateQueue().discard(*task_kwargs.values()))
+
     def update_graph(self, sender, instance, *args, **kwargs):
         self.debug('Updating graph in rdf db', sender, instance, 'update_graph')
-        update_graph_task.s(**self.get_task_kwargs(instance)).apply_async_on_commit()
+        self._enqueue(instance, update_graph_task, UPDATE)
 
     def update_related_graph(self, sender, instance, *args, **kwargs):
         self.debug('Updating related graph in rdf db', sender, instance, 'update_related_graph')
-        update_related_graph_task.s(**self.get_task_kwargs(instance)).apply_async_on_commit()
+        self._enqueue(instance, update_related_graph_task, UPDATE_RELATED)
 
     def update_graph_with_conditional_related_update(self, sender, instance, *args, **kwargs):
         if registry.related_condition_changed(instance):
@@ -58,18 +75,19 @@ class SparqlSignalProcessor(SignalLoggerMixin):
 
     def update_graph_with_related(self, sender, instance, *args, **kwargs):
         self.debug('Updating graph with related in rdf db', sender, instance, 'update_graph_with_related')
-        update_graph_with_related_task.s(**self.get_task_kwargs(instance)).apply_async_on_commit()
+        self._enqueue(instance, update_graph_with_related_task, UPDATE, UPDATE_RELATED)
 
     def create_graph(self, sender, instance, *args, **kwargs):
         self.debug('Creating graph in rdf db', sender, instance, 'create_graph')
-        create_graph_task.s(**self.get_task_kwargs(instance)).apply_async_on_commit()
+        self._enqueue(instance, create_graph_task, CREATE)
 
     def create_graph_with_related_update(self, sender, instance, *args, **kwargs):
         self.debug('Creating graph with related update in rdf db', sender, instance, 'create_graph_with_related_update')
-        create_graph_with_related_update_task.s(**self.get_task_kwargs(instance)).apply_async_on_commit()
+        self._enqueue(instance, create_graph_with_related_update_task, CREATE, UPDATE_RELATED)
 
     def delete_graph(self, sender, instance, *args, **kwargs):
         self.debug('Deleting graph in rdf db', sender, instance, 'delete_graph')
+        self._discard_queued(instance)
         graphs_set = registry.get_graph(instance)
         parents_to_remove = [graph(named_graph=registry.graph_name).is_parent_removed(instance) for graph in graphs_set]
         task_kwargs = self.get_task_kwargs(instance)
@@ -80,6 +98,7 @@ class SparqlSignalProcessor(SignalLoggerMixin):
 
     def delete_graph_with_related_update(self, sender, instance, *args, **kwargs):
         self.debug('Deleting graph with related update in rdf db', sender, instance, 'delete_graph_with_related_update')
+        self._discard_queued(instance)
         graphs_set = registry.get_graph(instance)
         parents_to_remove = [graph(named_graph=registry.graph_name).is_parent_removed(instance) for graph in graphs_set]
         if not any(parents_to_remove):
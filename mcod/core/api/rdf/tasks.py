@@ -1,6 +1,7 @@
 from logging import getLogger
 from mcod.core.api.rdf.registry import registry
 from mcod.core.tasks import extended_shared_task
+from mcod.lib.rdf.catalog_cache import invalidate_catalog
 
 logger = getLogger("rdf_tasks")
 
@@ -15,11 +16,13 @@ def is_connection_refused(exc: Exception) -> bool:
 )
 def update_graph_task(app_label, object_name, instance_id):
     registry.process_graph("update", app_label, object_name, instance_id)
+    invalidate_catalog(f"{app_label}.{object_name}")
 
 
 @extended_shared_task
 def create_graph_task(app_label, object_name, instance_id):
     registry.process_graph("create", app_label, object_name, instance_id)
+    invalidate_catalog(f"{app_label}.{object_name}")
 
 
 @extended_shared_task
@@ -27,11 +30,13 @@ def create_graph_with_related_update_task(app_label, object_name, instance_id):
     registry.process_graph(
         "create_with_related_update", app_label, object_name, instance_id
     )
+    invalidate_catalog(f"{app_label}.{object_name}")
 
 
 @extended_shared_task
 def update_graph_with_related_task(app_label, object_name, instance_id):
     registry.process_graph("update_with_related", app_label, object_name, instance_id)
+    invalidate_catalog(f"{app_label}.{object_name}")
 
 
 @extended_shared_task
@@ -39,11 +44,22 @@ def update_graph_with_conditional_related_task(app_label, object_name, instance_
     registry.process_graph(
         "update_with_conditional_related", app_label, object_name, instance_id
     )
+    invalidate_catalog(f"{app_label}.{object_name}")
+
+
+@extended_shared_task(
+    max_retries=5,
+    retry_on_lambda=is_connection_refused,
+)
+def update_graphs_task(app_label, object_name, ids, action="update"):
+    registry.process_graphs(action, app_label, object_name, ids)
+    invalidate_catalog(f"{app_label}.{object_name}")
 
 
 @extended_shared_task
 def update_related_graph_task(app_label, object_name, instance_id):
     registry.process_graph("update_related", app_label, object_name, instance_id)
+    invalidate_catalog(f"{app_label}.{object_name}")
 
 
 @extended_shared_task(
@@ -52,6 +68,7 @@ def update_related_graph_task(app_label, object_name, instance_id):
 )
 def delete_graph_task(app_label, object_name, instance_id):
     registry.process_graph("delete", app_label, object_name, instance_id)
+    invalidate_catalog(f"{app_label}.{object_name}")
 
 
 @extended_shared_task(
@@ -68,6 +85,10 @@ def delete_graph_with_related_update_task(
         instance_id,
         related_models=related_models,
     )
+    invalidate_catalog(
+        f"{app_label}.{object_name}",
+        *(f"{model['app_label']}.{model['model_cls']}" for model in related_models),
+    )
 
 
 @extended_shared_task(
@@ -76,3 +97,14 @@ def delete_graph_with_related_update_task(
 )
 def delete_sub_graphs(app_label, object_name, instance_id):
     registry.process_graph("delete_sub_graphs", app_label, object_name, instance_id)
+    invalidate_catalog(f"{app_label}.{object_name}")
+
+
+@extended_shared_task(
+    max_retries=5,
+    retry_on_lambda=is_connection_refused,
+)
+def flush_graph_update_queue_task():
+    from mcod.core.api.rdf.update_queue import GraphUpdateQueue
+
+    return GraphUpdateQueue().flush()
@@ -0,0 +1,216 @@
+import logging
+import time
+from collections import defaultdict
+from urllib.error import HTTPError, URLError
+
+from django.apps import apps
+from django.db import transaction
+
+from mcod import settings
+from mcod.core.api.rdf.registry import registry
+from mcod.lib.queues import RedisSetQueue
+from mcod.lib.rdf.catalog_cache import invalidate_catalog
+
+logger = logging.getLogger('mcod')
+
+CREATE = 'create'
+UPDATE = 'update'
+UPDATE_RELATED = 'update_related'
+
+
+def _is_connection_error(exc):
+    return isinstance(exc, (URLError, ConnectionError)) and not isinstance(exc, HTTPError)
+
+
+class GraphUpdateQueue(RedisSetQueue):
+    """
+    Coalesces updates of RDF graphs requested by signals.
+
+    Signals add (action, model, id) members to a Redis set, so repeated updates of the same object are stored once.
+    Flush (periodic task, at least every `RDF_UPDATE_QUEUE_MAX_LATENCY` seconds) atomically takes the set and sends
+    a single update request (DELETE/INSERT of all queued objects of each model) for every `RDF_UPDATE_QUEUE_BATCH_SIZE`
+    objects. Batch rejected by the graph store is split in halves until the failing objects are found.
+    Members of each sent batch are removed from the taken set, so an interrupted flush doesn't send them again
+    (INSERT DATA isn't idempotent - replayed blank nodes are duplicated).
+    """
+    key = 'rdf_update_queue'
+    stats_key = 'rdf_update_queue:stats'
+    since_key = 'rdf_update_queue:since'
+
+    @staticmethod
+    def _member(action, app_label, object_name, instance_id):
+        return f'{action}:{app_label}.{object_name}:{instance_id}'
+
+    @staticmethod
+    def _parse_member(member):
+        action, label, instance_id = member.decode().split(':')
+        return action, label, int(instance_id)
+
+    def push(self, app_label, object_name, instance_id, *actions):
+        with self.con.pipeline() as pipe:
+            pipe.sadd(self.key, *(self._member(action, app_label, object_name, instance_id) for action in actions))
+            pipe.set(self.since_key, time.time(), nx=True)
+            pipe.hincrby(self.stats_key, 'enqueued', len(actions))
+            pipe.scard(self.key)
+            added, _, _, size = pipe.execute()
+        if added < len(actions):
+            self.con.hincrby(self.stats_key, 'coalesced', len(actions) - added)
+        if added and size >= settings.RDF_UPDATE_QUEUE_MAX_SIZE > size - added:
+            from mcod.core.api.rdf.tasks import flush_graph_update_queue_task
+            flush_graph_update_queue_task.apply_async()
+
+    def push_on_commit(self, app_label, object_name, instance_id, *actions):
+        transaction.on_commit(lambda: self.push(app_label, object_name, instance_id, *actions))
+
+    def discard(self, app_label, object_name, instance_id):
+        members = [self._member(action, app_label, object_name, instance_id) for action in (CREATE, UPDATE)]
+        with self.con.pipeline() as pipe:
+            for key in (self.key, *self.con.smembers(self.taken_key)):
+                pipe.srem(key, *members)
+            pipe.execute()
+
+    def _take(self):
+        """
+        Renames the queue, returns names of all taken sets waiting for flush (also from interrupted flushes)
+        and the time of the oldest push into the taken set.
+        """
+        with self.con.pipeline() as pipe:
+            pipe.get(self.since_key)
+            pipe.delete(self.since_key)
+            since, _ = pipe.execute()
+        return super()._take(), float(since) if since else None
+
+    def _remove_members(self, taken_set, entries):
+        members = [
+            self._member(action, model._meta.app_label, model._meta.object_name, instance_id)
+            for model, instance_id, actions in entries for action in actions
+        ]
+        if members:
+            self.con.srem(taken_set, *members)
+
+    def _group(self, members):
+        """Returns [(model, instance_id, actions)] for queued members."""
+        grouped = defaultdict(set)
+        for member in members:
+            action, label, instance_id = self._parse_member(member)
+            grouped[(apps.get_model(label), instance_id)].add(action)
+        return [(model, instance_id, actions) for (model, instance_id), actions in grouped.items()]
+
+    @staticmethod
+    def _get_manager(model):
+        return model.raw if hasattr(model, 'raw') else model.objects
+
+    @staticmethod
+    def _is_published(obj):
+        return not getattr(obj, 'is_removed', False) and getattr(obj, 'status', 'published') == 'published'
+
+    def _get_model_queries(self, model, entries):
+        """
+        Queries creating or updating graphs of queued objects of the model and of their related objects.
+        Graphs of objects removed or unpublished since the push aren't created or updated, but graphs related
+        to them are (e.g. datasets of a removed category).
+        """
+        manager = self._get_manager(model)
+        instances = {obj.pk: obj for obj in manager.filter(pk__in=[instance_id for instance_id, _ in entries])}
+        published = {pk for pk, obj in instances.items() if self._is_published(obj)}
+        created = [instance_id for instance_id, actions in entries if instance_id in published and CREATE in actions]
+        updated = [
+            instances[instance_id] for instance_id, actions in entries
+            if instance_id in published and UPDATE in actions and CREATE not in actions
+        ]
+        queries = []
+        for graph_cls in registry.get_graph_classes(model):
+            graph = graph_cls(named_graph=registry.graph_name)
+            if created:
+                queries.append(graph.create(manager.filter(pk__in=created)))
+            if updated:
+                queries.append(graph.update(updated))
+        with_related = [
+            instances[instance_id] for instance_id, actions in entries
+            if instance_id in instances and UPDATE_RELATED in actions
+        ]
+        if with_related:
+            queries.extend(registry.update_related_many(model, with_related))
+        return queries
+
+    def _get_update(self, entries):
+        by_model = defaultdict(list)
+        for model, instance_id, actions in entries:
+            by_model[model].append((instance_id, actions))
+        queries, ns = [], {}
+        for model, model_entries in by_model.items():
+            for query, _ns in self._get_model_queries(model, model_entries):
+                if query.strip():
+                    queries.append(query)
+                    ns.update(**_ns)
+        return '; '.join(queries), ns
+
+    def _update(self, entries, stats):
+        """Sends the update of graphs of entries, the rejected batch is split in halves."""
+        query, ns = self._get_update(entries)
+        if not query:
+            return
+        try:
+            stats['requests'] += 1
+            registry.sparql_store.update(query, initNs=ns)
+            stats['updated'] += len(entries)
+        except Exception as exc:
+            registry.sparql_store.rollback()
+            if _is_connection_error(exc):
+                raise
+            if len(entries) == 1:
+                stats['failed'] += 1
+                logger.error(f'Update of graph of {entries[0]} rejected: {exc}')
+                return
+            stats['splits'] += 1
+            half = len(entries) // 2
+            self._update(entries[:half], stats)
+            self._update(entries[half:], stats)
+
+    def flush(self):
+        started_at = time.time()
+        stats = {'queued': 0, 'updated': 0, 'failed': 0, 'requests': 0, 'splits': 0}
+        with self.flush_lock() as locked:
+            if not locked:
+                logger.debug('RDF update queue is flushed by another worker.')
+                return stats
+            taken_sets, since = self._take()
+            for taken_set in taken_sets:
+                entries = self._group(self.con.smembers(taken_set))
+                stats['queued'] += len(entries)
+                batch_size = settings.RDF_UPDATE_QUEUE_BATCH_SIZE
+                for start in range(0, len(entries), batch_size):
+                    batch = entries[start:start + batch_size]
+                    self._update(batch, stats)
+                    self._remove_members(taken_set, batch)
+                    self.extend_lock()
+                self._done(taken_set)
+                invalidate_catalog(*{model._meta.label for model, _, _ in entries})
+        if stats['queued']:
+            finished_at = time.time()
+            latency_ms = int((finished_at - (since or started_at)) * 1000)
+            with self.con.pipeline() as pipe:
+                for name in ('queued', 'updated', 'failed', 'requests', 'splits'):
+                    pipe.hincrby(self.stats_key, name, stats[name])
+                pipe.hincrby(self.stats_key, 'flushes', 1)
+                pipe.hset(self.stats_key, 'last_flush_duration_ms', int((finished_at - started_at) * 1000))
+                pipe.hset(self.stats_key, 'last_flush_latency_ms', latency_ms)
+                pipe.execute()
+            self._update_max_latency(latency_ms)
+            logger.info(f'RDF update queue flushed: {stats}')
+        return stats
+
+    def _update_max_latency(self, latency_ms):
+        max_latency = self.con.hget(self.stats_key, 'max_flush_latency_ms')
+        if max_latency is None or int(max_latency) < latency_ms:
+            self.con.hset(self.stats_key, 'max_flush_latency_ms', latency_ms)
+
+    def get_stats(self):
+        """
+        Totals: actions enqueued and coalesced (already queued), objects flushed, updated and failed, update requests,
+        splits of rejected batches and number of flushes. Latency is the time from the oldest push to the end
+        of the flush. Depth is the current number of queued actions.
+        """
+        stats = {key.decode(): int(value) for key, value in self.con.hgetall(self.stats_key).items()}
+        stats['depth'] = self.con.scard(self.key)
+        return stats
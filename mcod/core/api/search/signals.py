@@ -1,6 +1,8 @@
+from django.db import transaction
 from django_elasticsearch_dsl.registries import registry
 from django_elasticsearch_dsl.signals import BaseSignalProcessor
 
+from mcod import settings
 from mcod.core.api.search.tasks import (
     delete_document_task,
     delete_related_documents_task,
@@ -9,6 +11,7 @@ from mcod.core.api.search.tasks import (
     update_related_task,
     update_with_related_task,
 )
+from mcod.core.api.search.update_queue import UPDATE, UPDATE_WITH_RELATED, IndexUpdateQueue
 from mcod.core.db.elastic import ProxyDocumentRegistry
 from mcod.core.mixins.signals import SignalLoggerMixin
 from mcod.core.signals import ExtendedSignal
@@ -38,10 +41,21 @@ class AsyncSignalProcessor(SignalLoggerMixin, BaseSignalProcessor):
         remove_document.disconnect(self.remove)
         remove_document_with_related.disconnect(self.remove_with_related)
 
+    def _enqueue_update(self, instance, task, action):
+        obj_name = self._get_object_name(instance)
+        if settings.ES_UPDATE_QUEUE_ENABLED:
+            IndexUpdateQueue().push_on_commit(instance._meta.app_label, obj_name, instance.id, action=action)
+        else:
+            task.s(instance._meta.app_label, obj_name, instance.id).apply_async_on_commit()
+
+    def _discard_update(self, instance):
+        if settings.ES_UPDATE_QUEUE_ENABLED:
+            args = (instance._meta.app_label, self._get_object_name(instance), instance.id)
+            transaction.on_commit(lambda: IndexUpdateQueue().discard(*args))
+
     def update(self, sender, instance, *args, **kwargs):
         self.debug('Updating document in elasticsearch', sender, instance, 'update_document')
-        obj_name = self._get_object_name(instance)
-        update_document_task.s(instance._meta.app_label, obj_name, instance.id).apply_async_on_commit()
+        self._enqueue_update(instance, update_document_task, UPDATE)
 
     def update_related(self, sender, instance, model, pk_set, **kwargs):
         self.debug('Updating related documents in elasticsearch', sender, instance, 'update_related')
@@ -52,11 +66,11 @@ class AsyncSignalProcessor(SignalLoggerMixin, BaseSignalProcessor):
             'Updating document and related documents in elasticsearch',
             sender, instance, 'update_document_with_related'
         )
-        obj_name = self._get_object_name(instance)
-        update_with_related_task.s(instance._meta.app_label, obj_name, instance.id).apply_async_on_commit()
+        self._enqueue_update(instance, update_with_related_task, UPDATE_WITH_RELATED)
 
     def remove(self, sender, instance, *args, **kwargs):
         self.debug('Removing document from elasticsearch', sender, instance, 'remove_document')
+        self._discard_update(instance)
         obj_name = self._get_object_name(instance)
         delete_document_task.s(instance._meta.app_label, obj_name, instance.id).apply_async_on_commit()
 
@@ -64,6 +78,7 @@ class AsyncSignalProcessor(SignalLoggerMixin, BaseSignalProcessor):
         self.debug(
             'Removing document and related documents from elasticsearch',
             sender, instance, 'remove_document_with_related')
+        self._discard_update(instance)
         object_name = self._get_object_name(instance)
         registry_proxy = ProxyDocumentRegistry(registry)
         related_instances_data = registry_proxy.get_data_of_related_instances(instance)
@@ -80,13 +95,14 @@ class AsyncSignalProcessor(SignalLoggerMixin, BaseSignalProcessor):
 
             object_name = self._get_object_name(instance)
             if should_delete:
+                self._discard_update(instance)
                 registry_proxy = ProxyDocumentRegistry(registry)
                 related_instances_data = registry_proxy.get_data_of_related_instances(instance)
                 delete_with_related_task.s(
                     related_instances_data, instance._meta.app_label, object_name, instance.id
                 ).apply_async_on_commit()
             else:
-                update_with_related_task.s(instance._meta.app_label, object_name, instance.id).apply_async_on_commit()
+                self._enqueue_update(instance, update_with_related_task, UPDATE_WITH_RELATED)
 
     def handle_pre_delete(self, sender, instance, **kwargs):
         is_indexable = getattr(instance, 'is_indexable', False)
@@ -97,6 +113,7 @@ class AsyncSignalProcessor(SignalLoggerMixin, BaseSignalProcessor):
     def handle_delete(self, sender, instance, **kwargs):
         is_indexable = getattr(instance, 'is_indexable', False)
         if is_indexable:
+            self._discard_update(instance)
             object_name = instance._meta.concrete_model._meta.object_name
             delete_document_task.s(instance._meta.app_label, object_name, instance.id).apply_async_on_commit()
 
@@ -5,6 +5,7 @@ from django_elasticsearch_dsl.registries import registry
 
 from mcod.core.db.elastic import ProxyDocumentRegistry
 from mcod.core.tasks import extended_shared_task
+from mcod.lib.rdf.catalog_cache import invalidate_catalog
 
 logger = get_task_logger('index_tasks')
 
@@ -25,12 +26,14 @@ def bulk_update_documents(app_label, object_name, ids_list, action='index'):
     instances = model.objects.filter(pk__in=ids_list)
     for doc in docs:
         doc().update(instances, action=action)
+    invalidate_catalog(f'{app_label}.{object_name}')
 
 
 @extended_shared_task
 def update_document_task(app_label, object_name, instance_id):
     instance = _instance(app_label, object_name, instance_id)
     registry.update(instance)
+    invalidate_catalog(f'{app_label}.{object_name}')
     return {
         'app': app_label,
         'model': object_name,
@@ -43,6 +46,7 @@ def update_with_related_task(app_label, object_name, instance_id):
     instance = _instance(app_label, object_name, instance_id)
     registry.update(instance)
     registry.update_related(instance)
+    invalidate_catalog(f'{app_label}.{object_name}')
     return {
         'app': app_label,
         'model': object_name,
@@ -57,6 +61,7 @@ def update_related_task(app_label, object_name, pk_set, **kwargs):
     for doc in docs:
         qs = model.objects.filter(pk__in=pk_set)
         doc().update(qs.iterator(), **kwargs)
+    invalidate_catalog(f'{app_label}.{object_name}')
     return {
         'app': model._meta.app_label,
         'model': model._meta.object_name,
@@ -69,6 +74,7 @@ def delete_document_task(app_label, object_name, instance_id):
     model = apps.get_model(app_label, object_name)
     registry_proxy = ProxyDocumentRegistry(registry)
     registry_proxy.delete_documents_by_model_and_id(model, instance_id, raise_on_error=False)
+    invalidate_catalog(f'{app_label}.{object_name}')
     return {
         'app': app_label,
         'model': object_name,
@@ -85,6 +91,7 @@ def delete_with_related_task(related_instances_data, app_label, object_name, ins
     model = apps.get_model(app_label, object_name)
     registry_proxy = ProxyDocumentRegistry(registry)
     registry_proxy.delete_documents_by_model_and_id(model, instance_id, raise_on_error=False)
+    invalidate_catalog(f'{app_label}.{object_name}')
     return {
         'related_instances_data': related_instances_data,
         'app': app_label,
@@ -123,3 +130,9 @@ def null_field_in_related_task(app_label, object_name, instance_id):
 @extended_shared_task
 def bulk_delete_documents_task(app_label, object_name, ids_list):
     return update_related_task(app_label, object_name, ids_list, action='delete')
+
+
+@extended_shared_task(max_retries=5, retry_on_errors=(TransportError,))
+def flush_index_update_queue_task():
+    from mcod.core.api.search.update_queue import IndexUpdateQueue
+    return IndexUpdateQueue().flush()
@@ -0,0 +1,129 @@
+import logging
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.registries import registry
+
+from mcod import settings
+from mcod.lib.queues import RedisSetQueue
+from mcod.lib.rdf.catalog_cache import invalidate_catalog
+
+logger = logging.getLogger('mcod')
+
+UPDATE = 'update'
+UPDATE_WITH_RELATED = 'update_with_related'
+
+
+class IndexUpdateQueue(RedisSetQueue):
+    """
+    Coalesces updates of Elasticsearch documents requested by signals.
+
+    Signals add (action, model, id) members to a Redis set, so repeated updates of the same object
+    are stored once. Flush (periodic task, at least every `ES_UPDATE_QUEUE_MAX_LATENCY` seconds) atomically
+    takes the set and updates documents of each model with a single parallel bulk.
+    Update with related documents supersedes the plain update of the same object.
+    """
+    key = 'es_update_queue'
+    stats_key = 'es_update_queue:stats'
+
+    @staticmethod
+    def _member(action, app_label, object_name, instance_id):
+        return f'{action}:{app_label}.{object_name}:{instance_id}'
+
+    @staticmethod
+    def _parse_member(member):
+        action, label, instance_id = member.decode().split(':')
+        return action, label, int(instance_id)
+
+    def push(self, app_label, object_name, instance_id, action=UPDATE_WITH_RELATED):
+        with self.con.pipeline() as pipe:
+            pipe.sadd(self.key, self._member(action, app_label, object_name, instance_id))
+            pipe.hincrby(self.stats_key, 'enqueued', 1)
+            pipe.scard(self.key)
+            added, _, size = pipe.execute()
+        if added and size == settings.ES_UPDATE_QUEUE_MAX_SIZE:
+            from mcod.core.api.search.tasks import flush_index_update_queue_task
+            flush_index_update_queue_task.apply_async()
+
+    def push_on_commit(self, app_label, object_name, instance_id, action=UPDATE_WITH_RELATED):
+        transaction.on_commit(lambda: self.push(app_label, object_name, instance_id, action=action))
+
+    def discard(self, app_label, object_name, instance_id):
+        self.con.srem(self.key, *(
+            self._member(action, app_label, object_name, instance_id) for action in (UPDATE, UPDATE_WITH_RELATED)))
+
+    def _group(self, members):
+        """Returns {model: {instance_id: with_related}} for queued members."""
+        grouped = defaultdict(dict)
+        for member in members:
+            action, label, instance_id = self._parse_member(member)
+            model = apps.get_model(label)
+            grouped[model][instance_id] = grouped[model].get(instance_id, False) or action == UPDATE_WITH_RELATED
+        return grouped
+
+    @staticmethod
+    def _get_instances(model, ids):
+        manager = model.raw if hasattr(model, 'raw') else model.objects
+        return list(manager.filter(pk__in=ids))
+
+    @staticmethod
+    def _update_document(doc, ids):
+        """Updates documents of objects which the document indexes (see its `get_queryset`)."""
+        instances = list(doc().get_queryset().filter(pk__in=ids))
+        if instances:
+            doc().update(instances, parallel=True)
+        return len(instances)
+
+    def _update_documents(self, model, ids):
+        return sum(
+            self._update_document(doc, ids) for doc in registry._models.get(model, ())
+            if not doc.django.ignore_signals)
+
+    def _get_related_instances(self, instances):
+        related = defaultdict(dict)
+        for instance in instances:
+            for doc in registry._get_related_doc(instance):
+                try:
+                    objs = doc().get_instances_from_related(instance)
+                except ObjectDoesNotExist:
+                    continue
+                if objs is None:
+                    continue
+                for obj in ([objs] if isinstance(objs, models.Model) else objs):
+                    related[doc][obj.pk] = obj
+        return related
+
+    def flush(self):
+        if not DEDConfig.autosync_enabled():
+            return {}
+        stats = {'queued': 0, 'indexed': 0}
+        with self.flush_lock() as locked:
+            if not locked:
+                logger.debug('Index update queue is flushed by another worker.')
+                return stats
+            for taken_set in self._take():
+                grouped = self._group(self.con.smembers(taken_set))
+                stats['queued'] += sum(len(ids) for ids in grouped.values())
+                for model, ids in grouped.items():
+                    stats['indexed'] += self._update_documents(model, list(ids))
+                    with_related = self._get_instances(model, [pk for pk, related in ids.items() if related])
+                    for doc, related in self._get_related_instances(with_related).items():
+                        stats['indexed'] += self._update_document(doc, list(related))
+                self._done(taken_set)
+                self.extend_lock()
+                invalidate_catalog(*(model._meta.label for model in grouped))
+        if stats['queued']:
+            with self.con.pipeline() as pipe:
+                pipe.hincrby(self.stats_key, 'queued', stats['queued'])
+                pipe.hincrby(self.stats_key, 'indexed', stats['indexed'])
+                pipe.hincrby(self.stats_key, 'flushes', 1)
+                pipe.execute()
+            logger.info(f'Index update queue flushed: {stats}')
+        return stats
+
+    def get_stats(self):
+        """Totals: signals enqueued, unique objects flushed, documents indexed and number of flushes."""
+        return {key.decode(): int(value) for key, value in self.con.hgetall(self.stats_key).items()}
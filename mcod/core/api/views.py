@@ -4,6 +4,8 @@ import falcon
 
 from mcod import settings
 from mcod.core.api.handlers import RetrieveOneHdlr
+from mcod.core.api.media import ExportHandler
+from mcod.lib.extended_graph import STREAMED_FORMATS, ExtendedGraph
 
 
 class BaseView:
@@ -55,7 +57,13 @@ class JsonAPIView(BaseView):
 class TabularView(BaseView):
 
     def handle(self, request, response, handler, *args, **kwargs):
-        super().handle(request, response, handler, *args, **kwargs)
+        response.content_type = self.set_content_type(response, **kwargs)
+        response.status = falcon.HTTP_200
+        context = handler(request, response).run(*args, **kwargs)
+        if hasattr(context, 'data') and response.content_type in ExportHandler.streamed_content_types:
+            ExportHandler().stream(response, context)
+        else:
+            response.media = context
         # https://falcon.readthedocs.io/en/latest/user/recipes/output-csv.html
         response.downloadable_as = 'harmonogram-{}.{}'.format(
             datetime.today().strftime('%Y-%m-%d'),
@@ -67,6 +75,13 @@ class TabularView(BaseView):
 
 
 class RDFView(BaseView):
+    def handle(self, request, response, handler, *args, **kwargs):
+        super().handle(request, response, handler, *args, **kwargs)
+        graph = response.media
+        if isinstance(graph, ExtendedGraph) and response.content_type in STREAMED_FORMATS:
+            response.media = None
+            response.stream = graph.iter_serialize(response.content_type)
+
     def set_content_type(self, resp, rdf_format=None, **kwargs):
         if rdf_format:
             return settings.RDF_FORMAT_TO_MIMETYPE.get(rdf_format, None)
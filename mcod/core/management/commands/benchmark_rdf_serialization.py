@@ -0,0 +1,96 @@
+import random
+import time
+from datetime import date, timedelta
+
+import rdflib
+from django.core.management import BaseCommand
+from rdflib import BNode, Literal, URIRef
+
+from mcod import settings
+from mcod.core.api.rdf.namespaces import DCAT, DCT, FOAF, NAMESPACES, RDF
+from mcod.lib.extended_graph import STREAMED_FORMATS, ExtendedGraph
+
+FORMATS = {
+    'xml': 'application/rdf+xml',
+    'jsonld': 'application/ld+json',
+    'ttl': 'text/turtle',
+    'nt': 'application/n-triples',
+}
+
+
+class SortingExtendedGraph(rdflib.ConjunctiveGraph):
+    """Previous implementation of the ordered graph - subjects and predicates are sorted on each call."""
+
+    def subjects(self, predicate=None, object=None):
+        result = super().subjects(predicate=predicate, object=object)
+        if predicate is None and object is None:
+            result = sorted(result)
+        return result
+
+    def predicate_objects(self, subject=None):
+        return sorted(super().predicate_objects(subject=subject))
+
+
+def build_catalog(graph, datasets, resources_per_dataset=3, seed=0):
+    """Fills the graph with the synthetic catalog of `datasets` datasets (with distributions), added in random order."""
+    rnd = random.Random(seed)
+    for prefix, namespace in NAMESPACES.items():
+        graph.bind(prefix, namespace)
+    catalog = URIRef(f'{settings.BASE_URL}/catalog')
+    graph.add((catalog, RDF.type, DCAT.Catalog))
+    for dataset_id in rnd.sample(range(1, datasets + 1), datasets):
+        dataset = URIRef(f'{settings.BASE_URL}/pl/dataset/{dataset_id},dataset-{dataset_id}')
+        publisher = URIRef(f'{settings.BASE_URL}/pl/institution/{dataset_id % 100}')
+        issued = date(2015, 1, 1) + timedelta(days=dataset_id % 2000)
+        graph.add((catalog, DCAT.dataset, dataset))
+        graph.add((dataset, RDF.type, DCAT.Dataset))
+        graph.add((dataset, DCT.identifier, Literal(str(dataset))))
+        graph.add((dataset, DCT.title, Literal(f'Zbiór danych {dataset_id}', lang='pl')))
+        graph.add((dataset, DCT.title, Literal(f'Dataset {dataset_id}', lang='en')))
+        graph.add((dataset, DCT.description, Literal(f'Opis "zbioru"\n{dataset_id}', lang='pl')))
+        graph.add((dataset, DCT.issued, Literal(issued)))
+        graph.add((dataset, DCT.publisher, publisher))
+        graph.add((publisher, RDF.type, FOAF.Agent))
+        graph.add((publisher, FOAF.name, Literal(f'Instytucja {dataset_id % 100}', lang='pl')))
+        for keyword in rnd.sample(range(50), 3):
+            graph.add((dataset, DCAT.keyword, Literal(f'tag{keyword}', lang='pl')))
+        for number in range(resources_per_dataset):
+            distribution = URIRef(f'{dataset}/resource/{dataset_id * 10 + number}')
+            media_type = BNode()
+            graph.add((dataset, DCAT.distribution, distribution))
+            graph.add((distribution, RDF.type, DCAT.Distribution))
+            graph.add((distribution, DCT.title, Literal(f'Zasób {number}', lang='pl')))
+            graph.add((distribution, DCAT.accessURL, URIRef(f'{distribution}/file')))
+            graph.add((distribution, DCAT.mediaType, media_type))
+            graph.add((media_type, RDF.value, Literal('text/csv')))
+    return graph
+
+
+class Command(BaseCommand):
+    help = 'Compares time of serialization of a synthetic catalog: the previous ordered graph (sorting on each call) ' \
+           'vs. ExtendedGraph (sorted index) vs. ExtendedGraph.iter_serialize (streamed N-Triples/Turtle).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--datasets', type=int, default=10000)
+        parser.add_argument('--formats', default=','.join(FORMATS), help=f'Comma separated: {", ".join(FORMATS)}.')
+        parser.add_argument('--skip-previous', action='store_true', dest='skip_previous',
+                            help='Don\'t measure the previous implementation (slow for Turtle).')
+
+    def _measure(self, name, func):
+        started_at = time.perf_counter()
+        size = sum(len(chunk) for chunk in func())
+        duration = time.perf_counter() - started_at
+        self.stdout.write(f'    {name}: {duration:.2f}s, {size / 2 ** 20:.1f} MB')
+
+    def handle(self, *args, **options):
+        graphs = {'ordered index': build_catalog(ExtendedGraph(ordered=True), options['datasets'])}
+        if not options['skip_previous']:
+            graphs['previous'] = build_catalog(SortingExtendedGraph(), options['datasets'])
+        self.stdout.write(f'Catalog of {options["datasets"]} datasets, {len(graphs["ordered index"])} triples.')
+        for name in options['formats'].split(','):
+            content_type = FORMATS[name]
+            self.stdout.write(f'{name}:')
+            for graph_name, graph in graphs.items():
+                self._measure(graph_name, lambda: [graph.serialize(format=content_type, encoding='utf-8')])
+            if content_type in STREAMED_FORMATS:
+                self._measure('streamed', lambda: graphs['ordered index'].iter_serialize(content_type))
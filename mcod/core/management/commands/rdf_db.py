@@ -3,6 +3,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Max
 from django.utils.six.moves import input
 
+from mcod.lib.rdf.bulk_load import BulkLoadCheckpoint, GraphStoreBulkLoader, GraphStoreClient
 from mcod.lib.rdf.store import get_sparql_store
 
 
@@ -75,6 +76,20 @@ class Command(BaseCommand):
         parser.add_argument('--dataset_ids', type=str, default='')
         parser.add_argument('--resource_ids', type=str, default='')
         parser.add_argument('-f', '--force', dest='force', action='store_true', help='force execution')
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Create the data with bulk load: objects are serialized to N-Triples by worker processes '
+                 'and sent to the Graph Store endpoint in large batches',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Resume the interrupted bulk load from the last loaded object (the database is not deleted)',
+        )
+        parser.add_argument('--workers', type=int, default=None, help='Number of worker processes of bulk load')
+        parser.add_argument('--chunk_size', type=int, default=None, help='Number of objects serialized at once')
+        parser.add_argument('--batch_size', type=int, default=None, help='Minimal number of triples sent at once')
 
     def handle(self, *args, **options):
         if not options['action']:
@@ -136,7 +151,11 @@ class Command(BaseCommand):
     def _create(self, options, is_confirmed=False):
         is_confirmed = options['force'] or is_confirmed or boolean_input(
             'Are you sure you want to push data into Graph Store? [y/n]:')
-        if is_confirmed:
+        if is_confirmed and options['bulk']:
+            self._bulk_load(options)
+            if not ('resource_ids' in options or 'dataset_ids' in options):
+                self._init_catalog_metadata(options)
+        elif is_confirmed:
             datasets = self._get_objects('datasets.Dataset', options)
             for obj in datasets:
                 self.stdout.write(f'Push into Graph Store dataset: id {obj.id}, \"{obj}\"')
@@ -166,13 +185,47 @@ class Command(BaseCommand):
             is_confirmed = options['force'] or boolean_input(
                 'Are you sure you want to rebuild Graph Store? [y/n]:')
             if is_confirmed:
-                self._delete(options, is_confirmed)
+                if not (options['bulk'] and options['resume']):
+                    self._delete(options, is_confirmed)
                 self._create(options, is_confirmed)
             else:
                 self.stdout.write('Aborted')
         except KeyboardInterrupt:
             raise CommandError('\nExecution of command interrupted by user!')
 
+    def _write_progress(self, stats):
+        self.stdout.write(
+            f'{stats["model"]}: {stats["objects"]}/{stats["total"]} objects, {stats["triples"]} triples '
+            f'({stats["triples_per_second"]:.0f} triples/s), last id: {stats["last_id"]}')
+
+    def _bulk_load(self, options):
+        loader = GraphStoreBulkLoader(
+            GraphStoreClient(),
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            progress=self._write_progress,
+        )
+        checkpoints = {model_name: BulkLoadCheckpoint(model_name) for model_name in (
+            'datasets.Dataset', 'resources.Resource')}
+        for model_name, checkpoint in checkpoints.items():
+            if options['resume'] and checkpoint.completed:
+                self.stdout.write(f'Bulk load of {model_name} is already completed')
+                continue
+            queryset = self._get_objects(model_name, options)
+            if options['resume'] and checkpoint.last_id:
+                self.stdout.write(f'Resuming bulk load of {model_name} after id {checkpoint.last_id}')
+                queryset = queryset.filter(id__gt=checkpoint.last_id)
+            else:
+                checkpoint.clear()
+            stats = loader.load(model_name, list(queryset.values_list('id', flat=True)), checkpoint=checkpoint)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model_name}: {stats["triples"]} triples of {stats["total"]} objects loaded '
+                f'in {stats["duration"]:.1f}s ({stats["triples_per_second"]:.0f} triples/s)'))
+            checkpoint.complete()
+        for checkpoint in checkpoints.values():  # resumed load of the next run doesn't skip anything.
+            checkpoint.clear()
+
     def _init_catalog_metadata(self, options):
         dataset = apps.get_model('datasets.Dataset')
         resource = apps.get_model('resources.Resource')
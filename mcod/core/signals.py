@@ -1,5 +1,21 @@
+import threading
+from contextlib import contextmanager
+
 from django.dispatch import Signal, dispatcher
 
+_muted = threading.local()
+
+
+@contextmanager
+def mute_signals(*signals):
+    """Signals sent inside the block (in the current thread) are not delivered to receivers."""
+    previous = getattr(_muted, 'signals', frozenset())
+    _muted.signals = previous | frozenset(signals)
+    try:
+        yield
+    finally:
+        _muted.signals = previous
+
 
 class ExtendedSignal(Signal):
     def __init__(self, providing_args=None, use_caching=False):
@@ -9,8 +25,12 @@ class ExtendedSignal(Signal):
         providing_args.append('state')
         super().__init__(providing_args=providing_args, use_caching=use_caching)
 
+    @property
+    def is_muted(self):
+        return self in getattr(_muted, 'signals', ())
+
     def send(self, sender, instance, *args, **named):
-        if not self.receivers or self.sender_receivers_cache.get(sender) is dispatcher.NO_RECEIVERS:
+        if not self.receivers or self.sender_receivers_cache.get(sender) is dispatcher.NO_RECEIVERS or self.is_muted:
             return []
 
         return [
@@ -19,7 +39,7 @@ class ExtendedSignal(Signal):
         ]
 
     def send_robust(self, sender, instance, *args, **named):
-        if not self.receivers or self.sender_receivers_cache.get(sender) is dispatcher.NO_RECEIVERS:
+        if not self.receivers or self.sender_receivers_cache.get(sender) is dispatcher.NO_RECEIVERS or self.is_muted:
             return []
 
         responses = []
@@ -0,0 +1,30 @@
+from unittest import mock
+
+import pytest
+
+from mcod.core.api.rdf.tasks import (
+    delete_graph_with_related_update_task,
+    update_graph_with_related_task,
+    update_graphs_task,
+)
+from mcod.core.api.search.tasks import bulk_update_documents, update_related_task
+from mcod.lib.rdf.catalog_cache import CatalogCache
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('task, args', [
+    (update_graphs_task, ('datasets', 'Dataset', [1])),
+    (update_graph_with_related_task, ('datasets', 'Dataset', 1)),
+    (delete_graph_with_related_update_task, (
+        'resources', 'Resource', 1, [{'app_label': 'datasets', 'model_cls': 'Dataset', 'instance_id': 1}])),
+    (update_related_task, ('datasets', 'Dataset', [1])),
+    (bulk_update_documents, ('organizations', 'Organization', [1])),
+])
+def test_tasks_writing_catalog_objects_invalidate_catalog(task, args):
+    cache = CatalogCache()
+    version = cache.version
+    with mock.patch('mcod.core.api.rdf.tasks.registry'), \
+            mock.patch('mcod.core.api.search.tasks.registry') as search_registry:
+        search_registry.get_documents.return_value = []
+        task(*args)
+    assert cache.version == version + 1
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import falcon
+import marshmallow as ma
+import pytest
+
+from mcod.core.api.media import ExportHandler
+from mcod.core.api.views import TabularView
+from mcod.core.utils import iter_in_chunks
+
+
+class ItemSchema(ma.Schema):
+    name = ma.fields.Str(data_key='Name')
+    count = ma.fields.Int(data_key='Count')
+
+    def get_csv_headers(self):
+        return [field.data_key for field in self.fields.values()]
+
+
+def test_iter_in_chunks():
+    assert list(iter_in_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_in_chunks([], 2)) == []
+
+
+def test_export_handler_streams_csv_in_chunks(mocker):
+    mocker.patch('mcod.core.api.media.EXPORT_CHUNK_SIZE', 2)
+    context = SimpleNamespace(
+        data=[{'name': f'item {i}', 'count': i} for i in range(3)],
+        serializer_schema=ItemSchema(many=True),
+    )
+    chunks = list(ExportHandler().iter_csv(context))
+    assert len(chunks) == 2
+    assert b''.join(chunks) == b'Name;Count\r\nitem 0;0\r\nitem 1;1\r\nitem 2;2\r\n'
+    assert ExportHandler().serialize(context, 'text/csv') == b''.join(chunks)
+
+
+@pytest.mark.parametrize('export_format, streamed', [('csv', True), ('xlsx', True), ('xml', False)])
+def test_tabular_view_streams_only_csv_and_xlsx_exports(export_format, streamed):
+    context = SimpleNamespace(data=[{'name': 'item', 'count': 1}], serializer_schema=ItemSchema(many=True))
+
+    class Handler:
+        def __init__(self, request, response):
+            pass
+
+        def run(self, *args, **kwargs):
+            return context
+
+    response = falcon.Response()
+    TabularView().handle(None, response, Handler, export_format=export_format)
+    assert (response.stream is not None) is streamed
+    assert (response.media is context) is not streamed
+    assert response.content_type == {'csv': 'text/csv', 'xlsx': 'application/vnd.ms-excel',
+                                     'xml': 'application/xml'}[export_format]
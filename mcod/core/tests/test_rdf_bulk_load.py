@@ -0,0 +1,59 @@
+import pytest
+from rdflib import ConjunctiveGraph, URIRef
+
+from mcod.core.management.commands.rdf_db import Command as RdfDbCommand
+
+from mcod.datasets.models import Dataset
+from mcod.lib.rdf.bulk_load import BulkLoadCheckpoint, GraphStoreBulkLoader
+
+
+class InMemoryGraphStore:
+    def __init__(self):
+        self.graph = ConjunctiveGraph()
+        self.posts = 0
+
+    def post(self, data, content_type='application/n-triples'):
+        self.graph.parse(data=data.decode('utf-8'), format='nt')
+        self.posts += 1
+
+
+def test_bulk_loader_loads_graphs_of_objects_in_batches(resource):
+    store = InMemoryGraphStore()
+    checkpoint = BulkLoadCheckpoint('datasets.Dataset')
+    checkpoint.clear()
+    ids = list(Dataset.objects.order_by('id').values_list('id', flat=True))
+    loader = GraphStoreBulkLoader(store, workers=1, chunk_size=1, batch_size=1)
+
+    stats = loader.load('datasets.Dataset', ids, checkpoint=checkpoint)
+
+    graphs = [obj.to_rdf_graph() for obj in Dataset.objects.filter(id__in=ids)]
+    assert stats['objects'] == len(ids)
+    assert stats['batches'] == store.posts == len(ids)
+    assert len(store.graph) <= stats['triples'] == sum(len(graph) for graph in graphs)
+    assert {s for graph in graphs for s in graph.subjects() if isinstance(s, URIRef)} <= set(store.graph.subjects())
+    assert checkpoint.last_id == ids[-1]
+    checkpoint.clear()
+
+
+@pytest.mark.django_db
+def test_resumed_bulk_load_skips_models_loaded_completely(resource, mocker):
+    checkpoints = [BulkLoadCheckpoint(model_name) for model_name in ('datasets.Dataset', 'resources.Resource')]
+    for checkpoint in checkpoints:
+        checkpoint.clear()
+    mocker.patch('mcod.core.management.commands.rdf_db.GraphStoreClient')
+    loader = mocker.patch('mcod.core.management.commands.rdf_db.GraphStoreBulkLoader').return_value
+    loader.load.side_effect = [
+        {'triples': 1, 'total': 1, 'duration': 1, 'triples_per_second': 1}, ConnectionError('Graph store is down')]
+    options = {
+        'resume': False, 'workers': 1, 'chunk_size': 1, 'batch_size': 1, 'models': None,
+        'dataset_ids': '', 'resource_ids': ''}
+    with pytest.raises(ConnectionError):
+        RdfDbCommand()._bulk_load(options)
+    assert checkpoints[0].completed
+
+    loader.load.reset_mock(side_effect=True)
+    loader.load.return_value = {'triples': 1, 'total': 1, 'duration': 1, 'triples_per_second': 1}
+    RdfDbCommand()._bulk_load({**options, 'resume': True})
+
+    assert [call[0][0] for call in loader.load.call_args_list] == ['resources.Resource']
+    assert not any(checkpoint.completed or checkpoint.last_id for checkpoint in checkpoints)
@@ -0,0 +1,131 @@
+from unittest import mock
+
+import pytest
+
+from mcod.categories.factories import CategoryFactory
+from mcod.categories.models import Category
+from mcod.core.api.rdf.registry import registry
+from mcod.core.api.rdf.update_queue import CREATE, UPDATE, UPDATE_RELATED, GraphUpdateQueue
+from mcod.datasets.factories import DatasetFactory
+from mcod.datasets.models import Dataset
+
+
+def test_graph_update_queue_coalesces_updates():
+    queue = GraphUpdateQueue()
+    queue.con.delete(queue.key)
+    queue.push('datasets', 'Dataset', 1, UPDATE)
+    queue.push('datasets', 'Dataset', 1, UPDATE, UPDATE_RELATED)
+    queue.push('datasets', 'Dataset', 2, CREATE)
+    queue.push('datasets', 'Dataset', 3, UPDATE, UPDATE_RELATED)
+    queue.discard('datasets', 'Dataset', 3)
+
+    grouped = sorted(queue._group(queue.con.smembers(queue.key)), key=lambda entry: entry[1])
+    assert grouped == [
+        (Dataset, 1, {UPDATE, UPDATE_RELATED}),
+        (Dataset, 2, {CREATE}),
+        (Dataset, 3, {UPDATE_RELATED}),
+    ]
+    queue.con.delete(queue.key)
+
+
+def test_graph_update_queue_splits_rejected_batch():
+    queue = GraphUpdateQueue()
+    entries = [(Dataset, instance_id, {UPDATE}) for instance_id in range(1, 5)]
+
+    def get_update(batch):
+        return ' '.join(str(instance_id) for _, instance_id, _ in batch), {}
+
+    def update(query, initNs):
+        if '3' in query.split():
+            raise ValueError('Rejected')
+
+    stats = {'updated': 0, 'failed': 0, 'requests': 0, 'splits': 0}
+    with mock.patch.object(queue, '_get_update', side_effect=get_update), \
+            mock.patch.object(registry, 'sparql_store') as sparql_store:
+        sparql_store.update.side_effect = update
+        queue._update(entries, stats)
+    assert stats == {'updated': 3, 'failed': 1, 'requests': 5, 'splits': 2}
+
+
+@pytest.fixture
+def queue():
+    _queue = GraphUpdateQueue()
+    _queue.con.delete(_queue.key, _queue.since_key, _queue.taken_key)
+    yield _queue
+    _queue.con.delete(_queue.key, _queue.since_key, _queue.taken_key)
+
+
+def test_graph_update_queue_discards_taken_updates(queue):
+    queue.push('datasets', 'Dataset', 1, UPDATE, UPDATE_RELATED)
+    queue.push('datasets', 'Dataset', 2, CREATE)
+    (taken_set,), _ = queue._take()
+    queue.discard('datasets', 'Dataset', 1)
+    queue.discard('datasets', 'Dataset', 2)
+
+    assert queue._group(queue.con.smembers(taken_set)) == [(Dataset, 1, {UPDATE_RELATED})]
+    queue._done(taken_set)
+
+
+def test_graph_update_queue_flush_sends_updates_once(queue):
+    queue.push('datasets', 'Dataset', 1, UPDATE)
+    queue.push('datasets', 'Dataset', 2, CREATE)
+    with mock.patch.object(GraphUpdateQueue, '_get_update', return_value=('query', {})), \
+            mock.patch.object(registry, 'sparql_store') as sparql_store, \
+            mock.patch('mcod.core.api.rdf.update_queue.invalidate_catalog'):
+        assert queue.flush() == {'queued': 2, 'updated': 2, 'failed': 0, 'requests': 1, 'splits': 0}
+        assert not queue.con.exists(queue.key)
+        assert not queue.con.smembers(queue.taken_key)
+        assert queue.flush()['queued'] == 0
+    assert sparql_store.update.call_count == 1
+
+
+@mock.patch('mcod.core.api.rdf.update_queue.settings.RDF_UPDATE_QUEUE_BATCH_SIZE', 1)
+def test_graph_update_queue_keeps_unsent_batches_of_interrupted_flush(queue):
+    queue.push('datasets', 'Dataset', 1, UPDATE)
+    queue.push('datasets', 'Dataset', 2, UPDATE)
+    with mock.patch.object(GraphUpdateQueue, '_get_update', return_value=('query', {})), \
+            mock.patch.object(registry, 'sparql_store') as sparql_store:
+        sparql_store.update.side_effect = [None, ConnectionError('Store unavailable')]
+        with pytest.raises(ConnectionError):
+            queue.flush()
+    (taken_set,) = queue.con.smembers(queue.taken_key)
+    assert queue.con.scard(taken_set) == 1
+    queue._done(taken_set)
+
+
+def test_graph_update_queue_is_flushed_by_one_worker_at_a_time(queue):
+    queue.push('datasets', 'Dataset', 1, UPDATE)
+    with mock.patch.object(registry, 'sparql_store') as sparql_store:
+        with queue.flush_lock() as locked:
+            assert locked
+            assert GraphUpdateQueue().flush()['queued'] == 0
+    assert not sparql_store.update.called
+    assert queue.con.scard(queue.key) == 1
+
+
+@pytest.mark.django_db
+def test_graph_update_queue_skips_graphs_of_removed_and_unpublished_objects(queue):
+    published, draft, removed = DatasetFactory.create_batch(3)
+    Dataset.raw.filter(pk=draft.pk).update(status='draft')
+    Dataset.raw.filter(pk=removed.pk).update(is_removed=True)
+    graph_cls = mock.Mock()
+    entries = [(dataset.pk, {CREATE, UPDATE_RELATED}) for dataset in (published, draft, removed)]
+    with mock.patch.object(registry, 'get_graph_classes', return_value=[graph_cls]), \
+            mock.patch.object(registry, 'update_related_many', return_value=[]) as update_related_many:
+        queue._get_model_queries(Dataset, entries)
+
+    graph = graph_cls.return_value
+    assert [dataset.pk for dataset in graph.create.call_args[0][0]] == [published.pk]
+    assert not graph.update.called
+    assert [dataset.pk for dataset in update_related_many.call_args[0][1]] == [published.pk, draft.pk, removed.pk]
+
+
+@pytest.mark.django_db
+def test_graph_update_queue_updates_graphs_related_to_removed_category(queue):
+    category = CategoryFactory.create()
+    Category.raw.filter(pk=category.pk).update(is_removed=True)
+    with mock.patch.object(registry, 'update_related_many', return_value=[('query', {})]) as update_related_many:
+        assert queue._get_model_queries(Category, [(category.pk, {UPDATE_RELATED})]) == [('query', {})]
+    model, instances = update_related_many.call_args[0]
+    assert model is Category
+    assert [obj.pk for obj in instances] == [category.pk]
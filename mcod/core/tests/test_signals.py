@@ -0,0 +1,18 @@
+from mcod.core.signals import ExtendedSignal, mute_signals
+
+
+def test_mute_signals():
+    signal = ExtendedSignal()
+    other_signal = ExtendedSignal()
+    received = []
+
+    def receiver(sender, instance, *args, **kwargs):
+        received.append(instance)
+
+    signal.connect(receiver, weak=False)
+    other_signal.connect(receiver, weak=False)
+    with mute_signals(signal):
+        assert signal.send(None, 1) == []
+        other_signal.send(None, 2)
+    signal.send(None, 3)
+    assert received == [2, 3]
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from mcod.core.api.search.update_queue import UPDATE, UPDATE_WITH_RELATED, IndexUpdateQueue
+from mcod.datasets.models import Dataset
+from mcod.suggestions.documents import AcceptedDatasetSubmissionDoc
+from mcod.suggestions.factories import AcceptedDatasetSubmissionFactory
+from mcod.suggestions.models import AcceptedDatasetSubmission
+
+
+@pytest.fixture
+def queue(mocker):
+    mocker.patch('mcod.core.api.search.update_queue.DEDConfig.autosync_enabled', return_value=True)
+    _queue = IndexUpdateQueue()
+    _queue.con.delete(_queue.key, _queue.taken_key)
+    yield _queue
+    _queue.con.delete(_queue.key, _queue.taken_key)
+
+
+def test_index_update_queue_coalesces_updates(queue):
+    for action in (UPDATE, UPDATE_WITH_RELATED, UPDATE):
+        queue.push('datasets', 'Dataset', 1, action=action)
+    queue.push('datasets', 'Dataset', 2, action=UPDATE)
+    queue.push('datasets', 'Dataset', 3, action=UPDATE)
+    queue.discard('datasets', 'Dataset', 3)
+
+    grouped = queue._group(queue.con.smembers(queue.key))
+    assert grouped == {Dataset: {1: True, 2: False}}
+
+
+def test_index_update_queue_flush_updates_documents_once(queue, mocker):
+    mocker.patch.object(IndexUpdateQueue, '_get_instances',
+                        side_effect=lambda model, ids: [SimpleNamespace(pk=pk) for pk in ids])
+    update_documents = mocker.patch.object(IndexUpdateQueue, '_update_documents',
+                                           side_effect=lambda model, ids: len(ids))
+    get_related = mocker.patch.object(IndexUpdateQueue, '_get_related_instances', return_value={})
+    queue.push('datasets', 'Dataset', 1, action=UPDATE_WITH_RELATED)
+    queue.push('datasets', 'Dataset', 2, action=UPDATE)
+
+    assert queue.flush() == {'queued': 2, 'indexed': 2}
+    model, ids = update_documents.call_args[0]
+    assert model is Dataset
+    assert sorted(ids) == [1, 2]
+    assert [instance.pk for instance in get_related.call_args[0][0]] == [1]
+    assert not queue.con.exists(queue.key)
+    assert not queue.con.smembers(queue.taken_key)
+    assert queue.flush() == {'queued': 0, 'indexed': 0}
+    assert update_documents.call_count == 1
+
+
+def test_index_update_queue_is_flushed_by_one_worker_at_a_time(queue, mocker):
+    update_documents = mocker.patch.object(IndexUpdateQueue, '_update_documents')
+    queue.push('datasets', 'Dataset', 1, action=UPDATE)
+    with queue.flush_lock() as locked:
+        assert locked
+        assert IndexUpdateQueue().flush() == {'queued': 0, 'indexed': 0}
+    assert not update_documents.called
+    assert queue.con.scard(queue.key) == 1
+
+
+@pytest.mark.django_db
+def test_index_update_queue_indexes_objects_of_document_queryset(queue, mocker):
+    update = mocker.patch.object(AcceptedDatasetSubmissionDoc, 'update')
+    finished = AcceptedDatasetSubmissionFactory.create(status='publication_finished')
+    draft = AcceptedDatasetSubmissionFactory.create(status='draft')
+
+    assert queue._update_documents(AcceptedDatasetSubmission, [finished.pk, draft.pk]) == 1
+    assert [instance.pk for instance in update.call_args[0][0]] == [finished.pk]
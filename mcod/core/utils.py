@@ -10,8 +10,9 @@ from abc import ABC, abstractmethod
 from collections import OrderedDict
 from http.cookies import SimpleCookie
 from io import StringIO, TextIOWrapper
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional, TextIO, Union
+from typing import Iterable, List, Optional, TextIO, Union
 from xml.dom.minidom import parseString
 
 import json_api_doc
@@ -281,10 +282,38 @@ def complete_invalid_xml(phrase):
 
 
 def save_as_csv(file_object, headers, data, delimiter=";"):
+    """Writes rows of `data` (any iterable, e.g. a generator) one by one and returns the number of written rows."""
     csv_writer = csv.DictWriter(file_object, fieldnames=headers, delimiter=delimiter)
     csv_writer.writeheader()
+    count = 0
     for row in data:
         csv_writer.writerow(row)
+        count += 1
+    return count
+
+
+def iter_in_chunks(data, chunk_size):
+    """
+    Yields lists of at most `chunk_size` objects of `data` (queryset or any other iterable).
+    Queryset is fetched from the database chunk by chunk - with `.iterator()` or, if it uses `prefetch_related`
+    (ignored by `.iterator()`), by primary keys of the consecutive chunks.
+    """
+    if hasattr(data, "iterator"):
+        if not data._prefetch_related_lookups:
+            data = data.iterator(chunk_size=chunk_size)
+        elif data.query.can_filter():
+            pks = list(data.values_list("pk", flat=True))
+            for i in range(0, len(pks), chunk_size):
+                chunk_pks = pks[i:i + chunk_size]
+                objs = data.in_bulk(chunk_pks)
+                yield [objs[pk] for pk in chunk_pks if pk in objs]
+            return
+    iterator = iter(data)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
 
 def prepare_error_folder(path: str) -> str:
@@ -338,6 +367,23 @@ class WriterInterface(ABC):
         """
         raise NotImplementedError
 
+    def save_chunks(
+        self,
+        file_object: Union[StringIO, TextIOWrapper, TextIO],
+        chunks: Iterable[list],
+        language_catalog_path: Optional[str] = None,
+    ):
+        """
+        Saves data given as an iterable of chunks (lists of rows).
+        By default chunks are joined and saved at once, writers able to save data
+        incrementally override it.
+        """
+        self.save(
+            file_object=file_object,
+            data=[row for chunk in chunks for row in chunk],
+            language_catalog_path=language_catalog_path,
+        )
+
 
 class CSVWriter(WriterInterface):
     """
@@ -370,6 +416,20 @@ class CSVWriter(WriterInterface):
         for row in data:
             csv_writer.writerow(row)
 
+    def save_chunks(
+        self,
+        file_object: Union[StringIO, TextIOWrapper],
+        chunks: Iterable[List[dict]],
+        language_catalog_path: Optional[str] = None,
+    ):
+        """Save data as csv file, chunk by chunk."""
+        csv_writer = csv.DictWriter(
+            file_object, fieldnames=self.headers, delimiter=self.delimiter
+        )
+        csv_writer.writeheader()
+        for chunk in chunks:
+            csv_writer.writerows(chunk)
+
 
 class XMLWriter(WriterInterface):
     """
@@ -408,7 +468,35 @@ class XMLWriter(WriterInterface):
         data: Union[dict, List[dict]],
         language_catalog_path: Optional[str] = None,
     ):
+        file_object.write(self._to_pretty_xml(data, language_catalog_path))
 
+    def save_chunks(
+        self,
+        file_object: Union[StringIO, TextIOWrapper],
+        chunks: Iterable[List[dict]],
+        language_catalog_path: Optional[str] = None,
+    ):
+        """
+        Writes XML document chunk by chunk - each chunk is converted separately and only
+        its elements (without the XML declaration and the root element) are written.
+        The result is the same as for `save` called with all chunks joined.
+        """
+        closing_line = None
+        for data in chunks:
+            if not data:
+                continue
+            lines = self._to_pretty_xml(data, language_catalog_path).splitlines(keepends=True)
+            if closing_line is None:
+                file_object.write("".join(lines[:2]))
+            file_object.write("".join(lines[2:-1]))
+            closing_line = lines[-1]
+        file_object.write(closing_line or self._to_pretty_xml([], language_catalog_path))
+
+    def _to_pretty_xml(
+        self,
+        data: Union[dict, List[dict]],
+        language_catalog_path: Optional[str] = None,
+    ) -> str:
         xml = dicttoxml(
             data,
             attr_type=False,
@@ -418,7 +506,7 @@ class XMLWriter(WriterInterface):
 
         try:
             dom = parseString(xml)
-            file_object.write(dom.toprettyxml())
+            return dom.toprettyxml()
         except ExpatError as exc:
             logger.error(f"XML parsing failed: {exc}")
             if language_catalog_path:
@@ -1,97 +1,174 @@
 import datetime
+import time
+from itertools import islice
 
 from django.apps import apps
-from django.db.models import Sum
+from django.db.models import Case, F, IntegerField, Sum, Value, When
 from django.db.transaction import atomic
 from django_elasticsearch_dsl.registries import registry
 from django_redis import get_redis_connection
 from elasticsearch.helpers import bulk as streaming_bulk
 from elasticsearch_dsl.connections import connections
+from redis.exceptions import ResponseError
 
 from mcod import settings
 
 VIEWS_COUNT_PREFIX = 'views_count'
 DOWNLOADS_COUNT_PREFIX = 'downloads_count'
+COUNTERS_KEY_PREFIX = 'counters'
 
 
 class Counter:
+    """
+    Liczniki wyświetleń i pobrań obiektów zbierane w redis (hash dla każdej pary operacja - model).
+
+    Przed zapisem hash jest atomowo przemianowany (RENAME) na snapshot, więc wartości zwiększane
+    w trakcie zapisu trafiają do nowego hasha i zostaną zapisane przy kolejnym uruchomieniu.
+    Wartości ze snapshotu są usuwane zaraz po zapisie ich paczki - przerwany zapis kontynuuje kolejne uruchomienie.
+    """
 
     def __init__(self):
         self.con = get_redis_connection()
         self.date_counter_labels = ['resources.Resource']
         self.labels_es_actions = {label: [] for label in settings.COUNTED_MODELS}
+        self.updated_datasets = {}
+        self.updated_dataset_counters = {}
+        self.chunk_size = settings.COUNTERS_SAVE_CHUNK_SIZE
 
-    def _get_last_save(self, oper):
-        return self.con.get(f'{oper}_last_save') or "0"
-
-    def _clear_counters(self):
-        for oper in (VIEWS_COUNT_PREFIX, DOWNLOADS_COUNT_PREFIX):
-            last_save = self._get_last_save(oper)
-            for label in settings.COUNTED_MODELS:
-                for k in self.con.scan_iter(f'{oper}:{last_save}:{label}:*'):
-                    self.con.delete(k)
+    @staticmethod
+    def _get_key(oper, label):
+        return f'{COUNTERS_KEY_PREFIX}:{oper}:{label}'
 
     def incr_download_count(self, obj_id):
-        last_save = self._get_last_save(DOWNLOADS_COUNT_PREFIX)
-        key = f"{DOWNLOADS_COUNT_PREFIX}:{last_save}:resources.Resource:{obj_id}"
-        self.con.incr(key)
+        self.con.hincrby(self._get_key(DOWNLOADS_COUNT_PREFIX, 'resources.Resource'), obj_id)
 
     def incr_view_count(self, label, obj_id):
-        last_save = self._get_last_save(VIEWS_COUNT_PREFIX)
-        key = f"{VIEWS_COUNT_PREFIX}:{last_save}:{label}:{obj_id}"
-        self.con.incr(key)
+        self.con.hincrby(self._get_key(VIEWS_COUNT_PREFIX, label), obj_id)
+
+    def move_legacy_counters(self, oper, label):
+        """
+        Przenosi do hasha liczniki zapisane w osobnych kluczach dla obiektów (`{oper}:{last_save}:{label}:{id}`).
+        Jednorazowa migracja (komenda `move_legacy_counters`), zwraca liczbę przeniesionych kluczy.
+        """
+        key = self._get_key(oper, label)
+        keys = iter(self.con.scan_iter(f'{oper}:*:{label}:*', count=self.chunk_size))
+        moved = 0
+        while True:
+            chunk = list(islice(keys, self.chunk_size))
+            if not chunk:
+                break
+            with self.con.pipeline() as pipe:
+                pipe.mget(chunk)
+                pipe.delete(*chunk)
+                values, _ = pipe.execute()
+            with self.con.pipeline(transaction=False) as pipe:
+                for k, value in zip(chunk, values):
+                    if value is not None:
+                        pipe.hincrby(key, k.decode().split(':')[-1], int(value))
+                        moved += 1
+                pipe.execute()
+        return moved
+
+    def take_snapshots(self, oper, label):
+        """
+        Przemianowuje hash z licznikami na snapshot.
+        Zwraca nazwy wszystkich snapshotów czekających na zapis (również z przerwanych uruchomień).
+        """
+        key = self._get_key(oper, label)
+        try:
+            self.con.rename(key, f'{key}:snapshot:{time.time_ns()}')
+        except ResponseError:  # no such key - nothing counted since the last save.
+            pass
+        return sorted(k.decode() for k in self.con.scan_iter(f'{key}:snapshot:*'))
+
+    def _iter_snapshot_chunks(self, snapshot):
+        items = self.con.hscan_iter(snapshot, count=self.chunk_size)
+        while True:
+            chunk = list(islice(items, self.chunk_size))
+            if not chunk:
+                break
+            increments = {}
+            for obj_id, value in chunk:
+                try:
+                    increments[int(obj_id)] = increments.get(int(obj_id), 0) + int(value)
+                except ValueError:
+                    continue
+            yield [obj_id for obj_id, _ in chunk], increments
 
-    @atomic
     def save_counters(self):
         """
         Tworzy lub uaktualnia liczniki w bazie danych i elasticsearch'u
         na podstawie wartości zapisanych w redis od ostatniej aktualizacji.
 
+        Liczniki są zapisywane paczkami (każda w osobnej transakcji), aktualizacje
+        do elasticsearch'a są wysyłane jednym zapytaniem bulk na końcu. Sumy liczników
+        zbiorów danych są liczone z bazy danych raz, po zapisaniu wszystkich paczek.
+
         Metoda powinna być wołana jako zadanie przez CRON.
         """
         resource_counter_model = {
             VIEWS_COUNT_PREFIX: apps.get_model('counters.ResourceViewCounter'),
             DOWNLOADS_COUNT_PREFIX: apps.get_model('counters.ResourceDownloadCounter'),
         }
-        datasets_updates = {}
         today = datetime.date.today()
+        stats = {}
         for oper in (VIEWS_COUNT_PREFIX, DOWNLOADS_COUNT_PREFIX):
-            last_save = self._get_last_save(oper)
-            self.con.set(f'{oper}_last_save', str(int(datetime.datetime.now().timestamp())))
-
             for label, qs_params in settings.COUNTED_MODELS.items():
                 model = apps.get_model(label)
                 model.is_indexable = False
-                data_key = f'{oper}:{last_save}:{label}:*'
-
-                if label in self.date_counter_labels:
-                    counter_model = resource_counter_model[oper]
-                    self.save_resource_date_counters(oper, counter_model, data_key, label, model, today)
-
-                for k in self.con.scan_iter(data_key):
-                    obj_id = int(k.decode().split(':')[-1])
-                    try:
-                        obj = model.objects.get(pk=obj_id, **qs_params)
-                    except model.DoesNotExist:
-                        self.con.delete(k)
-                        continue
-
-                    incr_val = int(self.con.get(k))
-                    counter = getattr(obj, oper) + incr_val
-                    model.objects.filter(pk=obj_id, **qs_params).update(**{oper: counter})  # w/o send `save` signal.
-                    self.add_es_action(model, obj, oper, counter, incr_val, datasets_updates)
-                    self.con.delete(k)
-
-        self.save_es_actions(datasets_updates)
+                for snapshot in self.take_snapshots(oper, label):
+                    for fields, increments in self._iter_snapshot_chunks(snapshot):
+                        with atomic():
+                            if label in self.date_counter_labels:
+                                counter_model = resource_counter_model[oper]
+                                self.save_resource_date_counters(
+                                    oper, counter_model, increments, label, model, today)
+                            else:
+                                self.save_model_counters(oper, increments, label, model, qs_params)
+                        self.con.hdel(snapshot, *fields)
+                        stats[f'{oper}:{label}'] = stats.get(f'{oper}:{label}', 0) + len(increments)
+                    self.con.delete(snapshot)
+
+        for oper, counter_model in resource_counter_model.items():
+            self.save_dataset_date_counters(oper, counter_model)
+        self.save_es_actions()
+        return stats
+
+    @staticmethod
+    def _increments_case(increments):
+        return Case(
+            *[When(pk=pk, then=Value(value)) for pk, value in increments.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
 
-    def save_resource_date_counters(self, oper, counter_model, data_key, label, model, today):
+    def save_model_counters(self, oper, increments, label, model, qs_params):
+        objs = model.objects.filter(**qs_params).in_bulk(list(increments))
+        if not objs:
+            return
+        obj_increments = {pk: increments[pk] for pk in objs}
+        # w/o send `save` signal.
+        model.objects.filter(pk__in=list(objs)).update(**{oper: F(oper) + self._increments_case(obj_increments)})
+        document = next(iter(registry._models[model]))
+        dataset_increments = {}
+        for pk, obj in objs.items():
+            self.labels_es_actions[label].append({
+                '_op_type': 'update',
+                '_type': 'doc',
+                '_index': document.Index.name,
+                '_id': pk,
+                'doc': {oper: getattr(obj, oper) + obj_increments[pk]}
+            })
+            dataset_id = getattr(obj, 'dataset_id', None)
+            if dataset_id:
+                dataset_increments[dataset_id] = dataset_increments.get(dataset_id, 0) + obj_increments[pk]
+        if dataset_increments:
+            apps.get_model('datasets.Dataset').objects.filter(pk__in=list(dataset_increments)).update(
+                **{oper: F(oper) + self._increments_case(dataset_increments)})
+            self.updated_datasets.setdefault(oper, set()).update(dataset_increments)
+
+    def save_resource_date_counters(self, oper, counter_model, resources_to_update, label, model, today):
         view = label.split('.')[0]
-        resources_to_update = {}
-        for k in self.con.scan_iter(data_key):
-            count_value = int(self.con.get(k))
-            obj_id = int(k.decode().split(':')[-1])
-            resources_to_update[obj_id] = count_value
-            self.con.delete(k)
         existing_resources_to_update = \
             list(model.objects.filter(pk__in=list(resources_to_update.keys()),
                                       status='published').values_list('pk', flat=True))
@@ -117,9 +194,8 @@ class Counter:
         new_resource_counts = \
             updated_counters.values('resource_id').annotate(**annotation).values(
                 'resource_id', annotation_label)
-        new_dataset_counts = \
-            updated_counters.values('resource__dataset_id').annotate(**annotation).values(
-                'resource__dataset_id', annotation_label)
+        dataset_ids = updated_counters.values_list('resource__dataset_id', flat=True).distinct()
+        self.updated_dataset_counters.setdefault(oper, set()).update(x for x in dataset_ids if x)
         es_oper_attr = f'computed_{oper}'
         for res in new_resource_counts:
             self.labels_es_actions['resources.Resource'].append({
@@ -129,61 +205,41 @@ class Counter:
                 '_id': res['resource_id'],
                 'doc': {es_oper_attr: res[annotation_label]}
             })
-        for dataset in new_dataset_counts:
-            try:
-                self.labels_es_actions['datasets'].append({
-                    '_op_type': 'update',
-                    '_index': settings.ELASTICSEARCH_INDEX_NAMES['datasets'],
-                    '_type': 'doc',
-                    '_id': dataset['resource__dataset_id'],
-                    'doc': {es_oper_attr: dataset[annotation_label]}
-                })
-            except KeyError:
-                self.labels_es_actions['datasets'] = [{
-                    '_op_type': 'update',
-                    '_index': settings.ELASTICSEARCH_INDEX_NAMES['datasets'],
-                    '_type': 'doc',
-                    '_id': dataset['resource__dataset_id'],
-                    'doc': {es_oper_attr: dataset[annotation_label]}
-                }]
 
-    def save_es_actions(self, datasets_updates):
-        dataset_model = apps.get_model('datasets.Dataset')
-        for dataset_id, data in datasets_updates.items():
-            dataset_model.objects.filter(pk=dataset_id).update(**data)
-            if 'datasets' not in self.labels_es_actions:
-                self.labels_es_actions['datasets'] = []
-            self.labels_es_actions['datasets'].append({
+    def save_dataset_date_counters(self, oper, counter_model):
+        """Sumy liczników wszystkich zasobów zbiorów danych, których liczniki zostały zapisane."""
+        dataset_ids = self.updated_dataset_counters.get(oper)
+        if not dataset_ids:
+            return
+        annotation_label = 'tmp_' + oper
+        new_dataset_counts = \
+            counter_model.objects.filter(resource__dataset_id__in=dataset_ids).values(
+                'resource__dataset_id').annotate(**{annotation_label: Sum('count')}).values(
+                'resource__dataset_id', annotation_label)
+        for dataset in new_dataset_counts:
+            self.labels_es_actions.setdefault('datasets', []).append({
                 '_op_type': 'update',
                 '_index': settings.ELASTICSEARCH_INDEX_NAMES['datasets'],
                 '_type': 'doc',
-                '_id': dataset_id,
-                'doc': data
+                '_id': dataset['resource__dataset_id'],
+                'doc': {f'computed_{oper}': dataset[annotation_label]}
             })
-        es_actions = []
-        for view_actions in self.labels_es_actions.values():
-            es_actions.extend(view_actions)
+
+    def save_es_actions(self):
+        dataset_model = apps.get_model('datasets.Dataset')
+        for oper, dataset_ids in self.updated_datasets.items():
+            for dataset_id, value in dataset_model.objects.filter(pk__in=dataset_ids).values_list('pk', oper):
+                self.labels_es_actions.setdefault('datasets', []).append({
+                    '_op_type': 'update',
+                    '_index': settings.ELASTICSEARCH_INDEX_NAMES['datasets'],
+                    '_type': 'doc',
+                    '_id': dataset_id,
+                    'doc': {oper: value}
+                })
         streaming_bulk(
             connections.get_connection(),
-            es_actions,
+            (action for view_actions in self.labels_es_actions.values() for action in view_actions),
             raise_on_error=False,
             raise_on_exception=False,
             max_retries=2
         )
-
-    def add_es_action(self, model, obj, oper, counter, incr_val, datasets_updates):
-        document = next(iter(registry._models[model]))
-        self.labels_es_actions[model._meta.label].append({
-            '_op_type': 'update',
-            '_type': 'doc',
-            '_index': document.Index.name,
-            '_id': obj.pk,
-            'doc': {oper: counter}
-        })
-        try:
-            if obj.dataset_id not in datasets_updates:
-                datasets_updates[obj.dataset_id] = {}
-            datasets_updates[obj.dataset_id].setdefault(oper, getattr(obj.dataset, oper))
-            datasets_updates[obj.dataset_id][oper] += incr_val
-        except AttributeError:
-            pass
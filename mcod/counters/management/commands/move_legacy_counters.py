@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+
+from mcod import settings
+from mcod.counters.lib import DOWNLOADS_COUNT_PREFIX, VIEWS_COUNT_PREFIX, Counter
+
+
+class Command(BaseCommand):
+    help = 'Moves counters stored in separate redis keys for each object into hashes read by save_counters.'
+
+    def handle(self, *args, **options):
+        counter = Counter()
+        for oper in (VIEWS_COUNT_PREFIX, DOWNLOADS_COUNT_PREFIX):
+            for label in settings.COUNTED_MODELS:
+                moved = counter.move_legacy_counters(oper, label)
+                self.stdout.write(f'{oper} {label}: {moved} counter(s) moved.')
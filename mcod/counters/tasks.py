@@ -24,8 +24,7 @@ def get_directory_size(startpath):
 @extended_shared_task
 def save_counters():
     counter = Counter()
-    counter.save_counters()
-    return {}
+    return counter.save_counters()
 
 
 @extended_shared_task
@@ -0,0 +1 @@
+from mcod.core.tests.fixtures import *  # noqa
@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+
+from mcod.counters.lib import COUNTERS_KEY_PREFIX, Counter
+from mcod.counters.models import ResourceDownloadCounter, ResourceViewCounter
+from mcod.datasets.factories import DatasetFactory
+from mcod.resources.factories import ResourceFactory
+from mcod.showcases.factories import ShowcaseFactory
+from mcod.showcases.models import Showcase
+
+
+@pytest.fixture
+def counter(mocker):
+    mocker.patch('mcod.counters.lib.settings.COUNTERS_SAVE_CHUNK_SIZE', 2)
+    mocker.patch('mcod.counters.lib.settings.COUNTED_MODELS', {
+        'showcases.Showcase': {'status': 'published'},
+        'resources.Resource': {'status': 'published'},
+    })
+    mocker.patch('mcod.counters.lib.streaming_bulk')
+    _counter = Counter()
+    keys = list(_counter.con.scan_iter(f'{COUNTERS_KEY_PREFIX}:*'))
+    if keys:
+        _counter.con.delete(*keys)
+    return _counter
+
+
+@pytest.mark.django_db
+def test_save_counters_saves_snapshots_in_batches(counter, resource):
+    showcases = ShowcaseFactory.create_batch(3, status='published', views_count=10)
+    for showcase in showcases:
+        counter.incr_view_count('showcases.Showcase', showcase.id)
+    counter.incr_view_count('showcases.Showcase', showcases[0].id)
+    counter.incr_view_count('resources.Resource', resource.id)
+    counter.incr_download_count(resource.id)
+    counter.incr_download_count(resource.id)
+
+    stats = counter.save_counters()
+
+    assert stats == {
+        'views_count:showcases.Showcase': 3,
+        'views_count:resources.Resource': 1,
+        'downloads_count:resources.Resource': 1,
+    }
+    views = dict(Showcase.objects.filter(pk__in=[x.pk for x in showcases]).values_list('pk', 'views_count'))
+    assert views == {showcases[0].pk: 12, showcases[1].pk: 11, showcases[2].pk: 11}
+    today = datetime.date.today()
+    assert ResourceViewCounter.objects.get(resource=resource, timestamp=today).count == 1
+    assert ResourceDownloadCounter.objects.get(resource=resource, timestamp=today).count == 2
+    assert not list(counter.con.scan_iter(f'{COUNTERS_KEY_PREFIX}:*'))
+
+
+@pytest.mark.django_db
+def test_save_counters_sends_dataset_totals_of_all_chunks(counter):
+    dataset = DatasetFactory.create()
+    resources = ResourceFactory.create_batch(3, dataset=dataset, status='published')
+    ResourceViewCounter.objects.create(resource=resources[0], timestamp=datetime.date(2020, 1, 1), count=10)
+    for resource in resources:
+        counter.incr_view_count('resources.Resource', resource.id)
+
+    counter.save_counters()
+
+    dataset_actions = [
+        action for action in counter.labels_es_actions['datasets'] if 'computed_views_count' in action['doc']]
+    assert [(action['_id'], action['doc']) for action in dataset_actions] == [
+        (dataset.id, {'computed_views_count': 13})]
+
+
+def test_move_legacy_counters(counter):
+    counter.con.set('views_count:1600000000:resources.Resource:7', 3)
+    counter.con.set('views_count:1600000100:resources.Resource:7', 2)
+    call_command('move_legacy_counters')
+    assert counter.con.hget(f'{COUNTERS_KEY_PREFIX}:views_count:resources.Resource', '7') == b'5'
+    assert not list(counter.con.scan_iter('views_count:*:resources.Resource:*'))
+    counter.con.delete(f'{COUNTERS_KEY_PREFIX}:views_count:resources.Resource')
@@ -4,6 +4,7 @@ from dateutil.relativedelta import relativedelta
 from django.apps import apps
 from django.db.models import Count, Max, Prefetch, Q
 
+from mcod import settings
 from mcod.core.managers import SoftDeletableManager, SoftDeletableQuerySet
 from mcod.datasets.utils import _batch_qs
 
@@ -98,6 +99,30 @@ class DatasetQuerySet(SoftDeletableQuerySet):
 
         return data
 
+    def with_metadata_fetched_in_chunks(self, chunk_size=None):
+        """
+        Yields lists of published datasets (ordered by id) with metadata prefetched and annotated,
+        so the whole catalog is never kept in memory.
+        """
+        chunk_size = chunk_size or settings.CATALOG_METADATA_CHUNK_SIZE
+        base_queryset = self.filter(status='published')
+        queryset = self._with_metadata_prefetched(base_queryset).order_by('id')
+        last_id = 0
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                return
+            last_id = chunk[-1].id
+            annotated_queryset = self._with_metadata_annotated(
+                base_queryset.filter(id__in=[dataset.id for dataset in chunk]).values('id'))
+            id_to_extra_attrs = {
+                dataset.pop('id'): dataset for dataset in annotated_queryset
+            }
+            for dataset in chunk:
+                for key, value in id_to_extra_attrs.get(dataset.id, {}).items():
+                    setattr(dataset, key, value)
+            yield chunk
+
     def with_metadata_fetched(self):
         queryset = self.filter(status='published')
         queryset = self._with_metadata_prefetched(queryset)
@@ -159,6 +184,9 @@ class DatasetManager(SoftDeletableManager):
     def with_metadata_fetched_as_list(self):
         return super().get_queryset().with_metadata_fetched_as_list()
 
+    def with_metadata_fetched_in_chunks(self, chunk_size=None):
+        return super().get_queryset().with_metadata_fetched_in_chunks(chunk_size=chunk_size)
+
     def datasets_to_notify(self):
         return super().get_queryset().datasets_to_notify()
 
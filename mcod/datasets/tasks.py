@@ -1,15 +1,18 @@
 import logging
 import os
+import time
 import zipfile
 from datetime import datetime
 from pathlib import Path
 from shutil import disk_usage
-from typing import TYPE_CHECKING, Union
 
+from celery import group
 from celery_singleton import Singleton
 from dateutil.relativedelta import relativedelta
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, Sum
 from django.utils import translation
 
 from mcod.core import storages
@@ -25,9 +28,6 @@ from mcod.core.utils import (
 from mcod.datasets.utils import create_archive_file_path
 from mcod.unleash import is_enabled
 
-if TYPE_CHECKING:
-    from mcod.datasets.serializers import DatasetResourcesCSVSerializer, DatasetXMLSerializer
-
 logger = logging.getLogger("mcod")
 
 
@@ -42,69 +42,120 @@ def send_dataset_comment(dataset_id, comment):
 if is_enabled("S60_fix_for_task_creating_xml_and_csv_metadata_files.be"):  # noqa: C901
 
     def create_catalog_metadata_file(
-        qs_data: list,
-        schema: Union["DatasetXMLSerializer", "DatasetResourcesCSVSerializer"],
         extension: str,
-        writer: WriterInterface,
-    ):
+        language: str,
+        force: bool = False,
+    ) -> dict:
         """
-        Creates and manages catalog metadata files.
+        Creates catalog metadata file in a single language.
 
         Args:
-            qs_data (List): The data to be serialized.
-            schema (DatasetXMLSerializer or DatasetXMLSerializer): The schema used
-            to serialize qs_data.
-            extension (str): The extension for the catalog files.
-            writer (WriterInterface): An instance of a class adhering to
-            WriterInterface.
-
-        This function creates catalog metadata files for multiple languages, managing
-        the files for the current and previous days. It serializes the provided data
-        using the given schema and writes it to the appropriate files for each language.
-        Additionally, it creates symbolic links and removes old files to manage the
-        catalog history.
-
-        Note:
-            - Assumes settings.LANGUAGE_CODES contains the language codes.
-            - Requires settings.METADATA_MEDIA_ROOT to define the metadata media
-            root path.
+            extension (str): The extension for the catalog file (csv or xml).
+            language (str): Language of the catalog file.
+            force (bool): Create the file even if nothing was modified since the last run.
+
+        Datasets are fetched from the database, serialized and written to the file chunk
+        by chunk, so the whole catalog is never kept in memory. The file is written under
+        a temporary name and renamed when complete. If no dataset, resource or institution
+        was modified since the file was created, the current file is only renamed to the
+        today's name (see settings.CATALOG_METADATA_SKIP_UNMODIFIED).
+        Symbolic link katalog.<extension> points to the newest file, older files are removed.
+
+        Returns:
+            dict: Metrics - status (created or skipped), duration, file size and counts.
 
         Raises:
             Any exceptions related to file operations or serialization.
-
         """
-
+        started_at = time.monotonic()
         today = datetime.today().date()
         previous_day = today - relativedelta(days=1)
-
-        for language in settings.LANGUAGE_CODES:
-            lang_catalog_path = f"{settings.METADATA_MEDIA_ROOT}/{language}"
-            previous_day_file = (
-                f"{lang_catalog_path}/katalog_{previous_day}.{extension}"
-            )
-            new_file = f"{lang_catalog_path}/katalog_{today}.{extension}"
-            symlink_file = f"{lang_catalog_path}/katalog.{extension}"
-
-            if not os.path.exists(lang_catalog_path):
-                os.makedirs(lang_catalog_path)
-
+        lang_catalog_path = f"{settings.METADATA_MEDIA_ROOT}/{language}"
+        previous_day_file = f"{lang_catalog_path}/katalog_{previous_day}.{extension}"
+        new_file = f"{lang_catalog_path}/katalog_{today}.{extension}"
+        symlink_file = f"{lang_catalog_path}/katalog.{extension}"
+        os.makedirs(lang_catalog_path, exist_ok=True)
+
+        current_file = os.path.realpath(symlink_file) if os.path.islink(symlink_file) else None
+        if current_file and not os.path.isfile(current_file):
+            current_file = None
+        state_key = f"catalog_metadata_file:{extension}:{language}"
+        catalog_state = _get_catalog_state()
+        metrics = {"extension": extension, "language": language, "datasets": 0, "rows": 0}
+
+        skip = settings.CATALOG_METADATA_SKIP_UNMODIFIED and not force and current_file
+        if skip and caches["default"].get(state_key) == catalog_state:
+            if current_file != os.path.realpath(new_file):
+                os.replace(current_file, new_file)
+            metrics["status"] = "skipped"
+            logger.info(f"Nothing modified since the last run, {new_file} not regenerated")
+        else:
+            _write_catalog_metadata_file(new_file, extension, language, lang_catalog_path, metrics)
+            caches["default"].set(state_key, catalog_state, timeout=None)
+            metrics["status"] = "created"
+            logger.info(f"File {new_file} has been created")
+            if current_file and current_file != os.path.realpath(new_file):
+                os.remove(current_file)
+
+        if os.path.exists(previous_day_file):
+            os.remove(previous_day_file)
+
+        if os.path.exists(new_file):
+            if os.path.exists(symlink_file) or os.path.islink(symlink_file):
+                os.remove(symlink_file)
+            os.symlink(new_file, symlink_file)
+
+        metrics["size"] = os.path.getsize(new_file)
+        metrics["duration"] = round(time.monotonic() - started_at, 3)
+        logger.info(f"Catalog metadata file {new_file}: {metrics}")
+        return metrics
+
+    def _write_catalog_metadata_file(file_path, extension, language, lang_catalog_path, metrics):
+        from mcod.datasets.serializers import DatasetResourcesCSVSerializer, DatasetXMLWriterSerializer
+
+        if extension == "csv":
+            schema = DatasetResourcesCSVSerializer(many=True)
+            writer: WriterInterface = CSVWriter(headers=schema.get_csv_headers())
+        else:
+            schema = DatasetXMLWriterSerializer(many=True)
+            writer = XMLWriter()
+
+        dataset_model = apps.get_model("datasets", "Dataset")
+
+        def serialized_chunks():
+            for chunk in dataset_model.objects.with_metadata_fetched_in_chunks():
+                data = schema.dump(chunk)
+                metrics["datasets"] += len(chunk)
+                metrics["rows"] += len(data)
+                yield data
+
+        tmp_file = f"{file_path}.tmp"
+        try:
             with translation.override(language):
-                data = schema.dump(qs_data)
-                with open(new_file, "w") as file:
-                    writer.save(
+                with open(tmp_file, "w") as file:
+                    writer.save_chunks(
                         file_object=file,
+                        chunks=serialized_chunks(),
                         language_catalog_path=lang_catalog_path,
-                        data=data,
                     )
-                    logger.info(f"File {new_file} has been created")
-
-            if os.path.exists(previous_day_file):
-                os.remove(previous_day_file)
+            os.replace(tmp_file, file_path)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
 
-            if os.path.exists(new_file):
-                if os.path.exists(symlink_file) or os.path.islink(symlink_file):
-                    os.remove(symlink_file)
-                os.symlink(new_file, symlink_file)
+    def _get_catalog_state() -> str:
+        """
+        Last modification time and number of objects which data is included in the catalog,
+        and totals of view and download counters (they change without modifying the objects).
+        """
+        state = []
+        for model_name in ("datasets.Dataset", "resources.Resource", "organizations.Organization"):
+            stats = apps.get_model(model_name).raw.aggregate(last_modified=Max("modified"), count=Count("id"))
+            state.append(f"{stats['last_modified']}/{stats['count']}")
+        for model_name in ("counters.ResourceViewCounter", "counters.ResourceDownloadCounter"):
+            stats = apps.get_model(model_name).objects.aggregate(total=Sum("count"), count=Count("id"))
+            state.append(f"{stats['total']}/{stats['count']}")
+        return "|".join(state)
 
 else:
 
@@ -140,46 +191,43 @@ else:
 
 
 @extended_shared_task
-def create_csv_metadata_files() -> None:
+def create_language_catalog_metadata_file_task(extension: str, language: str, force: bool = False) -> dict:
+    """Creates catalog metadata file with the given extension in a single language."""
+    return create_catalog_metadata_file(extension, language, force=force)
+
+
+def create_catalog_metadata_files_in_parallel(extension: str, force: bool = False) -> None:
+    """Creates catalog metadata files - a separate task (worker process) for each language."""
+    group(
+        create_language_catalog_metadata_file_task.s(extension, language, force=force)
+        for language in settings.LANGUAGE_CODES
+    ).apply_async()
+
+
+@extended_shared_task
+def create_csv_metadata_files(force: bool = False) -> None:
     """Creates CSV metadata files using dataset information.
 
     This task is responsible for creating CSV metadata files based on dataset information.
-    It fetches dataset objects with metadata fetched as a list,
-    serializes them using a CSV serializer, and writes the serialized data to
-    CSV files using a CSVWriter.
+    Files for each language are created by separate tasks, which stream datasets
+    from the database, serialize them using a CSV serializer and write the serialized
+    data to CSV files using a CSVWriter.
     """
-    from mcod.datasets.serializers import DatasetResourcesCSVSerializer
-
-    dataset_model = apps.get_model("datasets", "Dataset")
-    qs_data = dataset_model.objects.with_metadata_fetched_as_list()
-
     logger.info("Started task: create_csv_metadata_files")
-    csv_schema = DatasetResourcesCSVSerializer(many=True)
-    csv_writer: CSVWriter = CSVWriter(
-        headers=csv_schema.get_csv_headers(),
-    )
-
-    create_catalog_metadata_file(qs_data, csv_schema, "csv", writer=csv_writer)
+    create_catalog_metadata_files_in_parallel("csv", force=force)
 
 
 @extended_shared_task
-def create_xml_metadata_files() -> None:
+def create_xml_metadata_files(force: bool = False) -> None:
     """Creates XML metadata files using dataset information.
 
     This task is responsible for creating XML metadata files based on dataset information.
-    It fetches dataset objects with metadata fetched as a list, serializes them using an
-    XML serializer, and writes the serialized data to XML files using an XMLWriter.
+    Files for each language are created by separate tasks, which stream datasets
+    from the database, serialize them using an XML serializer and write the serialized
+    data to XML files using an XMLWriter.
     """
-    from mcod.datasets.serializers import DatasetXMLWriterSerializer
-
-    dataset_model = apps.get_model("datasets", "Dataset")
-    qs_data: list = dataset_model.objects.with_metadata_fetched_as_list()
-
     logger.info("Started task: create_xml_metadata_files")
-    xml_schema = DatasetXMLWriterSerializer(many=True)
-    xml_writer: XMLWriter = XMLWriter()
-
-    create_catalog_metadata_file(qs_data, xml_schema, "xml", writer=xml_writer)
+    create_catalog_metadata_files_in_parallel("xml", force=force)
 
 
 @extended_shared_task
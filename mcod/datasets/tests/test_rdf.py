@@ -1,8 +1,10 @@
 import hashlib
 import io
+from unittest import mock
 
 import pytest
-from falcon import HTTP_BAD_REQUEST, HTTP_OK
+from django.test import override_settings
+from falcon import HTTP_BAD_REQUEST, HTTP_NOT_MODIFIED, HTTP_OK
 from pyshacl import validate as shacl_validate
 from pytest_bdd import scenarios
 from rdflib import SH, XSD, BNode, Literal, URIRef
@@ -15,6 +17,7 @@ from mcod.core.api.rdf.profiles.dcat_ap_pl import VOCABULARIES as DCAT_AP_PL_VOC
 from mcod.core.api.rdf.vocabs.openness_score import OpennessScoreVocab
 from mcod.datasets.serializers import UPDATE_FREQUENCY_TO_DCAT
 from mcod.lib.extended_graph import ExtendedGraph
+from mcod.lib.rdf.catalog_cache import CatalogCache
 
 scenarios('features/dataset_rdf.feature')
 scenarios('features/dataset_sparql.feature')
@@ -64,6 +67,24 @@ def test_catalog_rdf_in_schemaorg_profile(dataset_with_resource, client14, const
     assert HTTP_OK == response.status
 
 
+@pytest.mark.elasticsearch
+def test_catalog_rdf_served_from_cache_with_etag(dataset_with_resource, client14, constance_config):
+    CatalogCache().invalidate()
+    with override_settings(CATALOG_CACHE_ENABLED=True):
+        response = client14.simulate_get('/catalog.ttl')
+        assert HTTP_OK == response.status
+        etag = response.headers['etag']
+        with mock.patch('mcod.datasets.views.CatalogRDFView.handle') as handle:
+            cached = client14.simulate_get('/catalog.ttl')
+            not_modified = client14.simulate_get('/catalog.ttl', headers={'If-None-Match': etag})
+        handle.assert_not_called()
+    assert HTTP_OK == cached.status
+    assert cached.text == response.text
+    assert cached.headers['etag'] == etag
+    assert HTTP_NOT_MODIFIED == not_modified.status
+    assert not not_modified.text
+
+
 @pytest.mark.elasticsearch
 def test_catalog_rdf_in_unsupported_profile(dataset_with_resource, client14, constance_config):
     response = client14.simulate_get('/catalog.rdf?profile=unsupported')
@@ -8,8 +8,10 @@ from django.test import override_settings
 from pytest_bdd import scenarios
 from pytest_mock import MockerFixture
 
+from mcod.counters.models import ResourceDownloadCounter
 from mcod.datasets.tasks import (
     create_csv_metadata_files,
+    create_language_catalog_metadata_file_task,
     create_xml_metadata_files,
     send_dataset_update_reminder,
 )
@@ -196,3 +198,27 @@ class TestMetadataFileCreation:
 
             assert not file.is_file()
             assert file2.is_file()
+
+    @pytest.mark.parametrize("extension", ["xml", "csv"])
+    def test_create_metadata_file_is_skipped_if_nothing_modified(self, tmp_path, mocker, extension):
+        with override_settings(METADATA_MEDIA_ROOT=tmp_path):
+            self.mock_date(year=2023, month=12, day=24, mocker=mocker)
+            metrics = create_language_catalog_metadata_file_task(extension, "pl", force=True)
+            assert metrics["status"] == "created"
+            assert metrics["size"] > 0
+
+            new_today = self.mock_date(year=2023, month=12, day=25, mocker=mocker)
+            metrics = create_language_catalog_metadata_file_task(extension, "pl")
+            assert metrics["status"] == "skipped"
+            symlink = Path(f"{tmp_path}") / f"pl/katalog.{extension}"
+            assert symlink.resolve().name == f"katalog_{new_today}.{extension}"
+
+    def test_create_metadata_file_is_regenerated_after_counters_change(self, tmp_path, mocker, resource):
+        with override_settings(METADATA_MEDIA_ROOT=tmp_path):
+            self.mock_date(year=2023, month=12, day=24, mocker=mocker)
+            create_language_catalog_metadata_file_task("csv", "pl", force=True)
+
+            ResourceDownloadCounter.objects.create(resource=resource, timestamp=date(2023, 12, 24), count=5)
+            self.mock_date(year=2023, month=12, day=25, mocker=mocker)
+            metrics = create_language_catalog_metadata_file_task("csv", "pl")
+            assert metrics["status"] == "created"
@@ -18,6 +18,7 @@ from mcod.core.api.handlers import (
     SubscriptionSearchHdlr,
 )
 from mcod.core.api.hooks import login_optional
+from mcod.core.api.media import RDFHandler
 from mcod.core.api.views import BaseView, JsonAPIView, RDFView
 from mcod.core.versioning import versioned
 from mcod.datasets.deserializers import (
@@ -40,6 +41,7 @@ from mcod.datasets.serializers import (
     DatasetRDFResponseSchema,
     LicenseApiResponse,
 )
+from mcod.lib.rdf.catalog_cache import CatalogCache
 from mcod.resources.deserializers import ResourceApiSearchRequest
 from mcod.resources.documents import ResourceDocument
 from mcod.resources.serializers import ResourceApiResponse
@@ -95,7 +97,37 @@ class DatasetApiView(JsonAPIView):
 
 class CatalogRDFView(RDFView):
     def on_get(self, request, response, *args, **kwargs):
-        self.handle(request, response, self.GET, *args, **kwargs)
+        if settings.CATALOG_CACHE_ENABLED and 'shacl' not in request.params:
+            self.handle_cached(request, response, self.GET, *args, **kwargs)
+        else:
+            self.handle(request, response, self.GET, *args, **kwargs)
+
+    def handle_cached(self, request, response, handler, *args, **kwargs):
+        """Serves the page serialized once per catalog version, responds 304 if the client has the current page."""
+        content_type = self.set_content_type(response, **kwargs)
+        cache = CatalogCache()
+        key = cache.get_key(request.params, content_type, get_language())
+        cached = cache.get(key)
+        if cached is None:
+            self.handle(request, response, handler, *args, **kwargs)
+            if response.stream is not None:
+                body = b''.join(response.stream)
+                response.stream = None
+            else:
+                body = RDFHandler().serialize(response.media, response.content_type)
+                body = body.encode('utf-8') if isinstance(body, str) else body
+            etag = cache.set(key, body)
+        else:
+            etag, body = cached
+            response.content_type = content_type
+        response.media = None
+        response.etag = etag
+        if_none_match = request.if_none_match or []
+        if '*' in if_none_match or etag in if_none_match:
+            response.status = falcon.HTTP_304
+        else:
+            response.status = falcon.HTTP_200
+            response.data = body
 
     class GET(ShaclMixin, SearchHdlr):
         deserializer_schema = partial(CatalogRdfApiRequest, many=False)
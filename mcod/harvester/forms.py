@@ -22,7 +22,8 @@ class DataSourceAdminForm(forms.ModelForm):
 
     class Meta:
         model = DataSource
-        exclude = ('last_import_status', 'last_import_timestamp', 'created_by')
+        exclude = ('last_import_status', 'last_import_timestamp', 'created_by',
+                   'fetch_etag', 'fetch_last_modified', 'fetch_content_hash', 'fetch_config_hash')
         labels = {
             'description': _('Description (PL)'),
             'modified': _('Modification date'),
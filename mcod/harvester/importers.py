@@ -0,0 +1,121 @@
+from django.apps import apps
+
+from mcod import settings
+from mcod.core.api.rdf import signals as rdf_signals
+from mcod.core.api.search import signals as search_signals
+
+# Signals muted during the batched import - documents and graphs of imported objects are updated once at the end.
+INDEXING_SIGNALS = (
+    search_signals.update_document,
+    search_signals.update_document_with_related,
+    rdf_signals.create_graph,
+    rdf_signals.create_graph_with_related_update,
+    rdf_signals.update_graph,
+    rdf_signals.update_graph_with_related,
+    rdf_signals.update_graph_with_conditional_related,
+    rdf_signals.update_related_graph,
+)
+
+# Changes of these fields are saved with `save` (and its signals), other changes are saved in bulk.
+DATASET_SAVE_FIELDS = {'status', 'title', 'title_pl', 'slug', 'organization'}
+RESOURCE_SAVE_FIELDS = {
+    'status', 'link', 'format', 'availability', 'is_auto_data_date', 'data_date_update_period',
+    'automatic_data_date_start', 'automatic_data_date_end', 'endless_data_date_update',
+}
+
+
+def get_changed_fields(obj, data):
+    """Returns names of fields which values in `data` differ from values of the object."""
+    changed = []
+    for name, value in data.items():
+        field = obj._meta.get_field(name)
+        if field.many_to_one:
+            current, value = getattr(obj, field.attname), getattr(value, 'pk', value)
+        else:
+            current = getattr(obj, name)
+        if current != value:
+            changed.append(name)
+    return changed
+
+
+def get_concrete_field_names(model, names):
+    """Maps names of fields (also virtual translated fields, like `title_en`) to names of database columns."""
+    result = set()
+    for name in names:
+        field = model._meta.get_field(name)
+        if field.concrete:
+            result.add(field.name)
+        else:
+            original_field = field.original_field
+            result.update({getattr(original_field, 'name', original_field), 'i18n'})
+    return result
+
+
+class ImportLookups:
+    """
+    Objects referenced by a chunk of harvested items (existing datasets and resources, licenses, categories,
+    tags and organizations) fetched with a few queries, instead of queries made for each item separately.
+    """
+
+    def __init__(self, source, items):
+        self.source = source
+        self.datasets = {
+            obj.ext_ident: obj for obj in source.dataset_model.raw.filter(
+                source=source, ext_ident__in=[item['ext_ident'] for item in items if not item.get('int_ident')],
+            ).prefetch_related('tags', 'categories', 'supplements')
+        }
+        self.resources = {
+            (obj.dataset_id, obj.ext_ident): obj for obj in source.resource_model.raw.filter(
+                dataset__in=list(self.datasets.values()),
+                ext_ident__in=[rd['ext_ident'] for item in items for rd in item.get('resources', [])],
+            ).prefetch_related('special_signs', 'supplements')
+        }
+        self.licenses = self._get_licenses(items)
+        self.categories_by_id, self.categories_by_code = self._get_categories(items)
+        self.tags = self._get_tags(items)
+        self.organizations = self._get_organizations(items)
+
+    def _get_licenses(self, items):
+        names = {item['license'] for item in items if item.get('license')}
+        if not names:
+            return {}
+        license_model = apps.get_model('licenses.License')
+        return {obj.name: obj for obj in license_model.objects.filter(name__in=names).order_by('-id')}
+
+    def _get_categories(self, items):
+        from mcod.harvester.models import OLD_CATEGORY_TITLE_2_DCAT_CATEGORY_CODE
+
+        category_model = self.source.category_model
+        values = {str(value) for item in items for value in item.get('categories') or []}
+        if self.source.is_xml and self.source.xsd_schema_version < settings.XML_VERSION_MULTIPLE_CATEGORIES:
+            ids, codes = values, set(OLD_CATEGORY_TITLE_2_DCAT_CATEGORY_CODE.values())
+        else:
+            ids, codes = set(), values
+        categories = category_model.objects.filter(id__in=ids) | category_model.objects.filter(code__in=codes)
+        by_id = {str(obj.id): obj for obj in categories}
+        return by_id, {obj.code: obj for obj in by_id.values() if obj.code}
+
+    def _get_tags(self, items):
+        names = {tag['name'] for item in items for tag in item.get('tags', []) if tag.get('name')}
+        return {(obj.name, obj.language): obj for obj in self.source.tag_model.objects.filter(name__in=names)}
+
+    def _get_organizations(self, items):
+        titles = {item['organization']['title'] for item in items if isinstance(item.get('organization'), dict)}
+        if not titles:
+            return {}
+        return {
+            obj.title: obj for obj in self.source.organization_model.raw.filter(title__in=titles).order_by('-id')}
+
+    def get_dataset(self, item):
+        return None if item.get('int_ident') else self.datasets.get(item['ext_ident'])
+
+    def get_resource(self, dataset, ext_ident):
+        return self.resources.get((dataset.id, ext_ident))
+
+    def get_tag(self, name, language, import_user):
+        tag = self.tags.get((name, language))
+        if tag is None:
+            tag, _ = self.source.tag_model.objects.get_or_create(
+                name=name, language=language, defaults={'created_by': import_user})
+            self.tags[(name, language)] = tag
+        return tag
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.9 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('harvester', '0017_auto_20210531_1919'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasource',
+            name='fetch_content_hash',
+            field=models.CharField(blank=True, max_length=32, verbose_name='content hash'),
+        ),
+        migrations.AddField(
+            model_name='datasource',
+            name='fetch_etag',
+            field=models.CharField(blank=True, max_length=255, verbose_name='ETag'),
+        ),
+        migrations.AddField(
+            model_name='datasource',
+            name='fetch_last_modified',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Last-Modified'),
+        ),
+        migrations.AlterField(
+            model_name='datasource',
+            name='last_import_status',
+            field=models.CharField(blank=True, choices=[('ok', 'OK'), ('ok-partial', 'OK - partial import'), ('error', 'Error'), ('not-modified', 'Not modified')], max_length=50, verbose_name='last import status'),
+        ),
+        migrations.AlterField(
+            model_name='datasourceimport',
+            name='status',
+            field=models.CharField(blank=True, choices=[('ok', 'OK'), ('ok-partial', 'OK - partial import'), ('error', 'Error'), ('not-modified', 'Not modified')], max_length=50, verbose_name='status'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.9 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('harvester', '0018_datasource_fetch_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasource',
+            name='fetch_config_hash',
+            field=models.CharField(blank=True, max_length=32, verbose_name='configuration hash'),
+        ),
+    ]
@@ -1,7 +1,12 @@
+import hashlib
+import inspect
+import json
 import logging
 import os
 import pprint
-from collections import defaultdict
+from collections import Counter, defaultdict
+from functools import lru_cache
+from importlib import import_module
 from urllib.parse import urlencode
 
 from dateutil.relativedelta import relativedelta
@@ -10,11 +15,12 @@ from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.core.files import File
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.validators import validate_email
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 from marshmallow import ValidationError as SchemaValidationError
 from model_utils import FieldTracker
@@ -22,16 +28,30 @@ from model_utils.fields import AutoCreatedField
 
 from mcod import settings
 from mcod.categories.models import Category
+from mcod.core import signals as core_signals
+from mcod.core.api.rdf.tasks import update_graphs_task
+from mcod.core.api.search.tasks import update_related_task
 from mcod.core.db.managers import TrashManager
 from mcod.core.db.mixins import AdminMixin
 from mcod.core.db.models import LogMixin, TimeStampedModel, TrashModelBase
 from mcod.core.models import SoftDeletableModel
+from mcod.core.signals import mute_signals
+from mcod.core.utils import iter_in_chunks
+from mcod.harvester.importers import (
+    DATASET_SAVE_FIELDS,
+    INDEXING_SIGNALS,
+    RESOURCE_SAVE_FIELDS,
+    ImportLookups,
+    get_changed_fields,
+    get_concrete_field_names,
+)
 from mcod.harvester.managers import DataSourceManager
 from mcod.harvester.utils import (
     CKANImportDatasetInTrashError,
     CKANImportError,
     CKANImportInvalidLicenseError,
     CKANImportOrganizationInTrashError,
+    NotModified,
     make_request,
     retrieve_to_file,
 )
@@ -64,6 +84,17 @@ def validate_emails_list(value):
         validate_email(item)
 
 
+@lru_cache()
+def _get_import_code_hash(*paths):
+    """Hash of the source of modules implementing the import: modules of `paths`, importers and this module."""
+    modules = {inspect.getmodule(import_string(path)) for path in paths if path}
+    modules.update((import_module('mcod.harvester.importers'), import_module(__name__)))
+    digest = hashlib.md5()
+    for module in sorted(modules, key=lambda module: module.__name__):
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    return digest.hexdigest()
+
+
 FREQUENCY_CHOICES = (
     (1, _('every day')),
     (7, _('every week')),
@@ -71,13 +102,17 @@ FREQUENCY_CHOICES = (
     (90, _('every quarter')),
 )
 
+IMPORT_STATS_KEYS = ('ds_imported', 'ds_created', 'ds_updated', 'r_imported', 'r_created', 'r_updated')
+
 STATUS_OK = 'ok'
 STATUS_OK_PARTIAL = 'ok-partial'
 STATUS_ERROR = 'error'
+STATUS_NOT_MODIFIED = 'not-modified'
 IMPORT_STATUS_CHOICES = (
     (STATUS_OK, 'OK'),
     (STATUS_OK_PARTIAL, _('OK - partial import')),
     (STATUS_ERROR, _('Error')),
+    (STATUS_NOT_MODIFIED, _('Not modified')),
 )
 
 
@@ -143,6 +178,12 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
 
     sparql_query = models.TextField(blank=True, null=True, verbose_name=_('Sparql query'))
 
+    # State of the data fetched by the last successful import, used for conditional fetching.
+    fetch_etag = models.CharField(max_length=255, verbose_name=_('ETag'), blank=True)
+    fetch_last_modified = models.CharField(max_length=64, verbose_name=_('Last-Modified'), blank=True)
+    fetch_content_hash = models.CharField(max_length=32, verbose_name=_('content hash'), blank=True)
+    fetch_config_hash = models.CharField(max_length=32, verbose_name=_('configuration hash'), blank=True)
+
     tracker = FieldTracker()
     objects = DataSourceManager()
     trash = TrashManager()
@@ -206,6 +247,48 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
         params = self.import_settings.get('API_URL_PARAMS')
         return {'url': f'{self.api_url}?{urlencode(params)}' if params else self.api_url}
 
+    @property
+    def config_hash(self):
+        """
+        Hash of everything the result of the import depends on, apart from the fetched data: import related
+        fields of the data source, its importer settings and the code of the importer (schema, fetch function).
+        """
+        import_settings = self.import_settings
+        config = {
+            'source_type': self.source_type,
+            'portal_url': self.portal_url,
+            'api_url': self.api_url,
+            'xml_url': self.xml_url,
+            'sparql_query': self.sparql_query,
+            'organization_id': self.organization_id,
+            'category_id': self.category_id,
+            'categories': sorted(self.categories.values_list('id', flat=True)) if self.pk else [],
+            'license_condition_db_or_copyrighted': self.license_condition_db_or_copyrighted,
+            'institution_type': self.institution_type,
+            'import_settings': import_settings,
+            'import_code': _get_import_code_hash(
+                import_settings.get('SCHEMA'), import_settings.get('IMPORT_FUNC', 'mcod.harvester.utils.fetch_data')),
+        }
+        return hashlib.md5(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @property
+    def fetch_state(self):
+        """State of the last successful import, empty if configuration of the data source changed since then."""
+        if not self.fetch_content_hash or self.fetch_config_hash != self.config_hash:
+            return {}
+        return {
+            'etag': self.fetch_etag,
+            'last_modified': self.fetch_last_modified,
+            'content_hash': self.fetch_content_hash,
+        }
+
+    def set_fetch_state(self, fetch_state):
+        fetch_state = fetch_state or {}
+        self.fetch_etag = fetch_state.get('etag', '')
+        self.fetch_last_modified = fetch_state.get('last_modified', '')
+        self.fetch_content_hash = fetch_state.get('content_hash', '')
+        self.fetch_config_hash = self.config_hash if fetch_state else ''
+
     @cached_property
     def url(self):
         if self.is_xml:
@@ -324,58 +407,205 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
         return count
 
     def update_from_items(self, data):
-        ds_imported = 0
-        ds_created = 0
-        ds_updated = 0
-        r_imported = 0
-        r_created = 0
-        r_updated = 0
+        if settings.HARVESTER_BATCHED_IMPORT:
+            return self._update_from_items_in_batches(data)
+        stats = Counter()
         for item in data:
-            category = self._get_dataset_category(item)
-            categories = self._get_dataset_categories(category, item)
-
-            license = self._get_license(item)
-            license_condition_db_or_copyrighted = self._get_license_condition_db_or_copyrighted(item)
-            license_chosen = self._get_license_chosen(item)
-
-            organization = self._get_organization(item)
-            tags = self._prepare_tags(item)
-            resources_data = item.pop('resources')
-            item.update({
-                'category': category,
-                'source': self,
-                'organization': organization,
-                'license': license,
-                'license_condition_db_or_copyrighted': license_condition_db_or_copyrighted,
-                'license_chosen': license_chosen,
-            })
-            dataset, created = self._update_or_create_dataset(item)
-            ds_imported += 1
+            self._import_item(*self._prepare_item(item), stats)
+        return tuple(stats[key] for key in IMPORT_STATS_KEYS)
+
+    def _update_from_items_in_batches(self, data):
+        """
+        Items are imported in chunks, objects referenced by items of the chunk are fetched in bulk.
+        Unchanged datasets are skipped, changes of existing datasets and resources (not requiring `save`)
+        are written with `bulk_update`. Documents and graphs of all imported objects are updated once at the end,
+        graphs of objects created or published by the import are created (with the catalog entry of datasets).
+        """
+        stats = Counter()
+        imported = defaultdict(set)
+        created = defaultdict(set)
+        with mute_signals(*INDEXING_SIGNALS):
+            for chunk in iter_in_chunks(data, settings.HARVESTER_IMPORT_CHUNK_SIZE):
+                with transaction.atomic():
+                    self._import_chunk(chunk, stats, imported, created)
+        self._update_imported_objects_indices(imported, created)
+        logger.info(f'Data source {self.id} imported in batches: {dict(stats)}')
+        return tuple(stats[key] for key in IMPORT_STATS_KEYS)
+
+    def _import_chunk(self, items, stats, imported, created):
+        lookups = ImportLookups(self, items)
+        published_before = self._get_published_ids(
+            [obj.id for obj in lookups.datasets.values()] + [item['int_ident'] for item in items if item.get('int_ident')],
+            [obj.id for obj in lookups.organizations.values()] + [obj.organization_id for obj in lookups.datasets.values()]
+            + [self.organization_id],
+        )
+        touched_datasets, touched_organizations = set(), set()
+        to_update = {self.dataset_model: {}, self.resource_model: {}}
+        for item in items:
+            item, tags, categories, resources_data = self._prepare_item(item, lookups)
+            dataset = lookups.get_dataset(item)
+            changes = self._get_bulk_changes(dataset, item, resources_data, lookups) if dataset else None
+            if changes is None:
+                dataset = self._import_item(item, tags, categories, resources_data, stats)
+            else:
+                changed = self._apply_bulk_changes(changes, to_update, stats)
+                changed = self._set_related(dataset, 'tags', tags) or changed
+                changed = self._set_related(dataset, 'categories', categories) or changed
+                if not changed:
+                    stats['ds_unchanged'] += 1
+                    continue
             if dataset:
-                if created:
-                    ds_created += 1
-                else:
-                    ds_updated += 1
-
-                dataset.tags.set(tags)
-                dataset.categories.set(categories)
-
-                for rd in resources_data:
-                    supplements = rd.pop('supplements', [])
-                    resource, created = self._update_or_create_resource(dataset, rd)
-                    r_imported += 1
-                    if resource:
-                        if created:
-                            r_created += 1
-                        else:
-                            r_updated += 1
-                        self._update_or_create_supplements(resource, supplements)
-        return ds_imported, ds_created, ds_updated, r_imported, r_created, r_updated
+                touched_datasets.add(dataset.id)
+                touched_organizations.add(dataset.organization_id)
+        for model, objs in to_update.items():
+            if objs:
+                fields = get_concrete_field_names(model, set().union(*objs.values()))
+                model.raw.bulk_update(objs, fields=fields | {'modified'}, batch_size=settings.HARVESTER_IMPORT_CHUNK_SIZE)
+                for obj in objs:
+                    core_signals.notify_updated.send(model, obj, state='updated')
+        imported[self.dataset_model].update(touched_datasets)
+        imported[self.organization_model].update(touched_organizations)
+        published_after = self._get_published_ids(touched_datasets, touched_organizations)
+        for model, ids in published_after.items():
+            created[model].update(ids - published_before[model])
+
+    def _get_published_ids(self, dataset_ids, organization_ids):
+        """Returns {model: ids} of published datasets, their resources and published organizations."""
+        published = {'status': 'published', 'is_removed': False}
+        return {
+            self.dataset_model: set(self.dataset_model.raw.filter(
+                pk__in=dataset_ids, **published).values_list('id', flat=True)),
+            self.resource_model: set(self.resource_model.raw.filter(
+                dataset_id__in=dataset_ids, **published).values_list('id', flat=True)),
+            self.organization_model: set(self.organization_model.raw.filter(
+                pk__in=[x for x in organization_ids if x], **published).values_list('id', flat=True)),
+        }
 
-    def _update_or_create_dataset(self, data):
+    def _get_bulk_changes(self, dataset, item, resources_data, lookups):
+        """
+        Returns changed values of the dataset and its resources as a list of (object, changed values, modified),
+        or None if the item has to be imported with `save` of its objects (also to create, update
+        or delete supplements).
+        """
+        if item.get('supplements') or dataset.supplements.all():
+            return None
+        data, modified = self._get_dataset_data(dict(item))
+        data.pop('supplements', None)
+        changed = {name: data[name] for name in get_changed_fields(dataset, data)}
+        if DATASET_SAVE_FIELDS.intersection(changed):
+            return None
+        changes = [(dataset, changed, modified)]
+        for rd in resources_data:
+            resource = lookups.get_resource(dataset, rd['ext_ident'])
+            if not resource or rd.get('int_ident') or rd.get('supplements') or rd.get('regions') or \
+                    resource.supplements.all():
+                return None
+            data, modified = self._get_resource_data(dataset, dict(rd))
+            for name in ('int_ident', 'supplements', 'regions'):
+                data.pop(name, None)
+            if set(data.pop('special_signs', [])) != {sign.symbol for sign in resource.special_signs.all()}:
+                return None
+            changed = {name: data[name] for name in get_changed_fields(resource, data)}
+            if RESOURCE_SAVE_FIELDS.intersection(changed):
+                return None
+            changes.append((resource, changed, modified))
+        return changes
+
+    @staticmethod
+    def _apply_bulk_changes(changes, to_update, stats):
+        stats['ds_imported'] += 1
+        stats['ds_updated'] += 1
+        stats['r_imported'] += len(changes) - 1
+        stats['r_updated'] += len(changes) - 1
+        any_changed = False
+        for obj, changed, modified in changes:
+            if not changed and (not modified or obj.modified == modified):
+                continue
+            any_changed = True
+            for name, value in changed.items():
+                setattr(obj, name, value)
+            obj.modified = modified or timezone.now()
+            to_update[obj._meta.model][obj] = changed.keys()
+        return any_changed
+
+    @staticmethod
+    def _set_related(dataset, name, objs):
+        objs = objs or []
+        manager = getattr(dataset, name)
+        if {obj.id for obj in manager.all()} != {obj.id for obj in objs}:
+            manager.set(objs)
+            return True
+        return False
+
+    def _update_imported_objects_indices(self, imported, created):
+        """
+        Updates documents of imported objects and their graphs. Graphs of objects created or published
+        by the import don't exist yet - they are created with update of related graphs (as by `published` signals).
+        """
+        imported[self.resource_model] = set(self.resource_model.raw.filter(
+            dataset_id__in=imported[self.dataset_model]).values_list('id', flat=True))
+        for model, ids in imported.items():
+            ids = set(model.raw.filter(pk__in=ids, status='published', is_removed=False).values_list('id', flat=True))
+            if not ids:
+                continue
+            app_label, object_name = model._meta.app_label, model._meta.object_name
+            update_related_task.s(app_label, object_name, sorted(ids)).apply_async_on_commit()
+            created_ids = sorted(ids & created[model])
+            if created_ids:
+                update_graphs_task.s(
+                    app_label, object_name, created_ids, action='create_with_related_update').apply_async_on_commit()
+            updated_ids = sorted(ids - created[model])
+            if updated_ids:
+                action = 'update_with_related' if model == self.dataset_model else 'update'
+                update_graphs_task.s(app_label, object_name, updated_ids, action=action).apply_async_on_commit()
+
+    def _prepare_item(self, item, lookups=None):
+        category = self._get_dataset_category(item, lookups=lookups)
+        categories = self._get_dataset_categories(category, item, lookups=lookups)
+
+        license = self._get_license(item, lookups=lookups)
+        license_condition_db_or_copyrighted = self._get_license_condition_db_or_copyrighted(item)
+        license_chosen = self._get_license_chosen(item)
+
+        organization = self._get_organization(item, lookups=lookups)
+        tags = self._prepare_tags(item, lookups=lookups)
+        resources_data = item.pop('resources')
+        item.update({
+            'category': category,
+            'source': self,
+            'organization': organization,
+            'license': license,
+            'license_condition_db_or_copyrighted': license_condition_db_or_copyrighted,
+            'license_chosen': license_chosen,
+        })
+        return item, tags, categories, resources_data
+
+    def _import_item(self, item, tags, categories, resources_data, stats):
+        dataset, created = self._update_or_create_dataset(item)
+        stats['ds_imported'] += 1
+        if dataset:
+            stats['ds_created' if created else 'ds_updated'] += 1
+
+            dataset.tags.set(tags)
+            dataset.categories.set(categories or [])
+
+            for rd in resources_data:
+                supplements = rd.pop('supplements', [])
+                resource, created = self._update_or_create_resource(dataset, rd)
+                stats['r_imported'] += 1
+                if resource:
+                    stats['r_created' if created else 'r_updated'] += 1
+                    self._update_or_create_supplements(resource, supplements)
+        return dataset
+
+    def _get_dataset_data(self, data):
         data.update({'created_by': self.import_user, 'status': data.get('status', 'published')})
         modified = data.pop('modified', None)
         modified = modified or data.get('created')
+        return data, modified
+
+    def _update_or_create_dataset(self, data):
+        data, modified = self._get_dataset_data(data)
         int_ident = data.pop('int_ident', None)
         supplements = data.pop('supplements', [])
 
@@ -419,41 +649,55 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
         for supplement in obj.supplements.exclude(name_pl__in=[x['name_pl'] for x in data]):
             supplement.delete()
 
-    def _get_dataset_category(self, data):
+    def _get_dataset_category(self, data, lookups=None):
         if self.is_ckan:
             return self.category
         elif self.is_xml and self.xsd_schema_version < settings.XML_VERSION_MULTIPLE_CATEGORIES:
             category_ids_list = data.pop('categories', None)
+            if category_ids_list and lookups:
+                return lookups.categories_by_id.get(str(category_ids_list[0]))
             if category_ids_list:
                 category_model = apps.get_model('categories.Category')
                 return category_model.objects.filter(id__in=category_ids_list[:1]).first()
 
-    def _get_dataset_categories(self, category, data):
+    def _get_dataset_categories(self, category, data, lookups=None):
         if self.is_ckan:
-            return self.categories.all()
+            return self._source_categories if lookups else self.categories.all()
         elif self.is_xml:
             if self.xsd_schema_version < settings.XML_VERSION_MULTIPLE_CATEGORIES:
                 old_category = category
                 new_category = None
                 if old_category:
                     code = OLD_CATEGORY_TITLE_2_DCAT_CATEGORY_CODE.get(old_category.title_pl)
-                    new_category = Category.objects.filter(code=code).first()
+                    if lookups:
+                        new_category = lookups.categories_by_code.get(code)
+                    else:
+                        new_category = Category.objects.filter(code=code).first()
                 if new_category:
                     return [new_category]
             else:
-                return self._get_dcat_categories(data)
+                return self._get_dcat_categories(data, lookups=lookups)
         elif self.is_dcat:
-            return self._get_dcat_categories(data)
+            return self._get_dcat_categories(data, lookups=lookups)
         return []
 
-    def _get_dcat_categories(self, data):
+    @cached_property
+    def _source_categories(self):
+        return list(self.categories.all())
+
+    def _get_dcat_categories(self, data, lookups=None):
         category_codes_list = data.pop('categories', None)
+        if category_codes_list and lookups:
+            return [lookups.categories_by_code[code] for code in category_codes_list
+                    if code in lookups.categories_by_code]
         if category_codes_list:
             return Category.objects.filter(code__in=category_codes_list)
 
-    def _get_license(self, data):
+    def _get_license(self, data, lookups=None):
         if self.is_xml:
             name = data.pop('license', None)
+            if name and lookups:
+                return lookups.licenses.get(name)
             if name:
                 license_model = apps.get_model('licenses.License')
                 return license_model.objects.filter(name=name).first()
@@ -487,13 +731,16 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
         except Exception as exc:
             logger.debug(exc)
 
-    def _get_organization(self, data):
+    def _get_organization(self, data, lookups=None):
         if self.is_xml or self.is_dcat:
             return self.organization
         elif self.is_ckan:
             data = data.pop('organization', None)
             if data:
-                obj = self.organization_model.raw.filter(title=data['title']).first()
+                if lookups:
+                    obj = lookups.organizations.get(data['title'])
+                else:
+                    obj = self.organization_model.raw.filter(title=data['title']).first()
                 if obj:
                     return obj
                 image_name = data.pop('image_name')
@@ -509,9 +756,11 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
                     image = self._get_file_from_url(image_url)
                     if image:
                         obj.image.save(image_name, image)
+                if lookups:
+                    lookups.organizations[obj.title] = obj
                 return obj
 
-    def _update_or_create_resource(self, dataset, data):
+    def _get_resource_data(self, dataset, data):
         if dataset.status == self.dataset_model.STATUS.draft:  # TODO: move to SIGNAL_MAP in Dataset?
             data['status'] = self.resource_model.STATUS.draft
         data['created_by'] = self.import_user
@@ -519,6 +768,10 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
             data['format'] = data.get('format') or None
         modified = data.pop('modified', None)
         modified = modified or data.get('created')
+        return data, modified
+
+    def _update_or_create_resource(self, dataset, data):
+        data, modified = self._get_resource_data(dataset, data)
         int_ident = data.pop('int_ident', None)
         special_signs = data.pop('special_signs', [])
         regions = data.pop('regions', [])
@@ -561,8 +814,14 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
         resources_ext_idents = [x['ext_ident'] for x in data['resources']]
         return dataset_ext_ident, resources_ext_idents
 
-    def _prepare_tags(self, data):
+    def _prepare_tags(self, data, lookups=None):
         tags_data = data.pop('tags', [])
+        if lookups:
+            return list({
+                tag.id: tag for tag in (
+                    lookups.get_tag(tag_data['name'], tag_data.get('lang', 'pl'), self.import_user)
+                    for tag_data in tags_data if tag_data.get('name'))
+            }.values())
         tags_ids = []
         for tag_data in tags_data:
             name = tag_data.get('name')
@@ -629,7 +888,9 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
         schema_path = self.import_settings.get('SCHEMA')
         schema_class = self._import_from(schema_path)
         try:
-            data = import_func(**self.import_func_kwargs)
+            data = self._fetch_data(import_func)
+        except NotModified:
+            return self._create_not_modified_import(start)
         except Exception as exc:
             error_desc = exc
         try:
@@ -677,6 +938,26 @@ class DataSource(AdminMixin, LogMixin, SoftDeletableModel, TimeStampedModel):
         dsi.end = timezone.now()
         dsi.save()
         self.last_import_status = dsi.status
+        self.set_fetch_state(getattr(data, 'fetch_state', None) if dsi.status == STATUS_OK else None)
+        self.save()
+
+    def _fetch_data(self, import_func):
+        import_func_kwargs = dict(self.import_func_kwargs)
+        fetch_state = self.fetch_state if settings.HARVESTER_CONDITIONAL_FETCH else None
+        if fetch_state:
+            import_func_kwargs['fetch_state'] = fetch_state
+        return import_func(**import_func_kwargs)
+
+    def _create_not_modified_import(self, start):
+        logger.debug(f'Data of data source \"{self}\" not modified since the last import.')
+        dsi = DataSourceImport.objects.create(
+            datasource=self,
+            start=start,
+            end=timezone.now(),
+            status=STATUS_NOT_MODIFIED,
+        )
+        self.last_import_timestamp = dsi.start
+        self.last_import_status = dsi.status
         self.save()
 
 
@@ -739,7 +1020,8 @@ class DataSourceImport(TimeStampedModel):
         return self.status == STATUS_ERROR
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
-        self.status = STATUS_OK
-        if self.error_desc:
-            self.status = STATUS_OK_PARTIAL if self.datasets_rejected_count else STATUS_ERROR
+        if self.status != STATUS_NOT_MODIFIED:
+            self.status = STATUS_OK
+            if self.error_desc:
+                self.status = STATUS_OK_PARTIAL if self.datasets_rejected_count else STATUS_ERROR
         super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
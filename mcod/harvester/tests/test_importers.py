@@ -0,0 +1,60 @@
+import pytest
+
+from mcod.datasets.factories import DatasetFactory, SupplementFactory
+from mcod.datasets.models import Dataset
+from mcod.harvester.factories import CKANDataSourceFactory
+from mcod.harvester.models import DataSource
+
+
+@pytest.mark.django_db
+def test_update_from_items_in_batches(mocker):
+    source = CKANDataSourceFactory.create()
+    unchanged, changed = [
+        DatasetFactory.create(source=source, ext_ident=f'ext-{i}', created_by=source.import_user) for i in range(2)]
+    new = DatasetFactory.create(organization=changed.organization)
+    for dataset in (unchanged, changed):
+        dataset.categories.set([])
+    modified = unchanged.modified
+    items = [
+        {'ext_ident': unchanged.ext_ident, 'notes': unchanged.notes},
+        {'ext_ident': changed.ext_ident, 'notes': 'Changed notes'},
+        {'ext_ident': 'new-ext-ident', 'title': 'New dataset'},
+    ]
+    mocker.patch.object(DataSource, '_prepare_item',
+                        side_effect=lambda item, lookups=None: ({**item, 'source': source}, [], [], []))
+    import_item = mocker.patch.object(DataSource, '_import_item', return_value=new)
+    bulk_update = mocker.spy(Dataset.raw, 'bulk_update')
+    mocker.patch('mcod.harvester.models.update_related_task')
+    update_graphs = mocker.patch('mcod.harvester.models.update_graphs_task')
+
+    source._update_from_items_in_batches(items)
+
+    assert import_item.call_count == 1
+    assert import_item.call_args[0][0]['ext_ident'] == 'new-ext-ident'
+    assert bulk_update.call_count == 1
+    assert list(bulk_update.call_args[0][0]) == [changed]
+    assert 'notes' in bulk_update.call_args[1]['fields']
+    changed.refresh_from_db()
+    unchanged.refresh_from_db()
+    assert changed.notes == 'Changed notes'
+    assert unchanged.modified == modified
+    graph_updates = {
+        (tuple(call[0][2]), call[1]['action']) for call in update_graphs.s.call_args_list if call[0][1] == 'Dataset'}
+    assert graph_updates == {((new.id,), 'create_with_related_update'), ((changed.id,), 'update_with_related')}
+
+
+@pytest.mark.django_db
+def test_update_from_items_in_batches_imports_items_with_removed_supplements(mocker):
+    source = CKANDataSourceFactory.create()
+    dataset = DatasetFactory.create(source=source, ext_ident='ext-1', created_by=source.import_user)
+    dataset.categories.set([])
+    SupplementFactory.create(dataset=dataset)
+    mocker.patch.object(DataSource, '_prepare_item',
+                        side_effect=lambda item, lookups=None: ({**item, 'source': source}, [], [], []))
+    import_item = mocker.patch.object(DataSource, '_import_item', return_value=dataset)
+    mocker.patch('mcod.harvester.models.update_related_task')
+    mocker.patch('mcod.harvester.models.update_graphs_task')
+
+    source._update_from_items_in_batches([{'ext_ident': dataset.ext_ident, 'notes': dataset.notes}])
+
+    assert import_item.call_count == 1
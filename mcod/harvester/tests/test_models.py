@@ -1,3 +1,38 @@
+import pytest
 from pytest_bdd import scenarios
 
+from mcod.categories.factories import CategoryFactory
+from mcod.harvester.factories import XMLDataSourceFactory
+
 scenarios('features')
+
+
+@pytest.mark.django_db
+def test_fetch_state_is_reset_by_change_of_import_configuration(mocker):
+    source = XMLDataSourceFactory.create()
+    fetch_state = {'etag': '"v1"', 'last_modified': '', 'content_hash': 'a' * 32}
+    source.set_fetch_state(fetch_state)
+    source.save()
+    source.refresh_from_db()
+    assert source.fetch_state == fetch_state
+
+    import_func = mocker.Mock()
+    source._fetch_data(import_func)
+    assert import_func.call_args[1]['fetch_state'] == fetch_state
+
+    license_condition = source.license_condition_db_or_copyrighted
+    source.license_condition_db_or_copyrighted = 'Changed data use rules'
+    assert source.fetch_state == {}
+    source._fetch_data(import_func)
+    assert 'fetch_state' not in import_func.call_args[1]
+
+    source.license_condition_db_or_copyrighted = license_condition
+    assert source.fetch_state == fetch_state
+    source.categories.add(CategoryFactory.create())
+    assert source.fetch_state == {}
+
+    mocker.patch('mcod.harvester.models._get_import_code_hash', return_value='changed')
+    source.set_fetch_state(fetch_state)
+    assert source.fetch_state == fetch_state
+    mocker.patch('mcod.harvester.models._get_import_code_hash', return_value='deployed')
+    assert source.fetch_state == {}
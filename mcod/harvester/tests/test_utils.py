@@ -0,0 +1,21 @@
+import pytest
+import requests_mock
+
+from mcod.harvester.utils import NotModified, fetch_data
+
+
+def test_fetch_data_is_conditional():
+    url = 'http://example.com/api/3/action/package_search'
+    with requests_mock.Mocker() as m:
+        m.get(url, json={'result': {'results': [{'id': 1}]}}, headers={'ETag': '"v1"'})
+        data = fetch_data(url)
+        assert data == [{'id': 1}]
+        assert data.fetch_state['etag'] == '"v1"'
+
+        with pytest.raises(NotModified):
+            fetch_data(url, fetch_state=data.fetch_state)
+        assert m.last_request.headers['If-None-Match'] == '"v1"'
+
+        m.get(url, status_code=304)
+        with pytest.raises(NotModified):
+            fetch_data(url, fetch_state=data.fetch_state)
@@ -4,14 +4,17 @@ import os
 import re
 import ssl
 from hashlib import md5
+from tempfile import NamedTemporaryFile
 from urllib.parse import unquote
-from urllib.request import urlretrieve
+from urllib.request import urlcleanup, urlretrieve
 from xml.etree import ElementTree
 
+import ijson
 import requests
 import xmlschema
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+from rdflib.compare import to_isomorphic
 from rdflib.plugins.stores.sparqlstore import SPARQLStore
 
 from mcod import settings
@@ -28,6 +31,10 @@ class ExtendedList(list):
     pass
 
 
+class NotModified(Exception):
+    """Remote data didn't change since the previous import."""
+
+
 class CKANImportError:
     INVALID_LICENSE_ID = 1
     ORGANIZATION_IN_TRASH = 2
@@ -95,23 +102,86 @@ def make_request(url, head_only=False):
     return response
 
 
-def fetch_data(url):
-    r = make_request(url)
+def download_to_file(url, fetch_state=None):
+    """
+    Streams the response to a temporary file, computing MD5 hash of the content on the way.
+    If `fetch_state` of the previous import is passed the request is conditional (If-None-Match,
+    If-Modified-Since) - NotModified is raised on 304 response or if the content hash didn't change.
+    Returns the path of the file and the new fetch state.
+    """
+    fetch_state = fetch_state or {}
+    opts = dict(settings.HTTP_REQUEST_DEFAULT_PARAMS, stream=True)
+    headers = dict(opts.get('headers', {}))
+    if fetch_state.get('etag'):
+        headers['If-None-Match'] = fetch_state['etag']
+    if fetch_state.get('last_modified'):
+        headers['If-Modified-Since'] = fetch_state['last_modified']
+    opts['headers'] = headers
+    with requests.get(url, **opts) as response:
+        if response.status_code == 304:
+            raise NotModified(url)
+        if not response.ok:
+            msg = _('%(url)s: invalid response code: %(code)s (%(reason)s)')
+            raise Exception(msg % {'url': url, 'code': response.status_code, 'reason': response.reason})
+        content_hash = md5()
+        with NamedTemporaryFile(delete=False) as fp:
+            for chunk in response.iter_content(chunk_size=settings.HARVESTER_DOWNLOAD_CHUNK_SIZE):
+                content_hash.update(chunk)
+                fp.write(chunk)
+        state = {
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+            'content_hash': content_hash.hexdigest(),
+        }
+    if state['content_hash'] == fetch_state.get('content_hash'):
+        os.remove(fp.name)
+        raise NotModified(url)
+    return fp.name, state
+
+
+def load_ckan_results(fp):
+    """
+    Parses items of the `result.results` list (or the whole `result`, if it has no `results`) incrementally,
+    without building the tree of the whole document.
+    """
+    results = ExtendedList(ijson.items(fp, 'result.results.item', use_float=True))
+    if results:
+        return results
+    fp.seek(0)
+    data = next(ijson.items(fp, 'result', use_float=True), None)
+    data = data['results'] if isinstance(data, dict) and 'results' in data else data
+    return ExtendedList(data) if isinstance(data, list) else data
+
+
+def fetch_data(url, fetch_state=None):
+    filename, state = download_to_file(url, fetch_state=fetch_state)
     try:
-        data = json.loads(r.content)
+        with open(filename, 'rb') as fp:
+            data = load_ckan_results(fp)
     except Exception as exc:
         raise Exception(f'No valid JSON data in response!\n{exc}')
-    data = data.get('result')
-    return data['results'] if 'results' in data else data
+    finally:
+        os.remove(filename)
+    if isinstance(data, ExtendedList):
+        data.fetch_state = state
+    return data
+
+
+def get_xml_root_tag(source):
+    """Returns tag of the root element, without parsing the rest of the document."""
+    for _event, element in ElementTree.iterparse(source, events=('start',)):
+        return element.tag
 
 
 def get_xml_schema_version(*, xml_path=None, xml_url=None):
     if xml_url:
-        root = ElementTree.fromstring(requests.get(xml_url).text)
+        with requests.get(xml_url, **settings.HTTP_REQUEST_DEFAULT_PARAMS) as response:
+            response.raw.decode_content = True
+            root_tag = get_xml_root_tag(response.raw)
     else:
-        root = ElementTree.parse(xml_path).getroot()
+        root_tag = get_xml_root_tag(xml_path)
 
-    version_match = re.search(r'{urn:otwarte-dane:harvester:(.*)}', root.tag)
+    version_match = re.search(r'{urn:otwarte-dane:harvester:(.*)}', root_tag or '')
     if not version_match:
         raise Exception('Nie znaleziono informacji o wersji użytego schematu XSD')
 
@@ -143,24 +213,30 @@ def get_xml_as_dict(source, version):
     return data
 
 
-def decode_xml(url):
-    version = get_xml_schema_version(xml_url=url)
-    return get_xml_as_dict(url, version)
+def decode_xml(xml_path):
+    version = get_xml_schema_version(xml_path=xml_path)
+    return get_xml_as_dict(xml_path, version)
 
 
-def fetch_xml_data(url):
+def fetch_xml_data(url, fetch_state=None):
+    fetch_state = fetch_state or {}
     try:
-        validate_xml_url(url)
-        data = decode_xml(url)
+        filename, xml_hash = validate_xml_url(url, previous_hash=fetch_state.get('content_hash'))
+        data = decode_xml(filename)
+    except NotModified:
+        raise
     except Exception as exc:
         raise Exception(f'XML Validation error!\n{exc}')
+    finally:
+        urlcleanup()
 
     result = ExtendedList(data['dataset']) if isinstance(data, dict) and 'dataset' in data else None
     result.xsd_schema_version = data['xsd_schema_version']
+    result.fetch_state = {'content_hash': xml_hash}
     return result
 
 
-def mock_data(url):
+def mock_data(url, **kwargs):
     with open('mcod/harvester/fixtures/mock2.json') as mock_file:
         data = json.loads(mock_file.read())
         data = data.get('result')
@@ -229,22 +305,37 @@ def validate_md5(filename, remote_xml_hash):
     return xml_hash
 
 
-def validate_xml_url(url):
+def validate_xml_url(url, previous_hash=None):
     try:
         check_xml_filename(url)
         headers = get_xml_headers(url)
         check_content_type(headers)
         xml_hash_url, remote_hash = get_remote_xml_hash(url)
+        if previous_hash and remote_hash == previous_hash:
+            raise NotModified(url)
         filename, headers = retrieve_to_file(url)
         xml_hash = validate_md5(filename, remote_hash)
         validate_xml(filename)
-
+    except NotModified:
+        raise
     except Exception as exc:
         raise ValidationError({'xml_url': str(exc)})
     return filename, xml_hash
 
 
-def fetch_dcat_data(api_url, query):
+def get_graph_hash(graph):
+    """MD5 of the canonical form of the graph - it doesn't depend on the order of triples and blank node ids."""
+    return md5(str(to_isomorphic(graph).graph_digest()).encode('utf-8')).hexdigest()
+
+
+def fetch_dcat_data(api_url, query, fetch_state=None):
     store = SPARQLStore(query_endpoint=api_url, returnFormat='application/rdf+xml')
     results = store.query(query, DEBUG=True)
-    return results.graph if results else {}
+    if not results:
+        return {}
+    graph = results.graph
+    content_hash = get_graph_hash(graph)
+    if fetch_state and content_hash == fetch_state.get('content_hash'):
+        raise NotModified(api_url)
+    graph.fetch_state = {'content_hash': content_hash}
+    return graph
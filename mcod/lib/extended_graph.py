@@ -1,4 +1,20 @@
+import re
+from collections import defaultdict
+
 import rdflib
+from rdflib.plugins.serializers.nt import _nt_row, _quoteLiteral
+
+STREAMED_FORMATS = {
+    'nt': 'nt',
+    'nt11': 'nt',
+    'ntriples': 'nt',
+    'application/n-triples': 'nt',
+    'ttl': 'turtle',
+    'turtle': 'turtle',
+    'text/turtle': 'turtle',
+}
+
+PN_LOCAL_RE = re.compile(r'^[A-Za-z0-9_](?:[\w.-]*[\w-])?$')
 
 
 class ExtendedGraph(rdflib.ConjunctiveGraph):
@@ -9,6 +25,33 @@ class ExtendedGraph(rdflib.ConjunctiveGraph):
     def __init__(self, *args, ordered=False, **kwargs):
         super().__init__(*args, **kwargs)
         self.ordered = ordered
+        self._index = None
+
+    def add(self, triple_or_quad):
+        self._index = None
+        return super().add(triple_or_quad)
+
+    def addN(self, quads):  # noqa: N802
+        self._index = None
+        return super().addN(quads)
+
+    def remove(self, triple_or_quad):
+        self._index = None
+        return super().remove(triple_or_quad)
+
+    def _get_index(self):
+        """
+        Sorted subjects and sorted (predicate, object) pairs of each subject, built in a single pass over the graph.
+        The index is reset on changes made through the graph and rebuilt if the number of triples changed
+        (e.g. triples were added through a context).
+        """
+        size = len(self)
+        if self._index is None or self._index[0] != size:
+            by_subject = defaultdict(list)
+            for s, p, o in self.triples((None, None, None)):
+                by_subject[s].append((p, o))
+            self._index = size, sorted(by_subject), {s: sorted(po) for s, po in by_subject.items()}
+        return self._index[1:]
 
     def subjects(self, predicate=None, object=None):
         """
@@ -22,11 +65,12 @@ class ExtendedGraph(rdflib.ConjunctiveGraph):
         generated subjects are to be sorted in the following manner:
             - first `BNode`s ordered alphabetically
             - then `URIRef`s ordered alphabetically
+        Each subject is generated once, sorted subjects are kept in the index.
         """
-        result = super().subjects(predicate=predicate, object=object)
         if predicate is None and object is None and self.ordered:
-            result = sorted(result)
-        return result
+            subjects, _ = self._get_index()
+            return iter(subjects)
+        return super().subjects(predicate=predicate, object=object)
 
     def predicate_objects(self, subject=None):
         """
@@ -39,7 +83,73 @@ class ExtendedGraph(rdflib.ConjunctiveGraph):
         If `ordered` attribute is set during initialization,
         generated predicates are to be sorted alphabetically:
         """
-        result = super().predicate_objects(subject=subject)
-        if self.ordered:
-            result = sorted(result)
-        return result
+        if not self.ordered:
+            return super().predicate_objects(subject=subject)
+        if subject is None:
+            return iter(sorted(super().predicate_objects()))
+        _, predicate_objects = self._get_index()
+        return iter(predicate_objects.get(subject, ()))
+
+    def _get_qname_resolver(self):
+        """
+        Returns function mapping URIs to prefixed names (or None) with bound namespaces, longest namespace first.
+        Used instead of namespace manager's `compute_qname`, which is slow for many URIs without a prefix.
+        """
+        namespaces = sorted(((str(namespace), prefix) for prefix, namespace in self.namespaces()),
+                            key=lambda item: len(item[0]), reverse=True)
+        resolved = {}
+
+        def resolve(uri):
+            if uri not in resolved:
+                resolved[uri] = next((
+                    (prefix, namespace, uri[len(namespace):]) for namespace, prefix in namespaces
+                    if uri.startswith(namespace) and PN_LOCAL_RE.match(uri[len(namespace):])
+                ), None)
+            return resolved[uri]
+        return resolve
+
+    @staticmethod
+    def _turtle_term(node, resolve, prefixes):
+        if isinstance(node, rdflib.Literal):
+            return _quoteLiteral(node)
+        qname = resolve(node) if isinstance(node, rdflib.URIRef) else None
+        if qname is None:
+            return node.n3()
+        prefix, namespace, name = qname
+        prefixes[prefix] = namespace
+        return f'{prefix}:{name}'
+
+    def _iter_turtle(self):
+        subjects, predicate_objects = self._get_index()
+        resolve, prefixes = self._get_qname_resolver(), {}
+        for s in subjects:  # prefixes used by the document must be written first.
+            self._turtle_term(s, resolve, prefixes)
+            for p, o in predicate_objects[s]:
+                self._turtle_term(p, resolve, prefixes)
+                self._turtle_term(o, resolve, prefixes)
+        yield ''.join(f'@prefix {prefix}: <{namespace}> .\n' for prefix, namespace in sorted(prefixes.items())) + '\n'
+        for s in subjects:
+            lines = [
+                f'    {"a" if p == rdflib.RDF.type else self._turtle_term(p, resolve, prefixes)} '
+                f'{self._turtle_term(o, resolve, prefixes)}'
+                for p, o in predicate_objects[s]
+            ]
+            yield f'{self._turtle_term(s, resolve, prefixes)}\n' + ' ;\n'.join(lines) + ' .\n\n'
+
+    def _iter_nt(self):
+        subjects, predicate_objects = self._get_index()
+        for s in subjects:
+            yield ''.join(_nt_row((s, p, o)) for p, o in predicate_objects[s])
+
+    def iter_serialize(self, format='nt', encoding='utf-8'):
+        """
+        Serializes the graph to N-Triples or Turtle (`format` - name or mimetype) in chunks, subject by subject
+        (in the order of `subjects`), without building the whole document. Blank nodes are written as labels
+        (`_:id`), not nested.
+        """
+        try:
+            serializer = {'nt': self._iter_nt, 'turtle': self._iter_turtle}[STREAMED_FORMATS[format]]
+        except KeyError:
+            raise ValueError(f'Streamed serialization to {format} is not supported.')
+        for chunk in serializer():
+            yield chunk.encode(encoding)
@@ -0,0 +1,68 @@
+import time
+from contextlib import contextmanager
+
+from django_redis import get_redis_connection
+from redis.exceptions import LockError, ResponseError
+
+from mcod import settings
+
+
+class RedisSetQueue:
+    """
+    Base of queues coalescing members in a Redis set, which is taken and processed by a periodic flush.
+
+    Flush holds a lock (`{key}:lock`), so flushes running at the same time (periodic task, flush triggered
+    by the size of the queue, several workers) never take the same members - the one which doesn't get the lock
+    returns immediately. Taken sets are recorded in `{key}:taken`, sets left by an interrupted flush are processed
+    by the next one. The lock expires after `QUEUE_FLUSH_LOCK_TIMEOUT` seconds (extended after each taken set).
+    """
+    key = None
+
+    def __init__(self):
+        self.con = get_redis_connection()
+        self._lock = None
+
+    @property
+    def taken_key(self):
+        return f'{self.key}:taken'
+
+    @contextmanager
+    def flush_lock(self):
+        """Yields True if the lock was acquired, False if another flush holds it."""
+        lock = self.con.lock(f'{self.key}:lock', timeout=settings.QUEUE_FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            yield False
+            return
+        self._lock = lock
+        try:
+            yield True
+        finally:
+            self._lock = None
+            try:
+                lock.release()
+            except LockError:  # lock expired.
+                pass
+
+    def extend_lock(self):
+        if self._lock is not None:
+            self._lock.extend(settings.QUEUE_FLUSH_LOCK_TIMEOUT)
+
+    def _take(self):
+        """
+        Renames the queue, returns names of all taken sets waiting for flush (also from interrupted flushes).
+        Must be called with the flush lock held.
+        """
+        taken_set = f'{self.taken_key}:{time.time_ns()}'
+        self.con.sadd(self.taken_key, taken_set)  # recorded first - a crash before rename leaves an empty name.
+        try:
+            self.con.rename(self.key, taken_set)
+        except ResponseError:  # no such key - queue is empty.
+            self.con.srem(self.taken_key, taken_set)
+        return sorted(self.con.smembers(self.taken_key))
+
+    def _done(self, taken_set):
+        """Removes the processed set."""
+        with self.con.pipeline() as pipe:
+            pipe.delete(taken_set)
+            pipe.srem(self.taken_key, taken_set)
+            pipe.execute()
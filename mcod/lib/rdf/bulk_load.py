@@ -0,0 +1,150 @@
+import logging
+import multiprocessing
+import time
+
+import requests
+from django.apps import apps
+from django.core.cache import caches
+from django.db import connections
+
+from mcod import settings
+
+logger = logging.getLogger('mcod')
+
+
+class GraphStoreClient:
+    """
+    Client of the SPARQL 1.1 Graph Store HTTP Protocol endpoint (e.g. Fuseki's `/<dataset>/data`).
+    Triples are added (POST) to the default graph or to the named `graph`.
+    """
+
+    def __init__(self, endpoint=None, auth=None, graph=None, timeout=None):
+        self.endpoint = endpoint or settings.SPARQL_GRAPH_STORE_ENDPOINT
+        self.auth = auth or (settings.SPARQL_USER, settings.SPARQL_PASSWORD)
+        self.graph = graph
+        self.timeout = timeout or settings.RDF_BULK_LOAD_TIMEOUT
+        self.session = requests.Session()
+
+    def post(self, data, content_type='application/n-triples'):
+        response = self.session.post(
+            self.endpoint if self.graph else f'{self.endpoint}?default',
+            params={'graph': self.graph} if self.graph else None,
+            data=data, auth=self.auth, timeout=self.timeout,
+            headers={'Content-Type': f'{content_type}; charset=utf-8'})
+        response.raise_for_status()
+
+
+class BulkLoadCheckpoint:
+    """
+    Stores id of the last object of the model loaded into the graph store and whether load of all objects
+    of the model is completed, so the interrupted load can be resumed.
+    """
+    key_prefix = 'rdf_bulk_load_checkpoint'
+
+    def __init__(self, model_label):
+        self.key = f'{self.key_prefix}:{model_label.lower()}'
+        self.completed_key = f'{self.key}:completed'
+
+    @property
+    def _cache(self):
+        return caches['default']
+
+    @property
+    def last_id(self):
+        return self._cache.get(self.key)
+
+    @property
+    def completed(self):
+        return bool(self._cache.get(self.completed_key))
+
+    def save(self, last_id):
+        self._cache.set(self.key, last_id, timeout=settings.RDF_BULK_LOAD_CHECKPOINT_TIMEOUT)
+
+    def complete(self):
+        self._cache.set(self.completed_key, True, timeout=settings.RDF_BULK_LOAD_CHECKPOINT_TIMEOUT)
+
+    def clear(self):
+        self._cache.delete_many([self.key, self.completed_key])
+
+
+def serialize_objects(model_label, ids):
+    """Serializes RDF graphs of the objects to N-Triples. Returns number of triples and the data."""
+    model = apps.get_model(model_label)
+    count, parts = 0, []
+    for obj in model.objects.filter(pk__in=ids).order_by('pk'):
+        graph = obj.to_rdf_graph()
+        if graph is None:
+            continue
+        count += len(graph)
+        parts.append(graph.serialize(format='nt', encoding='utf-8'))
+    return count, b''.join(parts)
+
+
+def _serialize_chunk(args):
+    model_label, ids = args
+    return ids[-1], serialize_objects(model_label, ids)
+
+
+def _close_connections():
+    connections.close_all()
+
+
+class GraphStoreBulkLoader:
+    """
+    Loads RDF graphs of many objects into the graph store.
+
+    Ids of objects are split into chunks of `chunk_size`, chunks are serialized to N-Triples by `workers` processes
+    (in order of ids) and the data of chunks is sent to the graph store (`client.post`) in batches of at least
+    `batch_size` triples. After each sent batch id of its last object is stored as the checkpoint.
+    """
+
+    def __init__(self, client, workers=None, chunk_size=None, batch_size=None, progress=None):
+        self.client = client
+        self.workers = workers or settings.RDF_BULK_LOAD_WORKERS
+        self.chunk_size = chunk_size or settings.RDF_BULK_LOAD_CHUNK_SIZE
+        self.batch_size = batch_size or settings.RDF_BULK_LOAD_BATCH_SIZE
+        self.progress = progress or (lambda stats: None)
+
+    def _iter_chunks(self, model_label, ids):
+        for start in range(0, len(ids), self.chunk_size):
+            yield model_label, ids[start:start + self.chunk_size]
+
+    def _iter_serialized(self, model_label, ids):
+        chunks = self._iter_chunks(model_label, ids)
+        if self.workers < 2:
+            yield from map(_serialize_chunk, chunks)
+            return
+        _close_connections()  # forked workers must open their own database connections.
+        with multiprocessing.Pool(self.workers, initializer=_close_connections) as pool:
+            yield from pool.imap(_serialize_chunk, chunks)
+
+    def _send(self, last_id, count, parts, stats, checkpoint):
+        self.client.post(b''.join(parts))
+        if checkpoint:
+            checkpoint.save(last_id)
+        stats['batches'] += 1
+        stats['triples'] += count
+        stats['last_id'] = last_id
+        duration = time.perf_counter() - stats['started_at']
+        stats['triples_per_second'] = stats['triples'] / duration if duration else 0
+        self.progress(stats)
+
+    def load(self, model_label, ids, checkpoint=None):
+        """Loads objects of the model with `ids` (ascending). Returns stats of the load."""
+        stats = {
+            'model': model_label, 'objects': 0, 'total': len(ids), 'triples': 0, 'batches': 0, 'last_id': None,
+            'triples_per_second': 0, 'started_at': time.perf_counter(),
+        }
+        last_id, count, parts = None, 0, []
+        for last_id, (chunk_count, data) in self._iter_serialized(model_label, ids):
+            count += chunk_count
+            parts.append(data)
+            stats['objects'] = min(stats['objects'] + self.chunk_size, stats['total'])
+            if count >= self.batch_size:
+                self._send(last_id, count, parts, stats, checkpoint)
+                count, parts = 0, []
+        if parts:
+            self._send(last_id, count, parts, stats, checkpoint)
+        stats['duration'] = time.perf_counter() - stats.pop('started_at')
+        logger.info(f'Bulk load of {model_label} into the graph store: {stats}')
+        return stats
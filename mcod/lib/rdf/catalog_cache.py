@@ -0,0 +1,61 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+
+from mcod import settings
+
+# Changes of objects of these models change the catalog (datasets, their distributions and publishers).
+CATALOG_MODELS = ('datasets.Dataset', 'resources.Resource', 'organizations.Organization')
+
+
+class CatalogCache:
+    """
+    Serialized pages of the DCAT catalog (`/catalog.{format}`) with their ETags.
+
+    A page is serialized once per query params, format and language and served from Redis until the catalog
+    version is changed - by flushes of the index and graph update queues and by index and graph tasks which touched
+    datasets, resources or organizations - or `CATALOG_CACHE_TIMEOUT` passes.
+    """
+    version_key = 'rdf_catalog:version'
+    key_prefix = 'rdf_catalog:page'
+
+    @property
+    def _cache(self):
+        return caches['default']
+
+    @property
+    def version(self):
+        self._cache.add(self.version_key, 1, timeout=None)
+        return self._cache.get(self.version_key, 1)
+
+    def invalidate(self):
+        try:
+            self._cache.incr(self.version_key)
+        except ValueError:  # key doesn't exist.
+            self._cache.set(self.version_key, 1, timeout=None)
+
+    def invalidate_for(self, labels):
+        """Invalidates cached pages if any of model `labels` belongs to the catalog."""
+        if set(labels) & set(CATALOG_MODELS):
+            self.invalidate()
+
+    def get_key(self, params, content_type, language):
+        query = urlencode(sorted(params.items()), doseq=True)
+        digest = hashlib.md5(f'{query}|{content_type}|{language}'.encode()).hexdigest()
+        return f'{self.key_prefix}:{self.version}:{digest}'
+
+    def get(self, key):
+        """Returns (etag, body) of the cached page or None."""
+        return self._cache.get(key)
+
+    def set(self, key, body):
+        """Stores the serialized page, returns its ETag."""
+        etag = hashlib.md5(body).hexdigest()
+        self._cache.set(key, (etag, body), timeout=settings.CATALOG_CACHE_TIMEOUT)
+        return etag
+
+
+def invalidate_catalog(*labels):
+    """Invalidates cached catalog pages after changes of objects of models with `labels` (e.g. 'datasets.Dataset')."""
+    CatalogCache().invalidate_for(labels)
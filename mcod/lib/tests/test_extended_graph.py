@@ -0,0 +1,48 @@
+import rdflib
+from rdflib import BNode, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from mcod.core.api.rdf.namespaces import DCAT, DCT, RDF
+from mcod.lib.extended_graph import ExtendedGraph
+
+
+def _get_graph():
+    graph = ExtendedGraph(ordered=True)
+    graph.bind('dcat', DCAT)
+    graph.bind('dct', DCT)
+    for dataset_id in (3, 1, 2):
+        dataset = URIRef(f'http://test.mcod/pl/dataset/{dataset_id},slug')
+        distribution = BNode(f'd{dataset_id}')
+        graph.add((dataset, RDF.type, DCAT.Dataset))
+        graph.add((dataset, DCT.title, Literal(f'"Zbiór"\n{dataset_id}', lang='pl')))
+        graph.add((dataset, DCAT.distribution, distribution))
+        graph.add((distribution, DCT.issued, Literal('2021-01-01', datatype=rdflib.XSD.date)))
+    return graph
+
+
+def test_ordered_graph_subjects_are_sorted_and_unique():
+    graph = _get_graph()
+    subjects = list(graph.subjects())
+    assert subjects == sorted(set(rdflib.ConjunctiveGraph.subjects(graph)))
+    assert list(graph.predicate_objects(subjects[-1])) == sorted(rdflib.ConjunctiveGraph.predicate_objects(
+        graph, subjects[-1]))
+
+    new_subject = URIRef('http://test.mcod/pl/dataset/0,slug')
+    graph.add((new_subject, RDF.type, DCAT.Dataset))
+    assert new_subject in list(graph.subjects())
+
+
+def test_ordered_graph_serialization_is_unchanged():
+    graph = _get_graph()
+    for content_type in ('application/rdf+xml', 'text/turtle', 'application/ld+json'):
+        assert graph.serialize(format=content_type) == _get_graph().serialize(format=content_type)
+
+
+def test_iter_serialize_writes_subjects_in_order():
+    graph = _get_graph()
+    for content_type, rdflib_format in (('application/n-triples', 'nt'), ('text/turtle', 'turtle')):
+        data = b''.join(graph.iter_serialize(content_type)).decode()
+        assert isomorphic(rdflib.Graph().parse(data=data, format=rdflib_format), graph)
+    lines = b''.join(graph.iter_serialize('nt')).decode().splitlines()
+    written_subjects = list(dict.fromkeys(line.split()[0] for line in lines))
+    assert written_subjects == [subject.n3() for subject in graph.subjects()]
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from mcod.reports.materialized_views import refresh_materialized_views, registry
+from mcod.reports.models import MaterializedViewRefresh
+
+
+class Command(BaseCommand):
+    help = 'Refreshes materialized views used by reports (concurrently, if possible) whose source tables changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', nargs='+', help='Names of views to refresh (all registered views by default).')
+        parser.add_argument('--force', action='store_true', help='Refresh even if source tables did not change.')
+        parser.add_argument('--stats', action='store_true', help='Only show the statistics of previous refreshes.')
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            for result in refresh_materialized_views(names=options['views'], force=options['force']):
+                self.stdout.write(f"{result['view']}: {result['status']} ({result['duration']:.2f}s)")
+        for view in registry:
+            stats = MaterializedViewRefresh.objects.filter(name=view.name).first()
+            if stats and stats.last_refreshed:
+                self.stdout.write(
+                    f'{view.name}: last refreshed {stats.last_refreshed:%Y-%m-%d %H:%M:%S} '
+                    f'in {stats.last_duration:.2f}s, max {stats.max_duration:.2f}s, {stats.refresh_count} refresh(es)')
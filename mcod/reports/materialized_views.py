@@ -0,0 +1,102 @@
+import logging
+from time import time
+
+from django.db import connection
+from django.utils.timezone import now
+
+logger = logging.getLogger('mcod')
+
+
+class MaterializedView:
+    """
+    Materialized view used by reports.
+    `source_tables` maps tables the view is built from to an SQL aggregate changing with their content (or None),
+    e.g. the latest modification time - the number of rows and the aggregate of each table make the state of sources.
+    View with `unique_columns` (covered by the unique index) is refreshed concurrently, without locking its readers.
+    """
+
+    def __init__(self, name, source_tables, unique_columns=None):
+        self.name = name
+        self.source_tables = source_tables
+        self.unique_columns = unique_columns or []
+
+    def get_source_state(self, cursor):
+        parts = []
+        for table, aggregate in sorted(self.source_tables.items()):
+            parts.append(f"(SELECT CONCAT_WS('|', COUNT(1), {aggregate or 'NULL'}) FROM public.{table})")
+        cursor.execute(f"SELECT CONCAT_WS(';', {', '.join(parts)})")
+        return cursor.fetchone()[0]
+
+    def can_refresh_concurrently(self, cursor):
+        if not self.unique_columns:
+            return False
+        cursor.execute('SELECT relispopulated FROM pg_class WHERE relname = %s AND relkind = %s', [self.name, 'm'])
+        row = cursor.fetchone()
+        return bool(row and row[0])
+
+
+class MaterializedViewRegistry:
+
+    def __init__(self):
+        self._views = {}
+
+    def register(self, view):
+        self._views[view.name] = view
+        return view
+
+    def get(self, name):
+        return self._views[name]
+
+    def __iter__(self):
+        return iter(self._views.values())
+
+
+registry = MaterializedViewRegistry()
+
+DAILY_REPORT_VIEW = registry.register(MaterializedView(
+    'mv_resource_dataset_organization_report_d_hv_r_data',
+    source_tables={
+        'organization': 'MAX(modified)',
+        'dataset': 'MAX(modified)',
+        'resource': 'MAX(modified)',
+        'resources_resourcefile': 'SUM(id)',
+        'counters_resourceviewcounter': 'SUM(count)',
+        'counters_resourcedownloadcounter': 'SUM(count)',
+        'user_following_dataset': 'SUM(id)',
+        'user': 'MAX(modified)',
+    },
+    unique_columns=['id_instytucji', 'id_zbioru_danych', 'id_zasobu'],
+))
+
+
+def refresh_materialized_view(name, force=False):
+    """
+    Refreshes the view unless its sources didn't change since the last refresh.
+    Returns the status ('refreshed' or 'skipped') and the refresh time, which is also stored in MaterializedViewRefresh.
+    """
+    from mcod.reports.models import MaterializedViewRefresh
+
+    view = registry.get(name)
+    refresh, _ = MaterializedViewRefresh.objects.get_or_create(name=name)
+    with connection.cursor() as cursor:
+        source_state = view.get_source_state(cursor)
+        if not force and refresh.last_refreshed and refresh.source_state == source_state:
+            logger.debug(f'Materialized view {name} is up to date, refresh skipped.')
+            return {'view': name, 'status': 'skipped', 'duration': 0}
+        concurrently = view.can_refresh_concurrently(cursor)
+        start = time()
+        cursor.execute(f'REFRESH MATERIALIZED VIEW {"CONCURRENTLY " if concurrently else ""}{name}')
+        duration = time() - start
+    refresh.source_state = source_state
+    refresh.last_refreshed = now()
+    refresh.last_duration = duration
+    refresh.max_duration = max(refresh.max_duration or 0, duration)
+    refresh.refresh_count += 1
+    refresh.save()
+    logger.info(f'Materialized view {name} refreshed{" concurrently" if concurrently else ""} in {duration:.2f}s.')
+    return {'view': name, 'status': 'refreshed', 'duration': duration}
+
+
+def refresh_materialized_views(names=None, force=False):
+    names = names or [view.name for view in registry]
+    return [refresh_materialized_view(name, force=force) for name in names]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.9 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0013_dd_hv_r_data_in_daily_reports'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedViewRefresh',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Materialized view')),
+                ('source_state', models.TextField(blank=True, default='', verbose_name='State of source tables')),
+                ('last_refreshed', models.DateTimeField(blank=True, null=True, verbose_name='Last refreshed')),
+                ('last_duration', models.FloatField(blank=True, null=True, verbose_name='Duration of the last refresh')),
+                ('max_duration', models.FloatField(blank=True, null=True, verbose_name='Maximum duration of refresh')),
+                ('refresh_count', models.PositiveIntegerField(default=0, verbose_name='Number of refreshes')),
+            ],
+            options={
+                'verbose_name': 'Materialized view refresh',
+                'verbose_name_plural': 'Materialized view refreshes',
+            },
+        ),
+        migrations.RunSQL(
+            sql='CREATE UNIQUE INDEX IF NOT EXISTS mv_resource_dataset_organization_report_d_hv_r_data_uniq '
+                'ON public.mv_resource_dataset_organization_report_d_hv_r_data '
+                '(id_instytucji, id_zbioru_danych, id_zasobu);',
+            reverse_sql='DROP INDEX IF EXISTS public.mv_resource_dataset_organization_report_d_hv_r_data_uniq;',
+        ),
+    ]
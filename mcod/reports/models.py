@@ -154,3 +154,19 @@ class Dashboard(Report):
         proxy = True
         verbose_name = pgettext_lazy('Metabase Dashboard', 'Dashboard')
         verbose_name_plural = pgettext_lazy('Metabase Dashboards', 'Dashboards')
+
+
+class MaterializedViewRefresh(models.Model):
+    name = models.CharField(max_length=100, unique=True, verbose_name=_('Materialized view'))
+    source_state = models.TextField(blank=True, default='', verbose_name=_('State of source tables'))
+    last_refreshed = models.DateTimeField(null=True, blank=True, verbose_name=_('Last refreshed'))
+    last_duration = models.FloatField(null=True, blank=True, verbose_name=_('Duration of the last refresh'))
+    max_duration = models.FloatField(null=True, blank=True, verbose_name=_('Maximum duration of refresh'))
+    refresh_count = models.PositiveIntegerField(default=0, verbose_name=_('Number of refreshes'))
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = _('Materialized view refresh')
+        verbose_name_plural = _('Materialized view refreshes')
@@ -1,9 +1,10 @@
-import csv
 import datetime
 import json
 import logging
 import os
 from collections import OrderedDict
+from functools import partial
+from itertools import chain
 from pathlib import Path
 from time import time
 
@@ -22,12 +23,13 @@ from mcod.celeryapp import app
 from mcod.core.api.rdf.namespaces import NAMESPACES
 from mcod.core.serializers import csv_serializers_registry as csr
 from mcod.core.tasks import extended_shared_task
-from mcod.core.utils import save_as_csv
+from mcod.core.utils import iter_in_chunks, save_as_csv
 from mcod.datasets.models import Dataset
 from mcod.lib.rdf.store import get_sparql_store
+from mcod.reports.materialized_views import DAILY_REPORT_VIEW, refresh_materialized_view, refresh_materialized_views
 from mcod.reports.models import Report, SummaryDailyReport
 from mcod.resources.models import Resource
-from mcod.resources.tasks import validate_link
+from mcod.resources.tasks import validate_links_task
 from mcod.showcases.serializers import ShowcaseProposalCSVSerializer
 from mcod.suggestions.serializers import DatasetSubmissionCSVSerializer
 from mcod.users.serializers import UserLocalTimeCSVSerializer
@@ -37,6 +39,24 @@ logger = logging.getLogger('mcod')
 kronika_logger = logging.getLogger('kronika-sparql-performance')
 
 
+def dump_in_chunks(serializer, queryset):
+    """Serializes objects of the queryset fetched from the database in chunks, one chunk at a time."""
+    for chunk in iter_in_chunks(queryset, settings.REPORTS_CHUNK_SIZE):
+        yield from serializer.dump(chunk)
+
+
+def save_report(file_path, headers, rows, delimiter=';'):
+    """Writes rows (usually a generator) to the CSV file incrementally, logs the throughput."""
+    start = time()
+    with open(file_path, 'w') as f:
+        count = save_as_csv(f, headers, rows, delimiter=delimiter)
+    elapsed = time() - start
+    size = os.path.getsize(file_path)
+    rate = count / elapsed if elapsed else count
+    logger.info(f'reports.task: {count} rows ({size} bytes) written to {file_path} in {elapsed:.2f}s ({rate:.0f} rows/s)')
+    return count
+
+
 @extended_shared_task(name='reports', ignore_result=False)
 def generate_csv(pks, model_name, user_id, file_name_postfix):
     app, _model = model_name.split('.')
@@ -54,7 +74,6 @@ def generate_csv(pks, model_name, user_id, file_name_postfix):
 
     serializer = serializer_cls(many=True)
     queryset = model.objects.filter(pk__in=pks)
-    data = serializer_cls(many=True).dump(queryset)
     user = User.objects.get(pk=user_id)
     file_name = f'{_model.lower()}s_{file_name_postfix}.csv'
     reports_path = os.path.join(settings.REPORTS_MEDIA_ROOT, app)
@@ -63,8 +82,7 @@ def generate_csv(pks, model_name, user_id, file_name_postfix):
     file_path = os.path.join(reports_path, file_name)
     file_url_path = f'{settings.REPORTS_MEDIA}/{app}/{file_name}'
 
-    with open(file_path, 'w') as f:
-        save_as_csv(f, serializer.get_csv_headers(), data)
+    save_report(file_path, serializer.get_csv_headers(), dump_in_chunks(serializer, queryset))
 
     return json.dumps({
         'model': model_name,
@@ -86,15 +104,13 @@ def create_no_resource_dataset_report():
         ).filter(Q(resources__isnull=True) | Q(all_resources=F('unpublished_resources')), status='published').distinct()
     serializer_cls = csr.get_serializer(Dataset)
     serializer = serializer_cls(many=True)
-    data = serializer.dump(queryset)
     file_name = f'nodata_datasets_{file_name_postfix}.csv'
     reports_path = os.path.join(settings.REPORTS_MEDIA_ROOT, app)
     os.makedirs(reports_path, exist_ok=True)
 
     file_path = os.path.join(reports_path, file_name)
     file_url_path = f'{settings.REPORTS_MEDIA}/{app}/{file_name}'
-    with open(file_path, 'w') as f:
-        save_as_csv(f, serializer.get_csv_headers(), data)
+    save_report(file_path, serializer.get_csv_headers(), dump_in_chunks(serializer, queryset))
     return json.dumps({
         'file': file_url_path,
         'model': 'datasets.Dataset'
@@ -113,15 +129,13 @@ def create_resource_link_validation_report():
         ['link_is_valid', 'file_is_valid', 'data_is_valid', 'format', 'status',
          'openness_score', 'views_count', 'downloads_count']
     serializer = serializer_cls(many=True, exclude=excluded_fields)
-    data = serializer.dump(queryset)
     file_name = f'brokenlinks_resources_{file_name_postfix}.csv'
     reports_path = os.path.join(settings.REPORTS_MEDIA_ROOT, app)
     os.makedirs(reports_path, exist_ok=True)
 
     file_path = os.path.join(reports_path, file_name)
     file_url_path = f'{settings.REPORTS_MEDIA}/{app}/{file_name}'
-    with open(file_path, 'w') as f:
-        save_as_csv(f, serializer.get_csv_headers(), data)
+    save_report(file_path, serializer.get_csv_headers(), dump_in_chunks(serializer, queryset))
     return json.dumps({
         'file': file_url_path,
         'model': 'resources.Resource'
@@ -168,10 +182,7 @@ def create_resources_report_task(data, headers, report_name):
     os.makedirs(reports_path, exist_ok=True)
     file_path = os.path.join(reports_path, file_name)
     file_url_path = f'{settings.REPORTS_MEDIA}/{app_name}/{file_name}'
-    with open(file_path, 'w') as f:
-        w = csv.DictWriter(f, headers)
-        w.writeheader()
-        w.writerows(data)
+    save_report(file_path, headers, data, delimiter=',')
     return json.dumps({
         'file': file_url_path,
         'model': 'resources.Resource'
@@ -206,7 +217,8 @@ def validate_resources_links(ids=None):
             status='published', link__isnull=False
         ).exclude(Q(link__startswith=settings.API_URL) | Q(link__startswith=settings.BASE_URL)
                   ).values_list('pk', flat=True))
-    subtasks = [validate_link.s(res_id) for res_id in resources_ids]
+    subtasks = [
+        validate_links_task.s(batch) for batch in iter_in_chunks(resources_ids, settings.LINK_VALIDATION_BATCH_SIZE)]
     callback = link_validation_success_callback.si().on_error(link_validation_error_callback.si())
     chord(subtasks, callback).apply_async()
 
@@ -243,16 +255,33 @@ def generating_report_failure(sender, task_id, exception, args, traceback, einfo
         logger.error(f"reports.task: exception on generating_report_failure:\n{e}")
 
 
-def dict_fetch_all(cursor):
-    """Return all rows from a cursor as a OrderedDict"""
-    columns = [col[0] for col in cursor.description]
-    return [OrderedDict(zip(columns, row)) for row in cursor.fetchall()]
+def dict_fetch_iter(cursor, chunk_size=None):
+    """Yield rows from a cursor as OrderedDicts, fetching them in chunks"""
+    chunk_size = chunk_size or settings.REPORTS_CHUNK_SIZE
+    columns = None
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        columns = columns or [col[0] for col in cursor.description]
+        for row in rows:
+            yield OrderedDict(zip(columns, row))
+
+
+def add_daily_report_links(row, base_url):
+    if row['id_zasobu']:
+        row['link_zasobu'] = f"{base_url}/dataset/{row['id_zbioru_danych']}/resource/{row['id_zasobu']}"
+    if row['id_zbioru_danych']:
+        row['link_zbioru'] = f"{base_url}/dataset/{row['id_zbioru_danych']}"
+    if row['id_instytucji']:
+        row['link_instytucji'] = f"{base_url}/institution/{row['id_instytucji']}"
+    return row
 
 
 @app.task(ignore_result=False)
 def create_daily_resources_report():
     str_date = datetime.datetime.now().strftime('%Y_%m_%d_%H%M')
-    view_name = 'mv_resource_dataset_organization_report_d_hv_r_data'
+    view_name = DAILY_REPORT_VIEW.name
     report_fields = """
             id_zasobu,
             NULL as link_zasobu,
@@ -284,30 +313,24 @@ def create_daily_resources_report():
             data_utworzenia_instytucji,
             liczba_udostepnionych_zbiorow_danych
         """
-    with connection.cursor() as cursor:
-        cursor.execute(f"""REFRESH MATERIALIZED VIEW {view_name}""")
-        cursor.execute(f"""
-            SELECT {report_fields}
-            FROM {view_name}
-        """)
-        results = dict_fetch_all(cursor)
-
-    for r in results:
-        if r['id_zasobu']:
-            r['link_zasobu'] = f"{settings.BASE_URL}/{get_language()}/dataset/{r['id_zbioru_danych']}/resource/{r['id_zasobu']}"
-        if r['id_zbioru_danych']:
-            r['link_zbioru'] = f"{settings.BASE_URL}/{get_language()}/dataset/{r['id_zbioru_danych']}"
-        if r['id_instytucji']:
-            r['link_instytucji'] = f"{settings.BASE_URL}/{get_language()}/institution/{r['id_instytucji']}"
-
     os.makedirs(Path(settings.REPORTS_MEDIA_ROOT, 'daily'), exist_ok=True)
     file_path = Path(settings.REPORTS_MEDIA[1:], 'daily', f'Zbiorczy_raport_dzienny_{str_date}.csv')
     save_path = Path(settings.REPORTS_MEDIA_ROOT, 'daily', f'Zbiorczy_raport_dzienny_{str_date}.csv')
 
-    with open(save_path, 'w') as f:
-        w = csv.DictWriter(f, results[0].keys())
-        w.writeheader()
-        w.writerows(results)
+    refresh_materialized_view(view_name)
+    # Named (server-side) cursor - rows are fetched in chunks while the report is written.
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {report_fields}
+            FROM {view_name}
+        """)
+        rows = dict_fetch_iter(cursor)
+        first_row = next(rows, None)
+        headers = [col[0] for col in cursor.description]
+        rows = map(
+            partial(add_daily_report_links, base_url=f'{settings.BASE_URL}/{get_language()}'),
+            chain([first_row] if first_row else [], rows))
+        save_report(save_path, headers, rows, delimiter=',')
 
     SummaryDailyReport.objects.create(
         file=file_path,
@@ -318,6 +341,11 @@ def create_daily_resources_report():
     return {}
 
 
+@extended_shared_task(ignore_result=False)
+def refresh_materialized_views_task(names=None, force=False):
+    return refresh_materialized_views(names=names, force=force)
+
+
 @extended_shared_task
 def check_kronika_connection_performance():
     logger.info('Executing check_kronika_connection_performance task')
@@ -11,8 +11,9 @@ from django.contrib.auth import get_user_model
 from django.db.models import Sum
 
 from mcod.counters.models import ResourceDownloadCounter, ResourceViewCounter
-from mcod.reports.models import SummaryDailyReport
-from mcod.reports.tasks import create_daily_resources_report, generate_csv
+from mcod.reports.materialized_views import DAILY_REPORT_VIEW, refresh_materialized_view
+from mcod.reports.models import MaterializedViewRefresh, SummaryDailyReport
+from mcod.reports.tasks import create_daily_resources_report, dict_fetch_iter, generate_csv
 
 User = get_user_model()
 Report = apps.get_model("reports", "Report")
@@ -138,3 +139,19 @@ class TestTasks:
         ).aggregate(downloads_sum=Sum("count"))["downloads_sum"]
         assert int(resource_data[13]) == views_count
         assert int(resource_data[14]) == downloads_count
+
+
+def test_dict_fetch_iter_fetches_rows_in_chunks(mocker):
+    cursor = mocker.Mock(description=[("id",), ("name",)])
+    cursor.fetchmany.side_effect = [[(1, "a"), (2, "b")], [(3, "c")], []]
+    rows = list(dict_fetch_iter(cursor, chunk_size=2))
+    assert rows == [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3, "name": "c"}]
+    cursor.fetchmany.assert_called_with(2)
+
+
+def test_refresh_materialized_view_skips_unchanged_sources(resource):
+    assert refresh_materialized_view(DAILY_REPORT_VIEW.name, force=True)["status"] == "refreshed"
+    assert refresh_materialized_view(DAILY_REPORT_VIEW.name)["status"] == "skipped"
+    stats = MaterializedViewRefresh.objects.get(name=DAILY_REPORT_VIEW.name)
+    assert stats.refresh_count == 1
+    assert stats.last_duration is not None
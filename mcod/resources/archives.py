@@ -1,6 +1,10 @@
+import atexit
 import os
+import shutil
 import tempfile
+import threading
 import zipfile
+from collections import OrderedDict
 
 import libarchive
 import magic
@@ -15,6 +19,10 @@ class UnsupportedArchiveError(Exception):
     pass
 
 
+class ArchiveTooLargeError(UnsupportedArchiveError):
+    pass
+
+
 def is_archive_file(content_type):
     return content_type in settings.ARCHIVE_CONTENT_TYPES
 
@@ -86,37 +94,137 @@ def has_archive_extension(path):
 
 
 class ArchiveReader:
+    """
+    Reader of zip/7z/rar (and other supported by libarchive) archives.
+
+    Members are listed from the archive headers and checked against `ARCHIVE_MAX_UNCOMPRESSED_SIZE`
+    and `ARCHIVE_MAX_COMPRESSION_RATIO` before anything is written to the disk. By default all members
+    are extracted at once. In the lazy mode members are extracted on demand - by `extract`, item access
+    or iteration. `ArchiveReader.cached(source)` returns a lazy reader shared by all users of the same file
+    (path and modification time) in the process, extracted members are reused until the reader is evicted -
+    the least recently used readers are evicted above `ARCHIVE_EXTRACTION_CACHE_SIZE` archives
+    or `ARCHIVE_EXTRACTION_CACHE_MAX_BYTES` extracted bytes.
+    """
     _tmp_dir = None
+    _cache = OrderedDict()
+    _cache_lock = threading.RLock()
+    ratio_check_min_size = 10 * 1024 * 1024
+
+    def __init__(self, source, destiny_path=None, lazy=False):
+        self.source = source
+        self.root_dir = os.path.realpath(destiny_path or self.tmp_dir)
+        self.is_rar = rarfile.is_rarfile(source)
+        self._is_cached = False
+        self._extracted = set()
+        self._extract_lock = threading.Lock()
+        self._members = OrderedDict()
+        members = self._list_members()
+        self._check_size(sum(size or 0 for name, size in members))
+        for name, size in members:
+            self._members[self._get_member_path(name)] = name
+        self.files = tuple(self._members)
+        if not lazy:
+            self.extract_all()
+
+    @classmethod
+    def cached(cls, source):
+        key = (os.path.realpath(source), os.path.getmtime(source))
+        with cls._cache_lock:
+            reader = cls._cache.pop(key, None)
+            if reader is None:
+                reader = cls(source, lazy=True)
+                reader._is_cached = True
+            cls._cache[key] = reader
+            cls._evict(keep=reader)
+        return reader
+
+    @classmethod
+    def _evict(cls, keep):
+        """Cleans up the least recently used readers (except `keep`) until the cache fits in its limits."""
+        with cls._cache_lock:
+            size = sum(reader.extracted_size for reader in cls._cache.values())
+            for key, reader in list(cls._cache.items()):
+                if len(cls._cache) <= settings.ARCHIVE_EXTRACTION_CACHE_SIZE and \
+                        size <= settings.ARCHIVE_EXTRACTION_CACHE_MAX_BYTES:
+                    break
+                if reader is not keep:
+                    size -= reader.extracted_size
+                    del cls._cache[key]
+                    reader._cleanup()
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            while cls._cache:
+                _, reader = cls._cache.popitem()
+                reader._cleanup()
+
+    def _list_members(self):
+        """Returns (name, uncompressed size) of files in the archive, read from headers (without extraction)."""
+        if self.is_rar:
+            with rarfile.RarFile(self.source) as rf:
+                return [(info.filename, info.file_size) for info in rf.infolist() if not info.is_dir()]
+        with libarchive.file_reader(self.source) as arch:
+            return [(self._get_entry_path(entry), entry.size) for entry in arch if not entry.isdir]
+
+    def _check_size(self, uncompressed_size):
+        if uncompressed_size > settings.ARCHIVE_MAX_UNCOMPRESSED_SIZE:
+            raise ArchiveTooLargeError(
+                f'Uncompressed size of the archive exceeds {settings.ARCHIVE_MAX_UNCOMPRESSED_SIZE} bytes')
+        if uncompressed_size > self.ratio_check_min_size:
+            ratio = uncompressed_size / max(os.path.getsize(self.source), 1)
+            if ratio > settings.ARCHIVE_MAX_COMPRESSION_RATIO:
+                raise ArchiveTooLargeError(f'Compression ratio of the archive ({ratio:.0f}) is too high')
+
+    def _get_member_path(self, name):
+        path = os.path.realpath(os.path.join(self.root_dir, name))
+        if os.path.commonpath([self.root_dir, path]) != self.root_dir:
+            raise UnsupportedArchiveError(f'Archive member {name} is outside of the extraction directory')
+        return path
+
+    def _write_entry(self, entry, path, written):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            for block in entry.get_blocks():
+                written += len(block)
+                self._check_size(written)  # sizes in headers of some formats are unknown or can't be trusted.
+                f.write(block)
+        return written
+
+    def extract(self, *paths):
+        """Extracts members (given by paths returned in `files`) which aren't extracted yet, returns the paths."""
+        with self._extract_lock:  # cached reader is shared by threads.
+            missing = {path for path in paths if path not in self._extracted or not os.path.exists(path)}
+            if missing:
+                if self.is_rar:
+                    with rarfile.RarFile(self.source) as rf:
+                        for path in missing:
+                            rf.extract(self._members[path], path=self.root_dir)
+                else:
+                    written = sum(os.path.getsize(path) for path in self._extracted if path not in missing)
+                    with libarchive.file_reader(self.source) as arch:
+                        for entry in arch:
+                            path = None if entry.isdir else self._get_member_path(self._get_entry_path(entry))
+                            if path in missing:
+                                written = self._write_entry(entry, path, written)
+                self._extracted.update(missing)
+        if missing and self._is_cached:
+            self._evict(keep=self)
+        return list(paths)
+
+    @property
+    def extracted_size(self):
+        return sum(os.path.getsize(path) for path in self._extracted if os.path.exists(path))
+
+    def get_member_name(self, path):
+        """Returns name of the member in the archive for the path returned in `files`."""
+        return self._members[path]
+
+    def extract_all(self):
+        return self.extract(*self.files)
 
-    def __init__(self, source, destiny_path=None):
-        root_dir = os.path.realpath(destiny_path or self.tmp_dir)
-
-        files = []
-        if rarfile.is_rarfile(source):
-            with rarfile.RarFile(source) as rf:
-                rf.extractall(path=root_dir)
-            for root, dirs, files_ in os.walk(root_dir):
-                for filename in files_:
-                    files.append(os.path.abspath(os.path.join(root, filename)))
-
-        else:
-            with libarchive.file_reader(source) as arch:
-                for entry in arch:
-                    entry_path = self._get_entry_path(entry)
-                    if entry.isdir:
-                        os.makedirs(os.path.join(root_dir, entry_path), exist_ok=True)
-                    else:
-                        path, extr_file = os.path.split(entry_path)
-                        if path and not os.path.isdir(os.path.join(root_dir, path)):
-                            os.makedirs(os.path.join(root_dir, path), exist_ok=True)
-                        resource_path = os.path.join(root_dir, path, extr_file)
-
-                        with open(resource_path, 'wb') as f:
-                            for block in entry.get_blocks():
-                                f.write(block)
-                        files.append(resource_path)
-
-        self.files = tuple(files)
+    def extract_with_extensions(self, *extensions):
+        return self.extract(*(path for path in self.files if path.lower().endswith(extensions)))
 
     @staticmethod
     def _get_entry_path(entry):
@@ -135,21 +243,25 @@ class ArchiveReader:
         return self._tmp_dir
 
     def cleanup(self):
+        if not self._is_cached:  # cached reader is cleaned up when evicted from the cache.
+            self._cleanup()
+
+    def _cleanup(self):
         dirs = set()
-        for f in self.files:
+        for f in self._extracted:
             dirs.add(os.path.split(f)[0])
-            os.remove(f)
-
-        dirs = sorted(dirs, reverse=True)
-        for d in dirs:
             try:
-                os.rmdir(d)
-            except OSError:
+                os.remove(f)
+            except FileNotFoundError:
                 pass
+        self._extracted = set()
 
         if self._tmp_dir:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            return
+        for d in sorted(dirs, reverse=True):
             try:
-                os.rmdir(self._tmp_dir)
+                os.rmdir(d)
             except OSError:
                 pass
 
@@ -157,13 +269,18 @@ class ArchiveReader:
         return len(self.files)
 
     def __getitem__(self, item):
-        return self.files[item]
+        path = self.files[item]
+        self.extract(path)
+        return path
 
     def __enter__(self):
         return self
 
     def __iter__(self):
-        return iter(self.files)
+        return iter(self.extract_all())
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.cleanup()
+
+
+atexit.register(ArchiveReader.clear_cache)
@@ -64,6 +64,7 @@ recommendations = {
     'unknown-encoding': "Sprawdź czy kodowanie znaków w pliku jest zgodne z ISO-8859-2, Windows-1250, CP852, UTF-8. "
                         "Zmień kodowanie polskich znaków na UTF-8.",
     'UnsupportedArchiveError': 'Kompresja jest dopuszczalna dla pojedynczego pliku lub dla plików typu shapefile',
+    'ArchiveTooLargeError': 'Upewnij się, że rozmiar plików po rozpakowaniu archiwum nie jest zbyt duży.',
 
     'location-moved': "Sprawdź czy podany link poprawnie wskazuje na zasób.",
     '400-bad-request': "Sprawdź czy podany link jest poprawnie wpisany.",
@@ -97,6 +98,7 @@ messages = {
     'connection-error': "Nie udało się nawiązać połączenia.",
     'FileNotFoundError': "Brak pliku we wskazanej lokalizacji.",
     'UnsupportedArchiveError': 'Niedopuszczalna kompresja plików',
+    'ArchiveTooLargeError': 'Rozmiar plików po rozpakowaniu archiwum jest zbyt duży.',
 
     'location-moved': "Lokalizacja zasobu została zmieniona.",
     '400-bad-request': "Nieprawidłowe sformułowanie zapytania (wywołania) – żądanie nie może być obsłużone przez "
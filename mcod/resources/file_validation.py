@@ -1,6 +1,14 @@
+import hashlib
 import logging
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 
 import magic
+from django.core.cache import caches
+from django.utils.functional import cached_property
 from mimeparse import parse_mime_type
 
 from mcod import settings
@@ -11,11 +19,21 @@ from mcod.resources.archives import (
     is_archive_file,
     is_password_protected_archive_file,
 )
-from mcod.resources.geo import analyze_shapefile, are_shapefiles, check_geodata, has_geotiff_files
-from mcod.resources.meteo import check_meteo_data
+from mcod.resources.geo import (
+    SHAPEFILE_EXTENSIONS,
+    analyze_shapefile,
+    apply_geodata_type,
+    are_shapefiles,
+    get_geodata_detectors,
+    has_geotiff_files,
+)
+from mcod.resources.meteo import NETCDF_CONTENT_TYPES, check_meteo_data, is_valid_netcdf
 
 logger = logging.getLogger('mcod')
 
+# Bump after changes of the analysis, so results cached by the previous version aren't used.
+FILE_ANALYSIS_CACHE_VERSION = 1
+
 
 class UnknownFileFormatError(Exception):
     pass
@@ -62,23 +80,24 @@ def _isnt_msdoc_text(content_type):
         return False
 
 
-def _analyze_plain_text(path, extension, encoding):
+def _analyze_plain_text(source, extension, encoding):
     backup_encoding = 'utf-8'
     if encoding.startswith('unknown') or encoding == 'binary':
-        encoding, backup_encoding = guess.file_encoding(path)
+        encoding, backup_encoding = source.guessed_encoding
         logger.debug(f" encoding (guess-plain): {encoding}")
         logger.debug(f" backup_encoding (guess-plain): {backup_encoding}")
 
-    extension = guess.text_file_format(path, encoding or backup_encoding) or extension
+    extension = guess.text_file_format(source.path, encoding or backup_encoding) or extension
     logger.debug(f"  extension (guess-plain): {extension}")
 
     return extension, encoding
 
 
-def _analyze_office_file(path, encoding, content_type, extension):
+def _analyze_office_file(source, encoding, content_type, extension):
+    path = source.path
     tmp_extension = path.rsplit('.')[-1]
     if _isnt_text_encoding(encoding):
-        encoding, backup_encoding = guess.file_encoding(path)
+        encoding, backup_encoding = source.guessed_encoding
         logger.debug(f"  encoding (guess-spreadsheet): {encoding}")
         logger.debug(f"  backup_encoding (guess-spreadsheet): {backup_encoding}")
         encoding = encoding or backup_encoding
@@ -138,9 +157,81 @@ def get_file_info(path):
     return parse_mime_type(result)
 
 
-def analyze_file(path):  # noqa: C901
+class AnalyzedFile:
+    """
+    File analyzed by detectors. Its magic info, the beginning (`FILE_ANALYSIS_PREFIX_SIZE` bytes) and the guessed
+    encoding are read once and shared by all detectors. The content hash is computed on the memory-mapped file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @cached_property
+    def mime_info(self):
+        return get_file_info(self.path)
+
+    @cached_property
+    def description(self):
+        return magic.from_file(self.path)
+
+    @cached_property
+    def prefix(self):
+        with open(self.path, 'rb') as f:
+            return f.read(settings.FILE_ANALYSIS_PREFIX_SIZE)
+
+    @cached_property
+    def guessed_encoding(self):
+        return guess.file_encoding(self.path, prefix=self.prefix)
+
+    @cached_property
+    def content_hash(self):
+        md5 = hashlib.md5()
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:  # empty file can't be mapped.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    md5.update(data)
+        return md5.hexdigest()
+
+    @property
+    def extension(self):
+        """Extension of the file name (detectors depend on it), None if the name has no extension."""
+        name = os.path.basename(self.path)
+        return name.rsplit('.', 1)[-1] if '.' in name else None
+
+    @property
+    def cache_key(self):
+        return f'file_analysis:{FILE_ANALYSIS_CACHE_VERSION}:{self.content_hash}:{self.extension}'
+
+
+def _is_cacheable(result):
+    analyze_exc = result[5]
+    return analyze_exc is None or isinstance(analyze_exc, PasswordProtectedArchiveError)
+
+
+def analyze_file(path):
+    """
+    Returns details of the file (see `_analyze_file`). Results are cached by the content hash of the file,
+    so analysis of the unchanged file (e.g. during revalidation) isn't repeated.
+    Results with errors of geodata analysis (which can be temporary) aren't cached.
+    """
+    source = AnalyzedFile(path)
+    if not settings.FILE_ANALYSIS_CACHE_ENABLED or not source.extension:
+        return _analyze_file(source)
+    cache = caches['default']
+    result = cache.get(source.cache_key)
+    if result is not None:
+        logger.debug(f"analyze_resource_file({path}): cached result of {source.content_hash}")
+        return result[:3] + (path,) + result[4:]
+    result = _analyze_file(source)
+    if _is_cacheable(result):
+        cache.set(source.cache_key, result, timeout=settings.FILE_ANALYSIS_CACHE_TIMEOUT)
+    return result
+
+
+def _analyze_file(source):  # noqa: C901
+    path = source.path
     logger.debug(f"analyze_resource_file({path})")
-    family, content_type, options = get_file_info(path)
+    family, content_type, options = source.mime_info
     extracted = None
     extracted_extension = None
     extracted_mimetype = None
@@ -153,26 +244,27 @@ def analyze_file(path):  # noqa: C901
                 is_password_protected_archive = True
 
         if not is_password_protected_archive:
-            extracted = ArchiveReader(path)
+            extracted = ArchiveReader.cached(path)
             if len(extracted) == 1:
-                extracted_path = extracted[0]
-                extracted_family, extracted_content_type, extracted_options = get_file_info(extracted_path)
-                logger.debug(f"  extracted file {extracted_path}")
+                extracted_source = AnalyzedFile(extracted[0])
+                extracted_family, extracted_content_type, extracted_options = extracted_source.mime_info
+                logger.debug(f"  extracted file {extracted_source.path}")
                 extracted_extension, _, extracted_encoding, _, extracted_mimetype, _ = evaluate_file_details(
-                    extracted_content_type, extracted_family, extracted_options, extracted_path, bool(extracted)
+                    extracted_content_type, extracted_family, extracted_options, extracted_source.path,
+                    bool(extracted), source=extracted_source,
                 )
                 logger.debug(f'  extracted extension: {extracted_extension}')
                 logger.debug(f'  extracted mimetype: {extracted_mimetype}')
             else:
-                if are_shapefiles(extracted):
-                    shp_type, options = analyze_shapefile(extracted)
+                if are_shapefiles(extracted.files):
+                    shp_type, options = analyze_shapefile(extracted.extract_with_extensions(*SHAPEFILE_EXTENSIONS))
                     content_type = 'shapefile'
-                elif has_geotiff_files(extracted):
+                elif has_geotiff_files(extracted.extract_with_extensions('.tif', '.tiff', '.tfw')):
                     family = 'image'
                     content_type = 'tiff;application=geotiff'
 
     extension, file_info, encoding, path, file_mimetype, analyze_exc = evaluate_file_details(
-        content_type, family, options, path, bool(extracted)
+        content_type, family, options, path, bool(extracted), source=source,
     )
 
     if is_password_protected_archive and not analyze_exc:
@@ -187,15 +279,42 @@ def analyze_file(path):  # noqa: C901
         extracted_extension, extracted_mimetype, extracted_encoding
 
 
-def evaluate_file_details(content_type, family, options, path, is_extracted):
+@contextmanager
+def _run_detectors(detectors):
+    """
+    Yields {name: callable returning the result of the detector (or raising its error)}.
+    Detectors are run concurrently by `FILE_ANALYSIS_WORKERS` threads or, if there's one worker, lazily on demand.
+    """
+    workers = min(len(detectors), settings.FILE_ANALYSIS_WORKERS)
+    if workers < 2:
+        yield dict(detectors)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield {name: executor.submit(detector).result for name, detector in detectors}
+
+
+def _check_geodata(results, geodata_types, content_type, family, is_extracted):
+    for geodata_type in geodata_types:
+        if results[geodata_type]():
+            return apply_geodata_type(geodata_type, content_type, family, is_extracted=is_extracted)
+    return content_type, family
+
+
+def evaluate_file_details(content_type, family, options, path, is_extracted, source=None):
+    source = source or AnalyzedFile(path)
     analyze_exc = None
-    try:
-        content_type, family = check_geodata(path, content_type, family, is_extracted=is_extracted)
-    except Exception as exc:
-        analyze_exc = Exception(
-            [{'code': 'geodata-error', 'message': 'Błąd podczas analizy pliku: {}.'.format(exc.message)}])
-    file_info = magic.from_file(path)
-    content_type = check_meteo_data(content_type, path, file_info)
+    detectors = get_geodata_detectors(path, content_type, is_extracted=is_extracted)
+    geodata_types = [name for name, _ in detectors]
+    if content_type in NETCDF_CONTENT_TYPES:
+        detectors.append(('netcdf', partial(is_valid_netcdf, path)))
+    with _run_detectors(detectors) as results:
+        try:
+            content_type, family = _check_geodata(results, geodata_types, content_type, family, is_extracted)
+        except Exception as exc:
+            analyze_exc = Exception(
+                [{'code': 'geodata-error', 'message': 'Błąd podczas analizy pliku: {}.'.format(exc.message)}])
+        file_info = source.description
+        content_type = check_meteo_data(content_type, path, file_info, is_netcdf=results.get('netcdf'))
     file_mimetype = f'{family}/{content_type}'
     logger.debug(f"  parsed mimetype: {file_mimetype});{options}")
     logger.debug(f"  file info: {file_info}")
@@ -207,8 +326,8 @@ def evaluate_file_details(content_type, family, options, path, is_extracted):
     logger.debug(f"  extension: {extension}")
 
     if _is_plain_text(family, content_type) or _is_json(family, content_type) or _is_xml(family, content_type):
-        extension, encoding = _analyze_plain_text(path, extension, encoding)
+        extension, encoding = _analyze_plain_text(source, extension, encoding)
 
     if _is_office_file(extension, content_type):
-        extension, encoding = _analyze_office_file(path, encoding, content_type, extension)
+        extension, encoding = _analyze_office_file(source, encoding, content_type, extension)
     return extension, file_info, encoding, path, file_mimetype, analyze_exc
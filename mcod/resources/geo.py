@@ -1,6 +1,7 @@
 import logging
 import os
 import string
+from functools import partial
 from io import BytesIO
 
 import ijson
@@ -17,11 +18,18 @@ from mcod.lib.jsonstat import validate as jsonstat_validate
 
 logger = logging.getLogger('mcod')
 
+# Extensions of shapefile set members used to read shapes, attributes, their encoding and projection.
+SHAPEFILE_EXTENSIONS = ('.shp', '.shx', '.dbf', '.cpg', '.prj')
+
 
 class ExtractUAddressError(Exception):
     pass
 
 
+class GeocoderError(Exception):
+    pass
+
+
 def _cut_extension(filename):
     return filename.rsplit('.', 1)
 
@@ -205,7 +213,7 @@ def median_point(geojson):
     return _coord_list_median(geojson['coordinates'], skip_last=geojson['type'].endswith('Polygon'))
 
 
-def _request_geocoder(text=None, **kwargs):
+def _request_geocoder(text=None, raise_errors=False, **kwargs):
     try:
         params = {}
         url = f"{settings.GEOCODER_URL}/v1/search"
@@ -219,12 +227,13 @@ def _request_geocoder(text=None, **kwargs):
                                 auth=HTTPBasicAuth(settings.GEOCODER_USER, settings.GEOCODER_PASS))
 
         if response.status_code != 200:
-            raise Exception()
+            raise GeocoderError(f'Geocoder responded with status code {response.status_code}')
         features = response.json().get('features')
         if features:
             return features[0].get('geometry')
     except Exception:
-        pass
+        if raise_errors:
+            raise
 
 
 def first_non_digit(s):
@@ -257,7 +266,7 @@ def clean_house_number(number):
     return number
 
 
-def geocode(*args, **kwargs):
+def geocode(*args, raise_errors=False, **kwargs):
     query = {}
     for kw in kwargs:
         if kw == 'address':
@@ -266,9 +275,10 @@ def geocode(*args, **kwargs):
             query[kw] = kwargs[kw]
     result = None
     if query:
-        result = _request_geocoder(**query)
+        result = _request_geocoder(raise_errors=raise_errors, **query)
     if not result:
-        result = _request_geocoder(' '.join(str(v) for v in args) + ' '.join(str(v) for v in kwargs.values()))
+        result = _request_geocoder(
+            ' '.join(str(v) for v in args) + ' '.join(str(v) for v in kwargs.values()), raise_errors=raise_errors)
     return result
 
 
@@ -283,16 +293,36 @@ def extract_coords_from_uaddress(uaddress):
         raise ExtractUAddressError(uaddress)
 
 
+def get_geodata_detectors(path, content_type, is_extracted=False):
+    """
+    Returns (geodata type, detector) pairs applicable to the file in order of precedence - the first detected type
+    is the type of the file. Detectors are independent of each other, so they can be run concurrently.
+    """
+    detectors = []
+    if path is not None and '.tif' in path:
+        detectors.append(('geotiff', partial(is_geotiff, path)))
+    if content_type in ('json', 'plain'):
+        detectors.append(('geojson', partial(is_geojson, path)))
+    if content_type == 'xml':
+        detectors.append(('gpx', partial(is_gpx, path, content_type)))
+        detectors.append(('kml', partial(is_kml, path, content_type, is_extracted)))
+    return detectors
+
+
+def apply_geodata_type(geodata_type, content_type, family, is_extracted=False):
+    if geodata_type == 'geotiff':
+        return content_type + ';application=geotiff', family
+    if geodata_type == 'geojson':
+        return 'geo+json', 'application'
+    if geodata_type == 'gpx':
+        return 'gpx+xml', 'application'
+    if geodata_type == 'kml':
+        return 'vnd.google-earth.kmz' if is_extracted else 'vnd.google-earth.kml+xml', 'application'
+    return content_type, family
+
+
 def check_geodata(path, content_type, family, is_extracted=False):
-    if is_geotiff(path):
-        content_type += ';application=geotiff'
-    if content_type in ('json', 'plain') and is_geojson(path):
-        family = 'application'
-        content_type = 'geo+json'
-    if is_gpx(path, content_type):
-        family = 'application'
-        content_type = 'gpx+xml'
-    if is_kml(path, content_type, is_extracted):
-        family = 'application'
-        content_type = 'vnd.google-earth.kmz' if is_extracted else 'vnd.google-earth.kml+xml'
+    for geodata_type, detector in get_geodata_detectors(path, content_type, is_extracted=is_extracted):
+        if detector():
+            return apply_geodata_type(geodata_type, content_type, family, is_extracted=is_extracted)
     return content_type, family
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+
+from mcod import settings
+from mcod.resources.geo import geocode
+
+logger = logging.getLogger('mcod')
+
+
+def normalize_address(**kwargs):
+    """Returns address as a hashable tuple, insensitive to letter case, extra whitespaces and order of arguments."""
+    return tuple(sorted(
+        (key, ' '.join(str(value).lower().split())) for key, value in kwargs.items() if value not in (None, '')
+    ))
+
+
+def get_address_key(address):
+    return hashlib.md5(json.dumps(address).encode('utf-8')).hexdigest()
+
+
+class GeocodingCacheBase:
+
+    def __init__(self, timeout=None, negative_timeout=None):
+        self.timeout = timeout or settings.GEOCODER_CACHE_TIMEOUT
+        self.negative_timeout = negative_timeout or settings.GEOCODER_CACHE_NEGATIVE_TIMEOUT
+
+    def get_timeout(self, geometry):
+        """Not found addresses are cached shorter - they may be added to the geocoder's data."""
+        return self.timeout if geometry else self.negative_timeout
+
+    def get_many(self, addresses):
+        raise NotImplementedError
+
+    def set_many(self, results):
+        raise NotImplementedError
+
+
+class RedisGeocodingCache(GeocodingCacheBase):
+    """
+    Geocoding results stored in Redis with expiration time.
+    Eviction of least recently used entries is handled by Redis (maxmemory-policy) when memory limit is reached.
+    """
+    key_prefix = 'geocoding'
+
+    def __init__(self, timeout=None, negative_timeout=None, alias='default'):
+        super().__init__(timeout=timeout, negative_timeout=negative_timeout)
+        self._cache = caches[alias]
+
+    def _key(self, address):
+        return f'{self.key_prefix}:{get_address_key(address)}'
+
+    def get_many(self, addresses):
+        keys = {self._key(address): address for address in addresses}
+        return {keys[key]: value['geometry'] for key, value in self._cache.get_many(list(keys)).items()}
+
+    def set_many(self, results):
+        found = {address: geometry for address, geometry in results.items() if geometry}
+        not_found = {address: geometry for address, geometry in results.items() if not geometry}
+        for items in (found, not_found):
+            if items:
+                self._cache.set_many(
+                    {self._key(address): {'geometry': geometry} for address, geometry in items.items()},
+                    timeout=self.get_timeout(next(iter(items.values()))))
+
+
+class SQLiteGeocodingCache(GeocodingCacheBase):
+    """
+    Geocoding results stored in local SQLite database with expiration time.
+    When the number of entries exceeds `max_entries`, the least recently used ones are removed.
+    """
+    batch_size = 500
+
+    def __init__(self, path=None, timeout=None, negative_timeout=None, max_entries=None):
+        super().__init__(timeout=timeout, negative_timeout=negative_timeout)
+        self.path = path or settings.GEOCODER_CACHE_SQLITE_PATH
+        self.max_entries = max_entries or settings.GEOCODER_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._con = sqlite3.connect(self.path, check_same_thread=False)
+        with self._con:
+            self._con.execute(
+                'CREATE TABLE IF NOT EXISTS geocoding '
+                '(key TEXT PRIMARY KEY, geometry TEXT, expires_at REAL, used_at REAL)')
+            self._con.execute('CREATE INDEX IF NOT EXISTS geocoding_used_at ON geocoding (used_at)')
+
+    def get_many(self, addresses):
+        keys = {get_address_key(address): address for address in addresses}
+        key_list = list(keys)
+        result = {}
+        now = time.time()
+        with self._lock, self._con:
+            for i in range(0, len(key_list), self.batch_size):
+                batch = key_list[i:i + self.batch_size]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._con.execute(
+                    f'SELECT key, geometry FROM geocoding WHERE key IN ({placeholders}) AND expires_at > ?',
+                    (*batch, now)).fetchall()
+                for key, geometry in rows:
+                    result[keys[key]] = json.loads(geometry)
+                self._con.execute(
+                    f'UPDATE geocoding SET used_at = ? WHERE key IN ({placeholders})', (now, *batch))
+        return result
+
+    def set_many(self, results):
+        now = time.time()
+        rows = [
+            (get_address_key(address), json.dumps(geometry), now + self.get_timeout(geometry), now)
+            for address, geometry in results.items()
+        ]
+        with self._lock, self._con:
+            self._con.executemany('INSERT OR REPLACE INTO geocoding VALUES (?, ?, ?, ?)', rows)
+            self._con.execute('DELETE FROM geocoding WHERE expires_at <= ?', (now,))
+            count = self._con.execute('SELECT COUNT(*) FROM geocoding').fetchone()[0]
+            if count > self.max_entries:
+                self._con.execute(
+                    'DELETE FROM geocoding WHERE key IN (SELECT key FROM geocoding ORDER BY used_at LIMIT ?)',
+                    (count - self.max_entries,))
+
+
+def get_geocoding_cache():
+    if settings.GEOCODER_CACHE_BACKEND == 'sqlite':
+        return SQLiteGeocodingCache()
+    return RedisGeocodingCache()
+
+
+class CachedGeocoder:
+    """
+    Geocoder using the persistent cache of results (negative results are cached too).
+    Addresses of a block of rows should be passed to `prefetch` first - they are deduplicated,
+    looked up in the cache and the misses are resolved concurrently by the bounded pool of workers.
+    Addresses which couldn't be geocoded because of geocoder's errors are not cached.
+    """
+
+    def __init__(self, cache=None, max_workers=None, local_cache_size=None):
+        self.cache = cache or get_geocoding_cache()
+        self.max_workers = max_workers or settings.GEOCODER_MAX_WORKERS
+        self.local_cache_size = local_cache_size or settings.GEOCODER_LOCAL_CACHE_SIZE
+        self._resolved = OrderedDict()
+        self._executor = None
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _remember(self, results):
+        for address, geometry in results.items():
+            self._resolved[address] = geometry
+            self._resolved.move_to_end(address)
+        while len(self._resolved) > self.local_cache_size:
+            self._resolved.popitem(last=False)
+
+    def _request(self, kwargs):
+        """Returns (geometry, True) or (None, False) if the request failed."""
+        try:
+            return geocode(raise_errors=True, **kwargs), True
+        except Exception as exc:
+            logger.debug(f'Exception during geocoding of {kwargs}: {exc}')
+            with self._stats_lock:
+                self.stats['errors'] += 1
+            return None, False
+
+    def prefetch(self, queries):
+        queries = OrderedDict((normalize_address(**kwargs), kwargs) for kwargs in queries if kwargs)
+        missing = [address for address in queries if address not in self._resolved]
+        self.stats['hits'] += len(queries) - len(missing)
+        if not missing:
+            return
+        cached = self.cache.get_many(missing)
+        self.stats['hits'] += len(cached)
+        self._remember(cached)
+        to_resolve = [address for address in missing if address not in cached]
+        if not to_resolve:
+            return
+        self.stats['misses'] += len(to_resolve)
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        responses = dict(zip(to_resolve, self._executor.map(lambda x: self._request(queries[x]), to_resolve)))
+        results = {address: geometry for address, (geometry, _) in responses.items()}
+        resolved = {address: geometry for address, (geometry, succeeded) in responses.items() if succeeded}
+        if resolved:
+            self.cache.set_many(resolved)
+        self._remember(results)
+
+    def geocode(self, **kwargs):
+        address = normalize_address(**kwargs)
+        if address not in self._resolved:
+            self.prefetch([kwargs])
+            return self._resolved.get(address)
+        return self._resolved[address]
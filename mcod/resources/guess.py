@@ -28,7 +28,15 @@ def is_octetstream(content_type):
     return content_type in GUESS_FROM_BUFFER
 
 
-def file_encoding(path):
+def _iter_lines(path, prefix=b''):
+    yield from io.BytesIO(prefix)
+    with open(path, 'rb') as f:
+        f.seek(len(prefix))
+        yield from f
+
+
+def file_encoding(path, prefix=b''):
+    """`prefix` - already read beginning of the file, the rest of the file is read only if it's needed."""
     iso_unique = (b'\xb1', b'\xac', b'\xbc', b'\xa1', b'\xb6', b'\xa6')
     cp_unique = (b'\xb9', b'\xa5', b'\x9f', b'\x8f', b'\x8c', b'\x9c')
 
@@ -37,16 +45,15 @@ def file_encoding(path):
 
     _detector = cchardet.UniversalDetector()
 
-    with open(path, 'rb') as f:
-        for line in f:
-            for c in iso_unique:
-                iso_counter += line.count(c)
-            for c in cp_unique:
-                cp_counter += line.count(c)
-
-            _detector.feed(line)
-            if _detector.done:
-                break
+    for line in _iter_lines(path, prefix=prefix):
+        for c in iso_unique:
+            iso_counter += line.count(c)
+        for c in cp_unique:
+            cp_counter += line.count(c)
+
+        _detector.feed(line)
+        if _detector.done:
+            break
     _detector.close()
 
     backup_encoding = 'utf-8'
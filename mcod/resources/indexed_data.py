@@ -1,15 +1,24 @@
+import hashlib
+import json
+import logging
 import os
+import threading
+import time as time_module
 import uuid
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, time
+from itertools import islice
 
 import shapefile
 from constance import config as constance_config
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django_elasticsearch_dsl import Index
 from elasticsearch import exceptions as es_exceptions
 from elasticsearch.helpers import bulk
+from elasticsearch.helpers.errors import BulkIndexError
 from elasticsearch_dsl import Document, field as dsl_field
 from elasticsearch_dsl.connections import Connections
 from goodtables import validate as validate_table
@@ -19,7 +28,9 @@ from mcod import settings
 from mcod.core.api import fields as api_fields
 from mcod.core.api.search.analyzers import polish_analyzer
 from mcod.resources.archives import ArchiveReader
+from mcod.resources.geocoding import CachedGeocoder
 from mcod.resources.geo import (
+    SHAPEFILE_EXTENSIONS,
     ShapeTransformer,
     clean_house_number,
     extract_coords_from_uaddress,
@@ -27,11 +38,13 @@ from mcod.resources.geo import (
     median_point,
 )
 from mcod.resources.goodtables_checks import ZERO_DATA_ROWS
-from mcod.resources.type_guess import Table
+from mcod.resources.type_guess import Table, infer_table_schema
 
 es_connections = Connections()
 es_connections.configure(**settings.ELASTICSEARCH_DSL)
 
+logger = logging.getLogger('mcod')
+
 
 class FileEncodingValidationError(Exception):
     pass
@@ -49,6 +62,137 @@ def get_float_or_none(value):
     return val
 
 
+class IndexingCheckpoint:
+    """
+    Stores number of the last row acknowledged by Elasticsearch during indexing of resource's data
+    together with the name of the physical index (generation) being built.
+    Checkpoint is valid only for the same source (signature), so changed file always starts from the beginning.
+    """
+    key_prefix = 'indexed_data_checkpoint'
+
+    def __init__(self, idx_name, signature):
+        self.key = f'{self.key_prefix}:{idx_name}'
+        self.signature = signature
+
+    @property
+    def _cache(self):
+        return caches['default']
+
+    def _load(self):
+        data = self._cache.get(self.key) or {}
+        return data if data.get('signature') == self.signature else {}
+
+    @property
+    def row_no(self):
+        return self._load().get('row_no', 0)
+
+    @property
+    def index_name(self):
+        return self._load().get('index')
+
+    def save(self, row_no, index_name=None):
+        self._cache.set(
+            self.key, {'row_no': row_no, 'index': index_name, 'signature': self.signature},
+            timeout=settings.RESOURCE_DATA_INDEXING_CHECKPOINT_TIMEOUT)
+
+    def clear(self):
+        self._cache.delete(self.key)
+
+
+class IndexMetadataCache:
+    """
+    Metadata of resources' data indices (existence, headers, sort map and types of api fields),
+    so the API doesn't have to ask Elasticsearch for it on every request.
+    Entries are stored in Redis and, for a short time, in memory of the process.
+    Entry is valid only for the same source (signature) - changed file or schema results in a cache miss.
+    """
+    key_prefix = 'indexed_data_metadata'
+
+    def __init__(self, timeout=None, local_timeout=None, local_size=None):
+        self.timeout = timeout or settings.RESOURCE_DATA_METADATA_CACHE_TIMEOUT
+        self.local_timeout = local_timeout or settings.RESOURCE_DATA_METADATA_LOCAL_CACHE_TIMEOUT
+        self.local_size = local_size or settings.RESOURCE_DATA_METADATA_LOCAL_CACHE_SIZE
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def _cache(self):
+        return caches['default']
+
+    def _key(self, idx_name):
+        return f'{self.key_prefix}:{idx_name}'
+
+    def _remember(self, idx_name, metadata):
+        with self._lock:
+            self._local[idx_name] = (time_module.monotonic() + self.local_timeout, metadata)
+            self._local.move_to_end(idx_name)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _get_local(self, idx_name):
+        with self._lock:
+            expires_at, metadata = self._local.get(idx_name, (0, None))
+        return metadata if expires_at > time_module.monotonic() else None
+
+    def get(self, idx_name, signature):
+        metadata = self._get_local(idx_name)
+        if metadata is None:
+            metadata = self._cache.get(self._key(idx_name))
+            if metadata is not None:
+                self._remember(idx_name, metadata)
+        if metadata is not None and metadata.get('signature') == signature:
+            return metadata
+
+    def set(self, idx_name, metadata):
+        self._cache.set(self._key(idx_name), metadata, timeout=self.timeout)
+        self._remember(idx_name, metadata)
+
+    def delete(self, idx_name):
+        self._cache.delete(self._key(idx_name))
+        with self._lock:
+            self._local.pop(idx_name, None)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+index_metadata_cache = IndexMetadataCache()
+
+
+class BulkLoad:
+    """
+    Collects results of chunks sent to Elasticsearch (in order of sending).
+    Checkpoint is advanced as long as all chunks collected so far were acknowledged without errors.
+    """
+
+    def __init__(self, index_name, checkpoint):
+        self.index_name = index_name
+        self.checkpoint = checkpoint
+        self.success = 0
+        self.failed_chunks = 0
+        self.errors = []
+        self.exceptions = []
+        self.acknowledged = True
+
+    def collect(self, future, last_row_no):
+        try:
+            success, errors = future.result()
+        except Exception as exc:
+            logger.error(f'Chunk of {self.index_name} ending at row {last_row_no} failed: {exc}')
+            self.exceptions.append(exc)
+            self.failed_chunks += 1
+            self.acknowledged = False
+            return
+        self.success += success
+        if errors:
+            self.errors.extend(errors)
+            self.failed_chunks += 1
+            self.acknowledged = False
+        if self.acknowledged:
+            self.checkpoint.save(last_row_no, self.index_name)
+
+
 class IndexedData:
     _type = None
 
@@ -64,6 +208,9 @@ class IndexedData:
         self._doc_cache = None
         self._reversed_headers_map_cache = None
         self._headers_map_cache = None
+        self._metadata_cache = None
+        self.indexing_stats = {}
+        self.geocoding_stats = None
 
     @property
     def data_schema(self):
@@ -79,10 +226,70 @@ class IndexedData:
 
     @property
     def available(self):
-        if not self.idx.exists():
+        if not self.metadata['exists']:
             return False
         return self.resource.data_is_valid
 
+    @property
+    def metadata_signature(self):
+        file_name = getattr(self.resource.main_file, 'name', '')
+        schema = json.dumps(self.resource.tabular_data_schema, sort_keys=True, default=str)
+        return hashlib.md5(f'{file_name}|{schema}'.encode('utf-8')).hexdigest()
+
+    @property
+    def metadata(self):
+        """
+        Metadata of the index: `exists`, `headers` and (when already computed) `api_fields` and `sort_map`.
+        Taken from the cache shared by processes, Elasticsearch is asked only on a cache miss.
+        """
+        if self._metadata_cache is None:
+            signature = self.metadata_signature
+            metadata = index_metadata_cache.get(self.idx_name, signature)
+            if metadata is None:
+                metadata = self._fetch_metadata(signature)
+                if metadata['exists']:  # missing index is not cached, it's created by indexing anytime.
+                    index_metadata_cache.set(self.idx_name, metadata)
+            self._metadata_cache = metadata
+        return self._metadata_cache
+
+    def _fetch_metadata(self, signature):
+        metadata = {'signature': signature, 'exists': self.idx.exists(), 'headers': None}
+        if metadata['exists']:
+            try:
+                mapping = next(iter(self.idx.get_mapping().values()))
+                metadata['headers'] = mapping['mappings']['doc']['_meta']['headers']
+            except (es_exceptions.NotFoundError, KeyError, StopIteration):
+                pass
+        return metadata
+
+    def _update_metadata(self, **kwargs):
+        self._metadata_cache = {**self.metadata, **kwargs}
+        if self._metadata_cache['exists']:
+            index_metadata_cache.set(self.idx_name, self._metadata_cache)
+
+    def refresh_metadata(self):
+        """Reads metadata of the index from Elasticsearch and stores it (with api fields and sort map) in the cache."""
+        self._metadata_cache = self._fetch_metadata(self.metadata_signature)
+        self._reversed_headers_map_cache = None
+        self._headers_map_cache = None
+        if self._metadata_cache['exists']:
+            index_metadata_cache.set(self.idx_name, self._metadata_cache)
+            self.get_sort_map()
+        else:
+            index_metadata_cache.delete(self.idx_name)
+        return self._metadata_cache
+
+    def _store_indexed_metadata(self, doc):
+        self._metadata_cache = {
+            'signature': self.metadata_signature,
+            'exists': True,
+            'headers': doc._doc_type.mapping._meta['_meta']['headers'],
+        }
+        self._reversed_headers_map_cache = None
+        self._headers_map_cache = None
+        index_metadata_cache.set(self.idx_name, self._metadata_cache)
+        self.get_sort_map()
+
     def prepare_doc(self):
         raise NotImplementedError
 
@@ -92,10 +299,31 @@ class IndexedData:
             self._doc_cache = self.prepare_doc()
         return self._doc_cache
 
-    def get_api_fields(self):
+    def _get_api_fields(self):
         raise NotImplementedError
 
+    def get_api_fields(self):
+        cached = self.metadata.get('api_fields')
+        if cached is None:
+            _fields = self._get_api_fields()
+            self._update_metadata(api_fields={
+                name: [type(field).__name__, field.metadata.get('description')] for name, field in _fields.items()
+            })
+            return _fields
+        return {
+            name: getattr(api_fields, cls_name)(
+                is_tabular_data_field=True, **({'description': description} if description else {}))
+            for name, (cls_name, description) in cached.items()
+        }
+
     def get_sort_map(self):
+        cached = self.metadata.get('sort_map')
+        if cached is None:
+            cached = self._get_sort_map()
+            self._update_metadata(sort_map=cached)
+        return dict(cached)
+
+    def _get_sort_map(self):
         sort_map = {}
         for k, v in self.get_api_fields().items():
             f = f'{k}.val'
@@ -130,10 +358,7 @@ class IndexedData:
     @property
     def reversed_headers_map(self):
         if not self._reversed_headers_map_cache:
-            try:
-                headers = self.idx.get_mapping()[self.idx_name]['mappings']['doc']['_meta']['headers']
-            except (es_exceptions.NotFoundError, KeyError):
-                headers = self.doc._doc_type.mapping._meta['_meta']['headers']
+            headers = self.metadata.get('headers') or self.doc._doc_type.mapping._meta['_meta']['headers']
             headers = {item: key for key, item in headers.items()}
             self._reversed_headers_map_cache = OrderedDict(
                 sorted(headers.items(), key=lambda x: int(x[1].strip('col').strip('_origin'))))
@@ -162,32 +387,179 @@ class IndexedData:
     def schema(self):
         return self.doc.search()
 
-    def _docs_iter(self, doc):
+    def _docs_iter(self, doc, start_row=0):
         raise NotImplementedError
 
-    def index(self, force=False, chunk_size=500):
-        doc = self.doc
-        if force:
-            self.idx.delete(ignore_unavailable=True)
+    @property
+    def archive_member(self):
+        """Name of the indexed member of the archived main file or None."""
+        return None
 
-        self.idx.settings(**settings.ELASTICSEARCH_DSL_INDEX_SETTINGS)
-        self.idx.mapping(doc._doc_type.mapping)
-        if not self.idx.exists():
-            self.idx.create()
+    @property
+    def checkpoint_signature(self):
+        """
+        Checkpoint is valid only for the same main file (path, size, modification time), member and schema.
+        Members of archives are extracted into a different temporary directory in each process,
+        so the archive itself and the name of the member are used instead of the path of the extracted file.
+        """
+        path = self.resource.main_file.path
+        stat = os.stat(path)
+        return f'{path}:{stat.st_size}:{stat.st_mtime}:{self.archive_member}:{self.resource.tabular_data_schema}'
 
-        es = es_connections.get_connection()
+    @property
+    def checkpoint(self):
+        return IndexingCheckpoint(self.idx_name, self.checkpoint_signature)
 
-        success, failed = bulk(es,
-                               (d.to_dict(True) for d in self._docs_iter(doc)),
-                               index=self.idx_name,
-                               doc_type=doc._doc_type.name,
-                               chunk_size=chunk_size,
-                               stats_only=True)
+    def _chunks_iter(self, doc, chunk_size, start_row=0):
+        docs = self._docs_iter(doc, start_row=start_row)
+        while True:
+            chunk = list(islice(docs, chunk_size))
+            if not chunk:
+                break
+            yield chunk[-1].row_no, [self._to_action(d) for d in chunk]
 
-        if success:
-            self.idx.flush()
+    @staticmethod
+    def _to_action(d):
+        action = d.to_dict(True)
+        action.pop('_index', None)  # documents are loaded into the generation passed to bulk, not into the alias.
+        return action
+
+    def _send_chunk(self, es, doc, index_name, actions):
+        return bulk(es, actions,
+                    index=index_name,
+                    doc_type=doc._doc_type.name,
+                    chunk_size=len(actions),
+                    raise_on_error=False)
 
-        return success, failed
+    @staticmethod
+    def _get_generation_no(index_name):
+        return int(index_name.rsplit('-v', 1)[1])
+
+    def get_generations(self, es):
+        """
+        Returns physical indices (generations) of resource's data, ordered from the oldest.
+        Index named `idx_name` itself is an alias pointing to the current generation.
+        """
+        indices = es.indices.get(f'{self.idx_name}-v*', ignore_unavailable=True, allow_no_indices=True)
+        return sorted(indices.keys(), key=self._get_generation_no)
+
+    def get_current_generation(self, es):
+        if not es.indices.exists_alias(name=self.idx_name):
+            return None
+        return next(iter(es.indices.get_alias(name=self.idx_name)), None)
+
+    def _create_generation(self, es, doc):
+        generations = self.get_generations(es)
+        generation_no = self._get_generation_no(generations[-1]) + 1 if generations else 1
+        index_name = f'{self.idx_name}-v{generation_no}'
+        idx = Index(index_name)
+        idx.settings(**{**settings.ELASTICSEARCH_DSL_INDEX_SETTINGS, **settings.RESOURCE_DATA_BUILD_INDEX_SETTINGS})
+        idx.mapping(doc._doc_type.mapping)
+        idx.create()
+        return index_name
+
+    def _switch_generation(self, es, index_name):
+        """
+        Restores settings relaxed for the time of the bulk load and atomically points the alias to the new generation.
+        Concrete index named as the alias (created before the introduction of generations) is removed in the same step.
+        """
+        es.indices.put_settings(index=index_name, body={'index': {
+            'refresh_interval': None,
+            'number_of_replicas': settings.ELASTICSEARCH_DSL_INDEX_SETTINGS.get('number_of_replicas', 1),
+        }})
+        es.indices.refresh(index=index_name)
+        actions = [{'add': {'index': index_name, 'alias': self.idx_name}}]
+        if es.indices.exists_alias(name=self.idx_name):
+            actions.insert(0, {'remove': {'index': f'{self.idx_name}-v*', 'alias': self.idx_name}})
+        elif es.indices.exists(index=self.idx_name):
+            actions.insert(0, {'remove_index': {'index': self.idx_name}})
+        es.indices.update_aliases(body={'actions': actions})
+
+    def _delete_old_generations(self, es, current):
+        generations = [x for x in self.get_generations(es) if x != current]
+        keep = settings.RESOURCE_DATA_INDEX_GENERATIONS_TO_KEEP
+        to_delete = generations[:-keep] if keep else generations
+        if to_delete:
+            es.indices.delete(index=','.join(to_delete), ignore_unavailable=True)
+
+    def _get_target_index(self, es, doc, force, checkpoint, resume):
+        """
+        Returns tuple: (name of the index to load data into, row number to start from, is it a new generation).
+        Forced indexing always builds a new generation - readers use the current one until the alias is switched.
+        """
+        if resume and checkpoint.row_no and checkpoint.index_name and es.indices.exists(index=checkpoint.index_name):
+            return checkpoint.index_name, checkpoint.row_no, True
+        current = self.get_current_generation(es)
+        if current and not force:
+            return current, 0, False
+        return self._create_generation(es, doc), 0, True
+
+    def index(self, force=False, chunk_size=None, thread_count=None, resume=False):
+        """
+        Indexes resource's data in chunks sent to Elasticsearch by the bounded pool of parallel bulk senders.
+
+        Data is loaded into a new physical index (generation) with relaxed refresh and replica settings,
+        which becomes visible for readers through `idx_name` alias only after all rows were loaded without errors.
+        Number of the last row of the contiguous sequence of acknowledged chunks is stored as a checkpoint,
+        so with `resume=True` interrupted indexing of the same file continues from that row.
+        Indexing statistics are available in `indexing_stats` attribute afterwards.
+        """
+        chunk_size = chunk_size or settings.RESOURCE_DATA_INDEXING_CHUNK_SIZE
+        thread_count = thread_count or settings.RESOURCE_DATA_INDEXING_THREAD_COUNT
+        doc = self.doc
+        es = es_connections.get_connection()
+        checkpoint = self.checkpoint
+        index_name, start_row, is_new_generation = self._get_target_index(es, doc, force, checkpoint, resume)
+        if start_row:
+            logger.info(f'Indexing of {index_name} resumed from row {start_row}.')
+
+        started_at = time_module.monotonic()
+        load = self._bulk_load(es, doc, index_name, checkpoint, chunk_size, thread_count, start_row)
+
+        if not load.exceptions and not load.errors:
+            checkpoint.clear()
+            if is_new_generation:
+                self._switch_generation(es, index_name)
+                self._delete_old_generations(es, index_name)
+            elif load.success:
+                es.indices.flush(index=index_name)
+            self._store_indexed_metadata(doc)
+        elif is_new_generation and not load.exceptions:
+            # documents rejected by Elasticsearch would be rejected again on resume - readers keep the current
+            # generation and the incomplete one is dropped. Interrupted load (exceptions) is kept for resume.
+            es.indices.delete(index=index_name, ignore_unavailable=True)
+
+        duration = time_module.monotonic() - started_at
+        self.indexing_stats = {
+            'index': index_name,
+            'indexed': load.success,
+            'failed': len(load.errors),
+            'failed_chunks': load.failed_chunks,
+            'resumed_from_row': start_row,
+            'duration': round(duration, 3),
+            'rows_per_sec': round(load.success / duration, 2) if duration else 0,
+        }
+        if self.geocoding_stats is not None:
+            self.indexing_stats['geocoding'] = dict(self.geocoding_stats)
+        if load.exceptions:
+            raise load.exceptions[0]
+        if load.errors:
+            raise BulkIndexError('%i document(s) failed to index.' % len(load.errors), load.errors)
+        return load.success, len(load.errors)
+
+    def _bulk_load(self, es, doc, index_name, checkpoint, chunk_size, thread_count, start_row):
+        load = BulkLoad(index_name, checkpoint)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=thread_count) as executor:
+            try:
+                for last_row_no, actions in self._chunks_iter(doc, chunk_size, start_row=start_row):
+                    pending.append((executor.submit(self._send_chunk, es, doc, index_name, actions), last_row_no))
+                    if len(pending) >= thread_count * 2:
+                        load.collect(*pending.popleft())
+            finally:
+                while pending:
+                    load.collect(*pending.popleft())
+        return load
 
     @property
     def has_geo_data(self):
@@ -266,10 +638,11 @@ class ShpData(IndexedData):
     @property
     def source(self):
         if not self._source:
-            with ArchiveReader(self.resource.main_file.path) as extracted:
-                shp_path = next(iter(f for f in extracted if f.endswith('.shp')))
+            with ArchiveReader.cached(self.resource.main_file.path) as extracted:
+                files = extracted.extract_with_extensions(*SHAPEFILE_EXTENSIONS)
+                shp_path = next(iter(f for f in files if f.endswith('.shp')))
                 self._source = shapefile.Reader(shp_path)
-                self._transformer = ShapeTransformer(extracted)
+                self._transformer = ShapeTransformer(files)
         return self._source
 
     def get_schema(self, **kwargs):
@@ -324,7 +697,7 @@ class ShpData(IndexedData):
         doc._doc_type.mapping._meta['_meta'] = {'headers': _map}
         return doc
 
-    def get_api_fields(self):
+    def _get_api_fields(self):
         record_fields = {}
         for f in self.schema:
             field_name = self.reversed_headers_map[f.name]
@@ -336,8 +709,10 @@ class ShpData(IndexedData):
     def _get_row_id(row):
         return str(uuid.uuid5(uuid.NAMESPACE_DNS, '+|+'.join(str(i)[:10000] for i in row)))
 
-    def _docs_iter(self, doc):
+    def _docs_iter(self, doc, start_row=0):
         for row_no, sr in enumerate(self.source.shapeRecords(), 1):
+            if row_no <= start_row:
+                continue
             geojson = self._transformer.transform(sr.shape)
             v = {
                 'shape': geojson,
@@ -380,6 +755,32 @@ def prepare_item(item, col_type=None, special_signs=None):
     return {'repr': item, 'val': None if special_signs and repr_item in special_signs else item}
 
 
+def _prepare_column_values(values, special_signs):
+    repr_values = [str(item) if isinstance(item, (int, float)) else item for item in values]
+    try:
+        return [
+            {'repr': item, 'val': None if repr_item in special_signs else item}
+            for item, repr_item in zip(values, repr_values)
+        ]
+    except TypeError:  # unhashable value, fallback to the check item by item.
+        return [prepare_item(item, special_signs=list(special_signs)) for item in values]
+
+
+def prepare_column(values, col_type=None, special_signs=frozenset()):
+    """
+    Column-wise counterpart of `prepare_item`, used to prepare a block of rows at once.
+    The conversion specific for column's type is resolved once for all values.
+    """
+    if col_type == 'date':
+        values = [item.strftime('%Y-%m-%d') if isinstance(item, datetime) else item for item in values]
+    elif col_type == 'time':
+        values = [item.strftime('%H:%M:%S') if isinstance(item, time) else item for item in values]
+    values = [None if item == '' else item for item in values]
+    if not special_signs:
+        return [{'repr': item, 'val': item} for item in values]
+    return _prepare_column_values(values, special_signs)
+
+
 class CustomObject(dsl_field.Object):
 
     def _serialize(self, data):
@@ -524,7 +925,7 @@ class TabularData(IndexedData):
         doc._doc_type.mapping._meta['_meta'] = {'headers': _map}
         return doc
 
-    def get_api_fields(self):
+    def _get_api_fields(self):
         _fields = {}
         for _f in self.schema['fields']:
             field_name = self.reversed_headers_map[_f['name']]
@@ -571,12 +972,16 @@ class TabularData(IndexedData):
         if not self.resource.has_tabular_format():
             raise ValidationError(_('Invalid file type'))
 
-        _table = Table(self.resource.file_data_path,
-                       ignore_blank_headers=True,
-                       format=self.resource_format,
-                       encoding=self.resource_encoding or 'utf-8',
-                       skip_rows={'type': 'preset', 'value': 'blank'})
-        _schema = _table.infer(limit=5000, missing_values=self.missing_values)
+        _schema = infer_table_schema(
+            self.resource.file_data_path,
+            self.missing_values,
+            sample_size=settings.TYPE_INFERENCE_SAMPLE_SIZE,
+            max_rows=settings.TYPE_INFERENCE_MAX_ROWS,
+            ignore_blank_headers=True,
+            format=self.resource_format,
+            encoding=self.resource_encoding or 'utf-8',
+            skip_rows={'type': 'preset', 'value': 'blank'},
+        )
         [x.update({'type': 'string'}) for x in _schema['fields'] if x['type'] in ['geopoint', 'missing']]
 
         return _schema
@@ -633,7 +1038,7 @@ class TabularData(IndexedData):
         return self._table_cache
 
     @staticmethod
-    def _get_point(row, gd):
+    def _get_point(row, gd, geocoder=None):
         def get_col(col):
             return row[gd[col]['col_name']] or ""
 
@@ -645,23 +1050,42 @@ class TabularData(IndexedData):
         elif 'uaddress' in gd:
             point = extract_coords_from_uaddress(get_col('uaddress'))
         elif all(co in gd for co in ('place', 'postal_code')):
-            kwargs = dict(
-                postalcode=get_col('postal_code'),
-                locality=get_col('place')
-            )
-            if 'street' in gd:
-                kwargs['address'] = get_col('street')
-                if 'house_number' in gd:
-                    kwargs['address'] += f" {clean_house_number(get_col('house_number'))}"
-            point = geocode(**kwargs)
+            kwargs = TabularData._get_geocoding_kwargs(row, gd)
+            point = geocoder.geocode(**kwargs) if geocoder else geocode(**kwargs)
             if point:
                 point = point['coordinates']
         return point
 
-    def _docs_iter(self, doc):
+    @staticmethod
+    def _requires_geocoding(gd):
+        return not all(co in gd for co in ('l', 'b')) and 'uaddress' not in gd and \
+            all(co in gd for co in ('place', 'postal_code'))
+
+    @staticmethod
+    def _get_geocoding_kwargs(row, gd):
+        def get_col(col):
+            return row[gd[col]['col_name']] or ""
 
-        for row_no, row in enumerate(self.table.iter(keyed=True, cast=False)):
-            if not row:
+        kwargs = dict(
+            postalcode=get_col('postal_code'),
+            locality=get_col('place')
+        )
+        if 'street' in gd:
+            kwargs['address'] = get_col('street')
+            if 'house_number' in gd:
+                kwargs['address'] += f" {clean_house_number(get_col('house_number'))}"
+        return kwargs
+
+    @property
+    def archive_member(self):
+        path = self.resource.file_data_path
+        if path == self.resource.main_file.path:
+            return None
+        return ArchiveReader.cached(self.resource.main_file.path).get_member_name(path)
+
+    def _rows_iter(self, start_row=0):
+        for row_no, row in enumerate(self.table.iter(keyed=True, cast=False), 1):
+            if not row or row_no <= start_row:
                 continue
 
             if isinstance(row, (list, tuple)):
@@ -669,6 +1093,25 @@ class TabularData(IndexedData):
             if isinstance(row, dict) and all(x is None for x in row.values()):
                 # do not generate document for empty row.
                 continue
+            yield row_no, row
+
+    def _get_geo_fields(self, row, gd, geocoder=None):
+        point = self._get_point(row, gd, geocoder=geocoder)
+        if point is None:
+            return {}
+        return {
+            'shape': {
+                'type': 'Point',
+                'coordinates': point
+            },
+            'point': point,
+            'label': row[gd['label']['col_name']],
+            'shape_type': 1,
+        }
+
+    def _docs_iter(self, doc, start_row=0):
+
+        for row_no, row in self._rows_iter(start_row=start_row):
             r = dict()
 
             for i, item_ in enumerate(row.items()):
@@ -680,7 +1123,7 @@ class TabularData(IndexedData):
             row_id = self._get_row_id(r)
             r.update({
                 'updated_at': datetime.now(),
-                'row_no': row_no + 1,
+                'row_no': row_no,
                 'resource': {
                     'id': self.resource.id,
                     'title': self.resource.title
@@ -690,17 +1133,68 @@ class TabularData(IndexedData):
             if self.schema:
                 gd = self.schema.get('geo', {})
                 if gd:
-                    point = self._get_point(row, gd)
-                    if point is not None:
-                        r.update({
-                            'shape': {
-                                'type': 'Point',
-                                'coordinates': point
-                            },
-                            'point': point,
-                            'label': row[gd['label']['col_name']],
-                            'shape_type': 1,
-                        })
+                    r.update(self._get_geo_fields(row, gd))
             d = doc(**r)
             d.meta.id = row_id
             yield d
+
+    def _get_columns_plan(self, keys):
+        """
+        Returns (row's key, column's name in the index, column's type) for each column of the table.
+        Computed once per indexing instead of for each cell.
+        """
+        fields = self.schema['fields']
+        headers = self.reversed_headers_map
+        return [(key, headers.get(key, key), fields[i].get('type')) for i, key in enumerate(keys)]
+
+    def _prepare_block(self, block, plan, special_signs, gd=None, geocoder=None):
+        """
+        Converts block of (row_no, row) pairs into bulk actions column by column,
+        without instantiating a Document for each row.
+        Addresses of the block are geocoded in batch if geocoder is passed.
+        """
+        rows = [row for _, row in block]
+        if geocoder:
+            geocoder.prefetch([self._get_geocoding_kwargs(row, gd) for row in rows])
+        names = [name for _, name, _ in plan]
+        columns = [
+            prepare_column([row.get(key) for row in rows], col_type, special_signs=special_signs)
+            for key, _, col_type in plan
+        ]
+        updated_at = datetime.now()
+        resource = {
+            'id': self.resource.id,
+            'title': self.resource.title
+        }
+        actions = []
+        for (row_no, row), values in zip(block, zip(*columns)):
+            r = dict(zip(names, values))
+            row_id = self._get_row_id(r)
+            r.update({
+                'updated_at': updated_at,
+                'row_no': row_no,
+                'resource': resource,
+            })
+            if gd:
+                r.update(self._get_geo_fields(row, gd, geocoder=geocoder))
+            actions.append({'_id': row_id, '_source': r})
+        return actions
+
+    def _chunks_iter(self, doc, chunk_size, start_row=0):
+        special_signs = frozenset(self.missing_values)
+        gd = self.schema.get('geo', {}) if self.schema else {}
+        plan = None
+        geocoder = CachedGeocoder() if gd and self._requires_geocoding(gd) else None
+        self.geocoding_stats = geocoder.stats if geocoder else None
+        rows = self._rows_iter(start_row=start_row)
+        try:
+            while True:
+                block = list(islice(rows, chunk_size))
+                if not block:
+                    break
+                if plan is None:
+                    plan = self._get_columns_plan(block[0][1].keys())
+                yield block[-1][0], self._prepare_block(block, plan, special_signs, gd=gd, geocoder=geocoder)
+        finally:
+            if geocoder:
+                geocoder.close()
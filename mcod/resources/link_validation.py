@@ -1,6 +1,9 @@
 import logging
 import os
 import re
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from mimetypes import MimeTypes
 from urllib import parse
@@ -10,6 +13,7 @@ from django.core.exceptions import ValidationError
 from django.core.validators import URLValidator
 from fake_useragent import UserAgent
 from mimeparse import MimeTypeParseException, parse_mime_type
+from urllib3.exceptions import NewConnectionError
 
 from mcod import settings
 from mcod.resources import guess
@@ -204,7 +208,7 @@ def check_link_scheme(link):
     return returns_https, change_required
 
 
-def check_link_status(url, resource_type):
+def check_link_status(url, resource_type, session=session):
     logger.debug(f"check_link_status({url})")
     try:
         URLValidator()(url)
@@ -232,3 +236,97 @@ def check_link_status(url, resource_type):
     if resource_type not in ['file', 'api'] and response.history and\
             all((response.history[-1].status_code == 301, simplified_url(response.url) != simplified_url(url))):
         raise InvalidResponseCode('Resource location has been moved!')
+
+
+class LinkChecker:
+    """
+    Checks links of many resources concurrently with `check_link_status` run in a pool of threads.
+    The number of concurrent requests is limited globally (`max_workers`) and per host (`max_per_host`),
+    each thread reuses connections of its own session. Within a run results are cached for repeated links
+    and for hosts which can't be connected to - other links of such hosts fail without requests.
+    """
+
+    def __init__(self, max_workers=None, max_per_host=None):
+        self.max_workers = max_workers or settings.LINK_VALIDATION_MAX_WORKERS
+        self.max_per_host = max_per_host or settings.LINK_VALIDATION_MAX_PER_HOST
+        self.stats = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._host_semaphores = {}
+        self._dead_hosts = {}
+        self._results = {}
+
+    @property
+    def session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    @staticmethod
+    def get_host(link):
+        return parse.urlparse(link or '').netloc.lower()
+
+    def _get_host_semaphore(self, host):
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_semaphores[host]
+
+    def _cached(self, key, host):
+        if key in self._results:
+            self.stats['cached'] += 1
+            return True, self._results[key]
+        if host in self._dead_hosts:
+            self.stats['dead_host'] += 1
+            return True, self._dead_hosts[host]
+        return False, None
+
+    @staticmethod
+    def _is_connect_error(exc):
+        """Connection to the host couldn't be established (timeout, refused, unknown host) - SSL errors don't count."""
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0], 'reason', None) if isinstance(exc, requests.ConnectionError) and exc.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def check(self, link, resource_type):
+        """Returns None if the link is valid, otherwise the exception raised during the check."""
+        key, host = (link, resource_type), self.get_host(link)
+        found, error = self._cached(key, host)
+        if found:
+            return error
+        with self._get_host_semaphore(host):
+            found, error = self._cached(key, host)  # could be checked while waiting for the semaphore.
+            if found:
+                return error
+            try:
+                check_link_status(link, resource_type, session=self.session)
+            except Exception as exc:
+                error = exc
+                if self._is_connect_error(exc):
+                    self._dead_hosts[host] = exc
+        self.stats['checked'] += 1
+        self._results[key] = error
+        return error
+
+    def _interleave_by_host(self, links):
+        """Orders (link, resource_type) items round-robin by host, so threads don't wait for a single host."""
+        by_host = defaultdict(deque)
+        for item in links:
+            by_host[self.get_host(item[0])].append(item)
+        queues = deque(by_host.values())
+        while queues:
+            queue = queues.popleft()
+            yield queue.popleft()
+            if queue:
+                queues.append(queue)
+
+    def check_many(self, links):
+        """Checks (key, link, resource_type) items, each distinct link once. Returns {key: error or None}."""
+        keys = defaultdict(list)
+        for key, link, resource_type in links:
+            keys[(link, resource_type)].append(key)
+        self.stats['cached'] += sum(len(item_keys) - 1 for item_keys in keys.values())
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {item: executor.submit(self.check, *item) for item in self._interleave_by_host(keys)}
+        return {key: futures[item].result() for item, item_keys in keys.items() for key in item_keys}
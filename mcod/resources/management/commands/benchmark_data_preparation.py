@@ -0,0 +1,55 @@
+import time
+from itertools import islice
+
+from django.core.management import BaseCommand
+
+from mcod.resources.models import Resource
+
+
+class Command(BaseCommand):
+    help = 'Compares speed (rows/sec) of preparation of tabular data rows for indexing: ' \
+           'document per row path vs. columnar block path. Elasticsearch is not used.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pks', type=str, default='', help='Comma separated ids of resources with tabular data.')
+        parser.add_argument('--limit', type=int, default=10000, help='Max number of rows prepared for each resource.')
+        parser.add_argument('--chunk-size', type=int, default=500, dest='chunk_size')
+
+    @staticmethod
+    def _measure(func):
+        started_at = time.perf_counter()
+        count = func()
+        duration = time.perf_counter() - started_at
+        return count, count / duration if duration else 0
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        chunk_size = options['chunk_size']
+        queryset = Resource.objects.with_tabular_data()
+        pks = [pk for pk in options['pks'].split(',') if pk]
+        if pks:
+            queryset = queryset.filter(pk__in=pks)
+        for resource in queryset.order_by('id'):
+            data = resource.data
+            if data is None or data.data_type != 'table':
+                continue
+            doc = data.doc
+
+            def documents():
+                return sum(1 for d in islice(data._docs_iter(doc), limit) if d.to_dict(True))
+
+            def blocks():
+                count = 0
+                for _, actions in data._chunks_iter(doc, chunk_size):
+                    count += len(actions)
+                    if count >= limit:
+                        break
+                return count
+
+            doc_count, doc_rate = self._measure(documents)
+            data._table_cache = None
+            block_count, block_rate = self._measure(blocks)
+            speedup = block_rate / doc_rate if doc_rate else 0
+            self.stdout.write(
+                f'Resource {resource.id}: {len(data.schema["fields"])} columns, {doc_count}/{block_count} rows, '
+                f'documents: {doc_rate:.0f} rows/sec, blocks: {block_rate:.0f} rows/sec, speedup: {speedup:.2f}x')
@@ -0,0 +1,69 @@
+import os
+import time
+
+from django.core.management import BaseCommand
+from tableschema import config
+
+from mcod import settings
+from mcod.resources.type_guess import Table, infer_table_schema
+
+TABULAR_EXTENSIONS = ('.csv', '.tsv', '.xls', '.xlsx', '.ods')
+
+
+class Command(BaseCommand):
+    help = 'Compares schemas inferred from tabular files and the time of inference: ' \
+           'tableschema\'s inference (Table.infer) vs. the sampled inference used by TabularData.infer_schema.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Tabular files, by default files used by tests (data/test_samples).')
+        parser.add_argument('--sample-size', type=int, default=settings.TYPE_INFERENCE_SAMPLE_SIZE, dest='sample_size')
+        parser.add_argument('--max-rows', type=int, default=settings.TYPE_INFERENCE_MAX_ROWS, dest='max_rows')
+        parser.add_argument('--repeat', type=int, default=3, help='Number of runs, the best time is reported.')
+
+    @staticmethod
+    def _get_default_paths():
+        samples_dir = str(settings.DATA_DIR.path('test_samples'))
+        return [
+            os.path.join(samples_dir, name) for name in sorted(os.listdir(samples_dir))
+            if name.lower().endswith(TABULAR_EXTENSIONS)
+        ]
+
+    @staticmethod
+    def _measure(func, repeat):
+        durations, result = [], None
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            result = func()
+            durations.append(time.perf_counter() - started_at)
+        return result, min(durations)
+
+    def handle(self, *args, **options):
+        missing_values = list(config.DEFAULT_MISSING_VALUES)
+        table_options = dict(ignore_blank_headers=True, skip_rows={'type': 'preset', 'value': 'blank'})
+        for path in options['paths'] or self._get_default_paths():
+            def current():
+                return Table(path, **table_options).infer(limit=options['sample_size'],
+                                                          missing_values=list(missing_values))
+
+            def sampled():
+                return infer_table_schema(path, missing_values, options['sample_size'],
+                                          max_rows=options['max_rows'], **table_options)
+
+            try:
+                current_schema, current_time = self._measure(current, options['repeat'])
+                sampled_schema, sampled_time = self._measure(sampled, options['repeat'])
+            except Exception as exc:
+                self.stderr.write(f'{path}: {exc}')
+                continue
+            differences = [
+                f'{field["name"]}: {field["type"]} -> {other["type"]}'
+                for field, other in zip(current_schema['fields'], sampled_schema['fields'])
+                if (field['type'], field['format']) != (other['type'], other['format'])
+            ]
+            speedup = current_time / sampled_time if sampled_time else 0
+            self.stdout.write(
+                f'{os.path.basename(path)}: {len(sampled_schema["fields"])} columns, '
+                f'current: {current_time * 1000:.1f}ms, sampled: {sampled_time * 1000:.1f}ms, '
+                f'speedup: {speedup:.2f}x, schema: {"same" if not differences else ", ".join(differences)}')
@@ -1,11 +1,20 @@
+import re
+
 from django.core.management.base import CommandError
 from django_tqdm import BaseCommand
 from elasticsearch_dsl.connections import get_connection
 
 from mcod.celeryapp import app
+from mcod.resources.indexed_data import index_metadata_cache
 from mcod.resources.models import Resource
 from mcod.resources.tasks import process_resource_data_indexing_task
 
+GENERATION_SUFFIX_RE = re.compile(r'-v\d+$')
+
+
+def get_alias_name(index_name):
+    return GENERATION_SUFFIX_RE.sub('', index_name)
+
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
@@ -66,17 +75,27 @@ class Command(BaseCommand):
             dest='yes',
         )
 
+    @staticmethod
+    def _delete_indices(connection, indices):
+        """Deletes indices (comma separated names) and cached metadata of their aliases."""
+        connection.indices.delete(indices, ignore_unavailable=True)
+        for alias_name in {get_alias_name(index) for index in indices.split(',')}:
+            index_metadata_cache.delete(alias_name)
+
     def _delete_data(self, objs, **options):
         answer = options['yes']
-        indices = ','.join([f'resource-{x.id}' for x in objs])
+        connection = get_connection()
+        indices = ','.join(
+            index for x in objs for index in connection.indices.get(
+                f'resource-{x.id},resource-{x.id}-v*', ignore_unavailable=True, allow_no_indices=True).keys()
+        )
         if indices:
             self.stdout.write('Indices to delete: {}'.format(indices))
             if answer is None:
                 response = input('Are you sure you want to continue? [y/N]: ').lower().strip()
                 answer = response == 'y'
             if answer:
-                connection = get_connection()
-                connection.indices.delete(indices, ignore_unavailable=True)
+                self._delete_indices(connection, indices)
                 self.stdout.write('Done.')
             else:
                 self.stdout.write('Aborted.')
@@ -90,7 +109,7 @@ class Command(BaseCommand):
         pks = self._get_pks(**options)
         if pks:
             pks = tuple(f'-{x}' for x in pks)
-            data = [x for x in data if x.endswith(pks)]
+            data = [x for x in data if get_alias_name(x).endswith(pks)]
         data_str = ','.join(data)
         if data:
             self.stdout.write(f'{len(data)} indices to delete: {data_str}')
@@ -99,7 +118,7 @@ class Command(BaseCommand):
                 response = input('Are you sure you want to continue? [y/N]: ').lower().strip()
                 answer = response == 'y'
             if answer:
-                connection.indices.delete(data_str, ignore_unavailable=True)
+                self._delete_indices(connection, data_str)
             else:
                 self.stdout.write('Delete of stale indices aborted.')
         else:
@@ -114,7 +133,7 @@ class Command(BaseCommand):
         connection = get_connection()
         valid_indices = [f'resource-{x.id}' for x in queryset]
         resource_data_indices = connection.indices.get('resource-*').keys()
-        indices = [x for x in resource_data_indices if x not in valid_indices]
+        indices = [x for x in resource_data_indices if get_alias_name(x) not in valid_indices]
         indices = ','.join(indices) if indices else ''
         self.stdout.write('Trying to delete orphans (stale indices with tabular data):')
         self.stdout.write(indices or '(no stale indices found)')
@@ -124,7 +143,7 @@ class Command(BaseCommand):
                 response = input('Are you sure you want to continue? [y/N]: ').lower().strip()
                 answer = response == 'y'
             if answer:
-                connection.indices.delete(indices, ignore_unavailable=True)
+                self._delete_indices(connection, indices)
             else:
                 self.stdout.write('Delete of stale indices aborted.')
 
@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand
+
+from mcod.resources.models import Resource
+
+
+class Command(BaseCommand):
+    help = 'Stores metadata of data indices (existence, headers, api fields, sort map) of the most viewed ' \
+           'resources in the cache, so the first requests for their data do not have to ask Elasticsearch for it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pks', type=str, default='', help='Comma separated ids of resources with tabular data.')
+        parser.add_argument('--limit', type=int, default=500, help='Number of the most viewed resources to warm up.')
+
+    def handle(self, *args, **options):
+        queryset = Resource.objects.with_tabular_data().published()
+        pks = [pk for pk in options['pks'].split(',') if pk]
+        if pks:
+            queryset = queryset.filter(pk__in=pks)
+        cached = missing = failed = 0
+        for resource in queryset.order_by('-views_count', 'id')[:options['limit']]:
+            if not resource.data:
+                continue
+            try:
+                metadata = resource.data.refresh_metadata()
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f'Metadata of resource {resource.id} not cached: {exc}')
+                continue
+            if metadata['exists']:
+                cached += 1
+            else:
+                missing += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Metadata cached for {cached} resource(s), {missing} without index, {failed} failed.'))
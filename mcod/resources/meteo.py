@@ -14,8 +14,12 @@ def is_valid_netcdf(path):
     return False
 
 
-def check_meteo_data(content_type, path, file_info):
-    if content_type in ['x-hdf', 'octet-stream'] and is_valid_netcdf(path):
+NETCDF_CONTENT_TYPES = ('x-hdf', 'octet-stream')
+
+
+def check_meteo_data(content_type, path, file_info, is_netcdf=None):
+    """`is_netcdf` - callable returning the result of NetCDF validation of the file, if it's already run."""
+    if content_type in NETCDF_CONTENT_TYPES and (is_valid_netcdf(path) if is_netcdf is None else is_netcdf()):
         content_type = 'netcdf'
     elif content_type == 'octet-stream' and 'Gridded binary' in file_info:
         content_type = 'x-grib'
@@ -733,7 +733,7 @@ class Resource(ExtendedModel):
     @property
     def file_data_path(self):
         if self.is_archived_file:
-            extracted = ArchiveReader(self.main_file.path)
+            extracted = ArchiveReader.cached(self.main_file.path)
             return extracted[0] if len(extracted) == 1 else self.main_file.path
         return self.main_file.path
 
@@ -1203,9 +1203,9 @@ class Resource(ExtendedModel):
             for rule in rules.items():
                 col, val = rule
                 col_type = get_coltype(col, self.tabular_data_schema)
-                mappings = self.data.idx.get_field_mapping(fields=f"{col}.*")[
-                    self.data.idx._name
-                ]["mappings"]
+                mappings = next(
+                    iter(self.data.idx.get_field_mapping(fields=f"{col}.*").values())
+                )["mappings"]
                 mappings = mappings["doc"].keys() if "doc" in mappings else []
                 col = f"{col}.val" if f"{col}.val" in mappings else col
                 if col_type in ["string", "any"]:
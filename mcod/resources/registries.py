@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from mcod import settings
+from mcod.core.api import fields
+from mcod.resources.serializers import (
+    GeoAggregations,
+    GeoApiAttrs,
+    GeoApiMeta,
+    GeoApiResponse,
+    GeoFeatureRecord,
+    GeoShapeObject,
+    GeoTileShapesAggregation,
+    TableApiAttrs,
+    TableApiResponse,
+)
+
+
+def _subclass_meta(schema_cls, **options):
+    return type('Meta', (schema_cls.Meta,), options)
+
+
+def _build_schema(name, schema_cls, attrs=None, **meta_options):
+    """
+    Subclass of the schema built for the resource. It isn't added to marshmallow's class registry (which is never
+    cleaned up), so classes of entries evicted from `TabularDataSchemaRegistry` can be garbage collected.
+    """
+    return type(name, (schema_cls,), {
+        **(attrs or {}),
+        'Meta': _subclass_meta(schema_cls, register=False, **meta_options),
+    })
+
+
+def build_table_response(resource):
+    attrs_cls = _build_schema(f'TableApiAttrs{resource.id}', TableApiAttrs, resource.data.get_api_fields())
+    return _build_schema(f'TableApiResponse{resource.id}', TableApiResponse, attrs_schema=attrs_cls)
+
+
+def build_geo_response(resource):
+    record_cls = _build_schema(f'GeoFeatureRecord{resource.id}', GeoFeatureRecord,
+                               fields=tuple(resource.data.get_api_fields()))
+    shape_cls = _build_schema(f'GeoShapeObject{resource.id}', GeoShapeObject, {
+        'record': fields.Nested(record_cls, many=False),
+    })
+    attrs_cls = _build_schema(f'GeoApiAttrs{resource.id}', GeoApiAttrs, {
+        'record': fields.Nested(record_cls, many=False),
+    })
+    tiles_cls = _build_schema(f'GeoTileShapesAggregation{resource.id}', GeoTileShapesAggregation, {
+        'shapes': fields.Nested(shape_cls, many=True),
+    })
+    aggs_cls = _build_schema(f'GeoAggregations{resource.id}', GeoAggregations, {
+        'tiles': fields.Nested(tiles_cls, many=True),
+    })
+    meta_cls = _build_schema(f'GeoApiMeta{resource.id}', GeoApiMeta, {'aggregations': fields.Nested(aggs_cls)})
+    return _build_schema(f'GeoApiResponse{resource.id}', GeoApiResponse, attrs_schema=attrs_cls, meta_schema=meta_cls)
+
+
+def build_sort_map(resource):
+    return resource.data.get_sort_map()
+
+
+class TabularDataSchemaRegistry:
+    """
+    Serializer classes (and sort map) for tabular data endpoints built separately for each resource.
+    Shared serializer classes are never modified, so concurrent requests for different resources don't interfere.
+    Entries are kept in LRU cache under (resource id, schema hash) key - change of resource's
+    schema or file results in a new key, old entries are evicted eventually.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or settings.TABULAR_DATA_SCHEMAS_CACHE_SIZE
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(resource):
+        schema = json.dumps(resource.tabular_data_schema, sort_keys=True, default=str)
+        file_name = getattr(resource.main_file, 'name', '')
+        return resource.id, hashlib.md5(f'{file_name}|{schema}'.encode('utf-8')).hexdigest()
+
+    def _get(self, resource, name, builder):
+        key = self.get_key(resource)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and name in entry:
+                self._entries.move_to_end(key)
+                return entry[name]
+        value = builder(resource)
+        with self._lock:
+            entry = self._entries.setdefault(key, {})
+            self._entries.move_to_end(key)
+            value = entry.setdefault(name, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_table_response(self, resource):
+        return self._get(resource, 'table', build_table_response)
+
+    def get_geo_response(self, resource):
+        return self._get(resource, 'geo', build_geo_response)
+
+    def get_sort_map(self, resource):
+        return self._get(resource, 'sort_map', build_sort_map)
+
+
+tabular_data_schemas = TabularDataSchemaRegistry()
@@ -72,7 +72,7 @@ class OpennessScoreCalculator:
         path = field_file.path
         _, content_type, _ = get_file_info(field_file.path)
         if is_archive_file(content_type):
-            extracted = ArchiveReader(path)
+            extracted = ArchiveReader.cached(path)
             if len(extracted) == 1:
                 path = extracted[0]
         with open(path, 'rb') as file:
@@ -1,10 +1,12 @@
 import json
 import logging
+import uuid
 from copy import deepcopy
 
 import pytz
 from django.apps import apps
 from django.conf import settings
+from django.db import transaction
 from django.utils.timezone import now
 from elasticsearch.helpers.errors import BulkIndexError
 
@@ -14,7 +16,7 @@ from mcod.resources.file_validation import (PasswordProtectedArchiveError,
                                             UnknownFileFormatError)
 from mcod.resources.indexed_data import (FileEncodingValidationError,
                                          ResourceDataValidationError)
-from mcod.resources.link_validation import check_link_scheme
+from mcod.resources.link_validation import LinkChecker, check_link_scheme
 
 logger = logging.getLogger("mcod")
 
@@ -166,14 +168,19 @@ def process_resource_file_data_task(resource_id, **kwargs):
 
     resource_model.objects.filter(pk=resource_id).update(tabular_data_schema=tds)
     resource = resource_model.objects.get(pk=resource_id)
-    resource.data.validate()
+    data = resource.data
+    data.validate()
 
-    success, failed = resource.data.index(force=True)
+    success, failed = data.index(force=True, resume=True)
 
     return json.dumps(
         {
             "indexed": success,
             "failed": failed,
+            "failed_chunks": data.indexing_stats["failed_chunks"],
+            "rows_per_sec": data.indexing_stats["rows_per_sec"],
+            "resumed_from_row": data.indexing_stats["resumed_from_row"],
+            "geocoding": data.indexing_stats.get("geocoding"),
             "uuid": str(resource.uuid),
             "link": resource.link,
             "format": resource.format,
@@ -248,6 +255,57 @@ def validate_link(resource_id):
     }
 
 
+@extended_shared_task(ignore_result=False)
+def validate_links_task(resource_ids):
+    """
+    Validates links of a batch of resources concurrently. Results are saved like results of `validate_link`:
+    task results (with the error of the failed check) are attached to `link_tasks` of the resources and
+    `link_tasks_last_status` (and the verification date) of all resources of the batch are set with two bulk updates.
+    """
+    Resource = apps.get_model("resources", "Resource")
+    TaskResult = apps.get_model("resources", "TaskResult")
+    resources = {
+        resource["id"]: resource
+        for resource in Resource.raw.filter(id__in=resource_ids).values("id", "uuid", "link", "format", "type")
+    }
+    checker = LinkChecker()
+    errors = checker.check_many((resource["id"], resource["link"], resource["type"]) for resource in resources.values())
+    failed = [resource_id for resource_id, error in errors.items() if error]
+    succeeded = [resource_id for resource_id, error in errors.items() if not error]
+    task_results = {}
+    for resource_id, error in errors.items():
+        resource = resources[resource_id]
+        result = {
+            "uuid": str(resource["uuid"]),
+            "link": resource["link"],
+            "format": resource["format"],
+            "type": resource["type"],
+        }
+        if error:
+            result.update(exc_type=error.__class__.__name__, exc_message=str(error))
+        task_results[resource_id] = TaskResult(
+            task_id=str(uuid.uuid4()),
+            task_name=validate_link.name,
+            status="FAILURE" if error else "SUCCESS",
+            result=json.dumps(result),
+            content_type="application/json",
+            content_encoding="utf-8",
+        )
+    verified = now()
+    with transaction.atomic():
+        TaskResult.objects.bulk_create(task_results.values())
+        Resource.link_tasks.through.objects.bulk_create([
+            Resource.link_tasks.through(resource_id=resource_id, taskresult_id=task_result.id)
+            for resource_id, task_result in task_results.items()
+        ])
+        # we don't want signals here - just updates.
+        Resource.raw.filter(id__in=succeeded).update(link_tasks_last_status="SUCCESS", verified=verified)
+        Resource.raw.filter(id__in=failed).update(link_tasks_last_status="FAILURE", verified=verified)
+    for resource_id in failed:
+        logger.debug(f"Invalid link of resource with id {resource_id}: {errors[resource_id]!r}")
+    return {"succeeded": len(succeeded), "failed": len(failed), **checker.stats}
+
+
 @extended_shared_task(ignore_result=False)
 def check_link_protocol(resource_id, link, title, organization_title, resource_type):
     logger.debug(f"Checking link {link} of resource with id {resource_id}")
@@ -271,8 +329,9 @@ def process_resource_data_indexing_task(resource_id):
     resource_model = apps.get_model("resources", "Resource")
     obj = resource_model.objects.with_tabular_data(pks=[resource_id]).first()
     if obj:
-        success, failed = obj.data.index(force=True)
-        return {"resource_id": resource_id, "indexed": success, "failed": failed}
+        data = obj.data
+        success, failed = data.index(force=True)
+        return {"resource_id": resource_id, **data.indexing_stats}
     return {}
 
 
@@ -408,14 +467,11 @@ def update_resource_with_archive_format(res_file_id):
     ResourceFile = apps.get_model("resources", "ResourceFile")
     Resource = apps.get_model("resources", "Resource")
     rf = ResourceFile.objects.get(pk=res_file_id)
-    extracted = ArchiveReader(rf.file.file.name)
-    extracted_files = len(extracted)
+    extracted_files = len(ArchiveReader.cached(rf.file.file.name))  # members are listed, not extracted.
     results = {
         "resource_id": rf.resource_id,
         "resource_file_id": res_file_id,
     }
-    if extracted:
-        extracted.cleanup()
     if extracted_files == 1:
         logger.debug(
             f"Updating file details of ResourceFile[{res_file_id}] for Resource with id {rf.resource_id}"
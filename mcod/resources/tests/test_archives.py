@@ -0,0 +1,59 @@
+import os
+import zipfile
+
+import pytest
+
+from mcod.resources.archives import ArchiveReader, ArchiveTooLargeError
+
+
+@pytest.fixture
+def zip_archive(tmp_path):
+    path = str(tmp_path / 'archive.zip')
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('data/first.csv', 'a;b\n1;2\n')
+        archive.writestr('second.csv', 'c;d\n3;4\n' * 1000)
+    return path
+
+
+def test_lazy_archive_reader_extracts_requested_members(zip_archive):
+    with ArchiveReader(zip_archive, lazy=True) as extracted:
+        assert len(extracted) == 2
+        assert not any(os.path.exists(path) for path in extracted.files)
+        first = extracted[0]
+        assert first.endswith(os.path.join('data', 'first.csv'))
+        assert os.path.isfile(first)
+        assert not os.path.exists(extracted.files[1])
+        assert all(os.path.isfile(path) for path in extracted)
+    assert not os.path.exists(extracted.tmp_dir)
+
+
+def test_archive_reader_rejects_too_large_archive(zip_archive, mocker):
+    mocker.patch('mcod.resources.archives.settings.ARCHIVE_MAX_UNCOMPRESSED_SIZE', 1000)
+    with pytest.raises(ArchiveTooLargeError):
+        ArchiveReader(zip_archive)
+
+
+def test_cached_archive_reader_is_shared(zip_archive):
+    extracted = ArchiveReader.cached(zip_archive)
+    path = extracted[1]
+    extracted.cleanup()
+    assert os.path.isfile(path)
+    assert ArchiveReader.cached(zip_archive) is extracted
+    ArchiveReader.clear_cache()
+    assert not os.path.exists(path)
+
+
+def test_archive_reader_cache_is_bounded_by_extracted_size(tmp_path, zip_archive, mocker):
+    mocker.patch('mcod.resources.archives.settings.ARCHIVE_EXTRACTION_CACHE_MAX_BYTES', 10000)
+    other_archive = str(tmp_path / 'other.zip')
+    with zipfile.ZipFile(other_archive, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('third.csv', 'e;f\n5;6\n' * 1000)
+    first = ArchiveReader.cached(zip_archive)
+    first_path = first[1]
+    second = ArchiveReader.cached(other_archive)
+    second_path = second[0]
+    assert not os.path.exists(first_path)
+    assert os.path.isfile(second_path)
+    assert ArchiveReader.cached(zip_archive) is not first
+    assert ArchiveReader.cached(other_archive) is second
+    ArchiveReader.clear_cache()
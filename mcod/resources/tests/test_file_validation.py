@@ -1,7 +1,12 @@
+from unittest.mock import patch
+
 import pytest
+from django.core.cache import caches
+from django.test import override_settings
 from pytest_bdd import scenarios
 
 from mcod.core.tests.helpers.tasks import run_on_commit_events
+from mcod.resources.file_validation import AnalyzedFile, _analyze_file, analyze_file
 
 scenarios(
     'features/task_results.feature',
@@ -17,3 +22,17 @@ def test_headers_only_csv_file_validation(onlyheaderscsv_resource):
     run_on_commit_events()
     assert onlyheaderscsv_resource.data_tasks.count() == 2
     assert 'zero-data-rows' in onlyheaderscsv_resource.data_tasks.order_by('id').last().result
+
+
+def test_analyze_file_result_is_cached_by_content_hash(tmp_path):
+    first_path, second_path = tmp_path / 'first.csv', tmp_path / 'second.csv'
+    for path in (first_path, second_path):
+        path.write_text('a,b\n1,2\n')
+    caches['default'].delete(AnalyzedFile(str(first_path)).cache_key)
+    with override_settings(FILE_ANALYSIS_CACHE_ENABLED=True):
+        with patch('mcod.resources.file_validation._analyze_file', wraps=_analyze_file) as analyze:
+            result = analyze_file(str(first_path))
+            cached_result = analyze_file(str(second_path))
+    assert analyze.call_count == 1
+    assert cached_result[3] == str(second_path)
+    assert cached_result[:3] + cached_result[4:] == result[:3] + result[4:]
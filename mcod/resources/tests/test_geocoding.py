@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from mcod.resources.geo import GeocoderError, geocode
+from mcod.resources.geocoding import CachedGeocoder, SQLiteGeocodingCache, normalize_address
+
+POINT = {'type': 'Point', 'coordinates': [21.008889, 52.238506]}
+
+
+class DictGeocodingCache:
+
+    def __init__(self):
+        self.data = {}
+
+    def get_many(self, addresses):
+        return {address: self.data[address] for address in addresses if address in self.data}
+
+    def set_many(self, results):
+        self.data.update(results)
+
+
+def test_normalize_address():
+    assert normalize_address(address=' Królewska  27 ', locality='WARSZAWA', postalcode='') == \
+        normalize_address(locality='warszawa', address='Królewska 27')
+
+
+def test_sqlite_geocoding_cache(tmp_path):
+    cache = SQLiteGeocodingCache(path=str(tmp_path / 'geocoding.sqlite3'), timeout=60, negative_timeout=60, max_entries=2)
+    first, second, third = (normalize_address(locality=x) for x in ('Warszawa', 'Kraków', 'Gdańsk'))
+    cache.set_many({first: POINT, second: None})
+    assert cache.get_many([first, second, third]) == {first: POINT, second: None}
+    time.sleep(0.01)
+    cache.get_many([first])
+    cache.set_many({third: POINT})
+    assert cache.get_many([first, second, third]) == {first: POINT, third: POINT}
+
+
+def test_cached_geocoder_deduplicates_addresses(mocker):
+    geocode = mocker.patch('mcod.resources.geocoding.geocode', return_value=POINT)
+    cache = DictGeocodingCache()
+    queries = [
+        {'postalcode': '00-001', 'locality': 'Warszawa', 'address': 'Królewska 27'},
+        {'postalcode': '00-001', 'locality': 'warszawa', 'address': 'Królewska  27'},
+        {'postalcode': '30-001', 'locality': 'Kraków'},
+    ]
+    with CachedGeocoder(cache=cache, max_workers=2) as geocoder:
+        geocoder.prefetch(queries)
+        assert geocoder.geocode(**queries[1]) == POINT
+    assert geocode.call_count == 2
+    assert geocoder.stats == {'hits': 0, 'misses': 2, 'errors': 0}
+
+    with CachedGeocoder(cache=cache) as geocoder:
+        geocoder.prefetch(queries)
+    assert geocode.call_count == 2
+    assert geocoder.stats == {'hits': 2, 'misses': 0, 'errors': 0}
+
+
+def test_cached_geocoder_doesnt_cache_geocoder_errors(mocker):
+    def fake_geocode(raise_errors=False, **kwargs):
+        if kwargs['locality'] == 'Kraków':
+            raise GeocoderError('Geocoder responded with status code 502')
+        return POINT if kwargs['locality'] == 'Warszawa' else None
+
+    mocker.patch('mcod.resources.geocoding.geocode', side_effect=fake_geocode)
+    cache = DictGeocodingCache()
+    queries = [{'locality': locality} for locality in ('Warszawa', 'Kraków', 'Atlantyda')]
+    with CachedGeocoder(cache=cache, max_workers=2) as geocoder:
+        geocoder.prefetch(queries)
+        assert [geocoder.geocode(**query) for query in queries] == [POINT, None, None]
+    assert geocoder.stats == {'hits': 0, 'misses': 3, 'errors': 1}
+    assert cache.data == {normalize_address(locality='Warszawa'): POINT, normalize_address(locality='Atlantyda'): None}
+
+
+def test_geocode_raises_geocoder_errors_on_request(mocker):
+    mocker.patch('mcod.resources.geo.requests.get', return_value=mocker.Mock(status_code=502))
+    assert geocode(locality='Warszawa') is None
+    with pytest.raises(GeocoderError):
+        geocode(locality='Warszawa', raise_errors=True)
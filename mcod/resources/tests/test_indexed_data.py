@@ -1,8 +1,20 @@
 import datetime
+import zipfile
+from types import SimpleNamespace
 
 import pytest
 
-from mcod.resources.indexed_data import prepare_item
+from mcod.resources.archives import ArchiveReader
+from mcod.resources.indexed_data import (
+    IndexedData,
+    IndexingCheckpoint,
+    IndexMetadataCache,
+    TabularData,
+    index_metadata_cache,
+    prepare_column,
+    prepare_item,
+)
+from mcod.resources.management.commands.index_data import Command as IndexDataCommand
 
 
 @pytest.mark.parametrize("value,type,output", [
@@ -11,3 +23,100 @@ from mcod.resources.indexed_data import prepare_item
 ])
 def test_prepare_item(value, type, output):
     assert prepare_item(value, type) == {"repr": output, "val": output}
+
+
+def test_indexing_checkpoint_is_bound_to_source_signature():
+    checkpoint = IndexingCheckpoint('resource-checkpoint-test', 'file.csv:100:1')
+    checkpoint.save(1500, 'resource-checkpoint-test-v2')
+    assert checkpoint.row_no == 1500
+    assert checkpoint.index_name == 'resource-checkpoint-test-v2'
+    assert IndexingCheckpoint('resource-checkpoint-test', 'file.csv:200:2').row_no == 0
+    checkpoint.clear()
+    assert checkpoint.row_no == 0
+
+
+def test_checkpoint_signature_of_archived_file_is_stable_across_extractions(tmp_path):
+    path = str(tmp_path / 'archive.zip')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('data/file.csv', 'a;b\n1;2\n')
+
+    class ArchivedResource(SimpleNamespace):
+        @property
+        def file_data_path(self):
+            return ArchiveReader.cached(path)[0]
+
+    resource = ArchivedResource(id=1, main_file=SimpleNamespace(path=path), tabular_data_schema={})
+    first_path = resource.file_data_path
+    signature = TabularData(resource).checkpoint_signature
+    ArchiveReader.clear_cache()  # the next process extracts the member into another directory.
+    assert resource.file_data_path != first_path
+    assert TabularData(resource).checkpoint_signature == signature
+    assert 'data/file.csv' in signature
+    ArchiveReader.clear_cache()
+
+
+def test_index_metadata_cache_is_shared_and_bound_to_signature():
+    metadata = {'signature': 'abc', 'exists': True, 'headers': {'col1': 'Name'}}
+    IndexMetadataCache().set('resource-metadata-test', metadata)
+    other_process_cache = IndexMetadataCache()
+    assert other_process_cache.get('resource-metadata-test', 'abc') == metadata
+    assert other_process_cache.get('resource-metadata-test', 'changed') is None
+    other_process_cache.delete('resource-metadata-test')
+    assert IndexMetadataCache().get('resource-metadata-test', 'abc') is None
+
+
+def test_deleted_empty_indices_are_removed_from_index_metadata_cache(mocker):
+    index_metadata_cache.set('resource-metadata-test', {'signature': 'abc', 'exists': True})
+    connection = mocker.Mock()
+    connection.cat.indices.return_value = [
+        {'index': 'resource-metadata-test-v2', 'docs.count': '0'},
+        {'index': 'resource-metadata-other-v1', 'docs.count': '10'},
+    ]
+    mocker.patch('mcod.resources.management.commands.index_data.get_connection', return_value=connection)
+    IndexDataCommand()._delete_empty_indices(yes=True, pks='')
+    connection.indices.delete.assert_called_once_with('resource-metadata-test-v2', ignore_unavailable=True)
+    assert IndexMetadataCache().get('resource-metadata-test', 'abc') is None
+
+
+@pytest.mark.parametrize("index_name,generation_no", [
+    ('resource-12-v1', 1),
+    ('test-gw0-resource-12-v10', 10),
+])
+def test_get_generation_no(index_name, generation_no):
+    assert IndexedData._get_generation_no(index_name) == generation_no
+
+
+@pytest.mark.parametrize("errors,exceptions,switched,dropped", [
+    ([], [], True, False),
+    ([{'index': {'status': 400}}], [], False, True),
+    ([], [ConnectionError()], False, False),
+])
+def test_index_switches_generation_only_after_load_without_errors(mocker, errors, exceptions, switched, dropped):
+    es = mocker.patch('mcod.resources.indexed_data.es_connections').get_connection.return_value
+    data = IndexedData(SimpleNamespace(id=1))
+    checkpoint = mocker.Mock()
+    mocker.patch.object(IndexedData, 'doc', mocker.PropertyMock())
+    mocker.patch.object(IndexedData, 'checkpoint', mocker.PropertyMock(return_value=checkpoint))
+    mocker.patch.object(IndexedData, '_get_target_index', return_value=('resource-1-v2', 0, True))
+    mocker.patch.object(IndexedData, '_bulk_load', return_value=SimpleNamespace(
+        success=10, errors=errors, exceptions=exceptions, failed_chunks=len(errors or exceptions)))
+    switch = mocker.patch.object(IndexedData, '_switch_generation')
+    delete_old = mocker.patch.object(IndexedData, '_delete_old_generations')
+    mocker.patch.object(IndexedData, '_store_indexed_metadata')
+    if errors or exceptions:
+        with pytest.raises(Exception):
+            data.index(force=True)
+    else:
+        data.index(force=True)
+    assert switch.called is switched
+    assert delete_old.called is switched
+    assert checkpoint.clear.called is switched
+    assert es.indices.delete.called is dropped
+
+
+@pytest.mark.parametrize("col_type", [None, 'string', 'date', 'time'])
+@pytest.mark.parametrize("special_signs", [frozenset(), frozenset(['-', '1', 'x'])])
+def test_prepare_column_is_consistent_with_prepare_item(col_type, special_signs):
+    values = ['', '1', 1, 1.5, None, 'x', '-', datetime.datetime(2020, 2, 2, 10, 0), datetime.time(10, 0), True]
+    expected = [prepare_item(value, col_type, special_signs=list(special_signs)) for value in values]
+    assert prepare_column(values, col_type, special_signs=special_signs) == expected
@@ -1,12 +1,19 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
+import requests
 import requests_mock
 from pytest_bdd import scenarios
 
+from mcod.resources.factories import ResourceFactory
 from mcod.resources.link_validation import (
     InvalidContentType,
     InvalidResponseCode,
     InvalidSchema,
     InvalidUrl,
+    LinkChecker,
     MissingContentType,
     UnsupportedContentType,
     check_link_status,
@@ -14,6 +21,8 @@ from mcod.resources.link_validation import (
     download_file,
     filename_from_url,
 )
+from mcod.resources.models import Resource
+from mcod.resources.tasks import update_resource_validation_results_task, validate_links_task
 
 scenarios(
     'features/resource_link_validation.feature',
@@ -92,6 +101,95 @@ class TestCheckLinkStatus:
             assert err.args[0] == 'Resource location has been moved!'
 
 
+class LinkHandler(BaseHTTPRequestHandler):
+
+    def _respond(self, status):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._respond({'/ok': 200, '/get-only': 405}.get(self.path, 404))
+
+    def do_GET(self):
+        self._respond(200 if self.path in ('/ok', '/get-only') else 404)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def links_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), LinkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+class TestLinkChecker:
+
+    def test_check_many(self, links_server):
+        checker = LinkChecker(max_workers=4, max_per_host=1)
+        errors = checker.check_many([
+            (1, f'{links_server}/ok', 'api'),
+            (2, f'{links_server}/get-only', 'api'),
+            (3, f'{links_server}/missing', 'api'),
+            (4, f'{links_server}/ok', 'api'),
+            (5, 'http://127.0.0.1:1/closed', 'api'),
+            (6, 'http://127.0.0.1:1/other', 'api'),
+        ])
+        assert errors[1] is None
+        assert errors[2] is None
+        assert isinstance(errors[3], InvalidResponseCode)
+        assert errors[4] is None
+        assert errors[5] is not None
+        assert errors[6] is errors[5]
+        assert checker.stats['checked'] == 4
+        assert checker.stats['cached'] == 1
+        assert checker.stats['dead_host'] == 1
+
+    def test_only_connect_errors_mark_host_dead(self, mocker):
+        errors = {
+            'ssl.example.com': requests.exceptions.SSLError('certificate verify failed'),
+            'timeout.example.com': requests.ConnectTimeout('connect timeout'),
+        }
+
+        def check_link_status(link, resource_type, session=None):
+            raise errors[LinkChecker.get_host(link)]
+
+        mocker.patch('mcod.resources.link_validation.check_link_status', side_effect=check_link_status)
+        checker = LinkChecker(max_workers=1)
+        result = checker.check_many([
+            (key, f'https://{host}/{key}', 'api') for key, host in enumerate(sorted(errors) * 2)])
+        assert sorted(type(error).__name__ for error in result.values()) == [
+            'ConnectTimeout', 'ConnectTimeout', 'SSLError', 'SSLError']
+        assert checker.stats['checked'] == 3
+        assert checker.stats['dead_host'] == 1
+
+
+@pytest.mark.django_db
+def test_validate_links_task_saves_task_results_of_resources(links_server):
+    valid, invalid = ResourceFactory.create_batch(2)
+    Resource.raw.filter(pk=valid.pk).update(link=f'{links_server}/ok', type='api')
+    Resource.raw.filter(pk=invalid.pk).update(link=f'{links_server}/missing', type='api')
+
+    result = validate_links_task([valid.pk, invalid.pk])
+
+    assert result['succeeded'] == 1
+    assert result['failed'] == 1
+    for resource, status in ((valid, 'SUCCESS'), (invalid, 'FAILURE')):
+        resource = Resource.raw.get(pk=resource.pk)
+        assert resource.link_tasks_last_status == status
+        assert resource.link_tasks.last().status == status
+        assert update_resource_validation_results_task(resource.pk)['link_tasks_last_status'] == status
+    task_result = Resource.raw.get(pk=invalid.pk).link_tasks.last()
+    assert json.loads(task_result.result)['exc_type'] == 'InvalidResponseCode'
+    assert task_result.message
+
+
 class TestDownloadFile:
 
     url = 'https://mocker-test.com'
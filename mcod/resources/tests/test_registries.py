@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from marshmallow import class_registry
+
+from mcod.core.api import fields
+from mcod.resources.registries import TabularDataSchemaRegistry
+from mcod.resources.serializers import TableApiAttrs
+
+
+def get_resource(resource_id, columns, schema=None):
+    data = SimpleNamespace(
+        get_api_fields=lambda: {col: fields.String(is_tabular_data_field=True) for col in columns},
+        get_sort_map=lambda: {col: f'{col}.val.keyword' for col in columns},
+    )
+    return SimpleNamespace(
+        id=resource_id, data=data, main_file=SimpleNamespace(name=f'file-{resource_id}.csv'),
+        tabular_data_schema=schema or {'fields': [{'name': col, 'type': 'string'} for col in columns]})
+
+
+def test_table_response_is_built_per_resource():
+    registry = TabularDataSchemaRegistry(max_size=10)
+    first, second = get_resource(1, ['col1', 'col2']), get_resource(2, ['col1'])
+    first_cls = registry.get_table_response(first)
+    second_cls = registry.get_table_response(second)
+    assert set(first_cls.opts.attrs_schema._declared_fields) == {'col1', 'col2'}
+    assert set(second_cls.opts.attrs_schema._declared_fields) == {'col1'}
+    assert not TableApiAttrs._declared_fields
+    assert registry.get_table_response(first) is first_cls
+    assert registry.get_sort_map(first) == {'col1': 'col1.val.keyword', 'col2': 'col2.val.keyword'}
+
+
+def test_table_response_is_rebuilt_after_schema_change():
+    registry = TabularDataSchemaRegistry(max_size=10)
+    resource = get_resource(1, ['col1'])
+    schema_cls = registry.get_table_response(resource)
+    resource.tabular_data_schema = {'fields': [{'name': 'col1', 'type': 'integer'}]}
+    assert registry.get_table_response(resource) is not schema_cls
+
+
+def test_registry_evicts_least_recently_used_entries():
+    registry = TabularDataSchemaRegistry(max_size=2)
+    resources = [get_resource(i, ['col1']) for i in range(3)]
+    first_cls = registry.get_table_response(resources[0])
+    registry.get_table_response(resources[1])
+    registry.get_table_response(resources[0])
+    registry.get_table_response(resources[2])
+    assert registry.get_table_response(resources[0]) is first_cls
+    assert registry.get_key(resources[1]) not in registry._entries
+
+
+def test_geo_response_is_built_per_resource():
+    registry = TabularDataSchemaRegistry(max_size=10)
+    schema_cls = registry.get_geo_response(get_resource(1, ['col1', 'col2']))
+    record_cls = schema_cls.opts.attrs_schema._declared_fields['record'].nested
+    assert record_cls.opts.fields == ('col1', 'col2')
+
+
+def test_built_schemas_are_not_added_to_marshmallow_class_registry():
+    registry = TabularDataSchemaRegistry(max_size=10)
+    resource = get_resource(123456, ['col1'])
+    registry.get_table_response(resource)
+    registry.get_geo_response(resource)
+    assert not [name for name in class_registry._registry if name.endswith('123456')]
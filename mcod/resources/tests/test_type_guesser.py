@@ -1,8 +1,9 @@
 from unittest import mock
 
 import pytest
+from tableschema import Schema
 
-from mcod.resources.type_guess import TypeGuesser
+from mcod.resources.type_guess import TypeGuesser, TypeResolver, infer_fields, sample_rows
 
 
 @pytest.fixture
@@ -118,3 +119,28 @@ class TestTypeGuesser:
         assert list(guesser.cast('12.123123123123:1')) == [('string', 'default', 12), ('any', 'default', 13)]
         assert list(guesser.cast("100 000 000")) == [('string', 'default', 12), ('any', 'default', 13)]
         assert list(guesser.cast("100 000 000.10")) == [('string', 'default', 12), ('any', 'default', 13)]
+
+
+def test_infer_fields_is_equal_to_tableschema_inference():
+    headers = ['id', 'amount', 'date', 'flag', 'title', 'title', 'mixed']
+    rows = [
+        [str(i), f'{i}.5', f'2021-01-{i % 28 + 1:02d}', 'true' if i % 2 else 'false', f'Title {i % 3}', '', 'a']
+        for i in range(60)
+    ] + [[str(i), '', '', '', 'NA', 'x', str(i)] for i in range(60, 100)] + [['100', '1']]
+    missing_values = ['', 'NA']
+
+    TypeGuesser.missing_values = ['NA']
+    schema = Schema({'missingValues': ['NA']})
+    schema.infer([list(row) for row in rows], headers=headers, guesser_cls=TypeGuesser, resolver_cls=TypeResolver)
+    TypeGuesser.missing_values = []
+
+    assert infer_fields(rows, headers, missing_values) == schema.descriptor['fields']
+    assert [field['name'] for field in schema.descriptor['fields']][-2:] == ['title2', 'mixed']
+
+
+def test_sample_rows_is_reproducible():
+    assert sample_rows(iter(range(10)), 20) == list(range(10))
+    sample = sample_rows(iter(range(1000)), 10, max_rows=500)
+    assert len(sample) == 10
+    assert all(row < 500 for row in sample)
+    assert sample == sample_rows(iter(range(1000)), 10, max_rows=500)
@@ -1,6 +1,10 @@
+import random
+import re
 from collections import defaultdict
+from itertools import islice
 
 from tableschema import Table as TablePre, config
+from tabulator import Stream
 
 import mcod.lib.cast_types as types
 
@@ -27,15 +31,37 @@ def _infer_type_order():
     return _INFER_TYPE_ORDER
 
 
+_DIGIT = re.compile(r'\d')
+_NUMBER = re.compile(r'[\dnN]')  # digits or NaN, Infinity.
+
+# Conditions necessary to cast a string value to the type - the (expensive) cast is skipped if they aren't met.
+_STRING_CAST_CONDITIONS = {
+    'duration': lambda value: 'P' in value,
+    'geojson': lambda value: '{' in value,
+    'geopoint': lambda value: ',' in value,
+    'object': lambda value: '{' in value,
+    'array': lambda value: '[' in value,
+    'time': lambda value: ':' in value,
+    'integer': lambda value: _DIGIT.search(value) is not None,
+    'number': lambda value: _NUMBER.search(value) is not None,
+    'boolean': lambda value: len(value.strip()) <= 5,
+}
+
+
 class TypeGuesser:
     """
     That Guesser change original guesser to better handle date and datetime
     """
     missing_values = []
 
-    def cast(self, value):
-
+    def cast(self, value, names=None):
+        """`names` - names of types to check (all by default)."""
         for priority, name in enumerate(_infer_type_order()):
+            if names is not None and name not in names:
+                continue
+            condition = _STRING_CAST_CONDITIONS.get(name)
+            if condition and isinstance(value, str) and not condition(value):
+                continue
             cast = getattr(types, 'cast_%s' % name)
             if value not in self.missing_values:
                 v = str(value)
@@ -105,21 +131,27 @@ class TypeResolver:
     # Public
 
     def get(self, results, confidence):
+        counts = defaultdict(int)
+        for result in results:
+            counts[result] += 1
+        return self.get_from_counts(counts, confidence)
+
+    def get_from_counts(self, counts, confidence):
+        """`counts` - numbers of matches of (type, format, priority), in order of the first match."""
         missing_key = ('missing', 'default', 0)
         any_key = ('any', 'default', 13)
 
-        variants = set(results)
+        variants = set(counts)
         # only one candidate... that's easy.
         if len(variants) == 1:
-            rv = {'type': results[0][0], 'format': results[0][1]}
+            result = next(iter(counts))
+            rv = {'type': result[0], 'format': result[1]}
         elif len(variants) == 2 and missing_key in variants:
             variants.remove(missing_key)
             v = variants.pop()
             rv = {'type': v[0], 'format': v[1]}
         else:
-            counts = defaultdict(int)
-            for result in results:
-                counts[result] += 1
+            counts = defaultdict(int, counts)
 
             # is there are missings?
             missings = counts[missing_key]
@@ -142,6 +174,113 @@ class TypeResolver:
         return rv
 
 
+class ColumnTypeCounter:
+    """
+    Counts matches of types of column's values, like TypeGuesser and TypeResolver do for each cell of the sample.
+
+    Each distinct value is cast once and its matches are counted as many times as it occurs. Types which
+    can't reach the `confidence` threshold of TypeResolver with the remaining values are dropped, so when the set
+    of candidates collapses (usually to string) the remaining values are checked against the cheap types only.
+    """
+    always_checked = ('missing', 'any')
+
+    def __init__(self, guesser, confidence):
+        self.guesser = guesser
+        self.confidence = confidence
+        self.candidates = set(_infer_type_order())
+        self.counts = {}
+
+    @staticmethod
+    def _iter_distinct(values):
+        distinct = {}
+        for value in values:
+            try:
+                key = (type(value), str(value), value)
+                hash(key)
+            except (TypeError, ValueError):  # unhashable value (list, dict, NaN) is cast separately.
+                key = (type(value), id(value), None)
+            if key in distinct:
+                distinct[key][1] += 1
+            else:
+                distinct[key] = [value, 1]
+        return distinct.values()
+
+    def _drop_candidates(self, remaining):
+        max_counts = defaultdict(int)
+        for (name, _, _), count in self.counts.items():
+            max_counts[name] = max(max_counts[name], count)
+        best = max((count for name, count in max_counts.items() if name not in self.always_checked), default=0)
+        threshold = best * self.confidence
+        self.candidates = {
+            name for name in self.candidates
+            if name in self.always_checked or max_counts[name] + remaining >= threshold
+        }
+
+    def update(self, values):
+        remaining = len(values)
+        for value, count in self._iter_distinct(values):
+            for result in self.guesser.cast(value, names=self.candidates):
+                self.counts[result] = self.counts.get(result, 0) + count
+            remaining -= count
+            self._drop_candidates(remaining)
+        return self
+
+    def resolve(self, resolver):
+        return resolver.get_from_counts(self.counts, self.confidence)
+
+
+def sample_rows(rows, size, max_rows=None, seed=0):
+    """Uniform (reservoir) sample of `size` rows from the first `max_rows` rows, the same for the same rows."""
+    rng = random.Random(seed)
+    sample = []
+    for index, row in enumerate(islice(rows, max_rows)):
+        if index < size:
+            sample.append(row)
+        else:
+            position = rng.randint(0, index)
+            if position < size:
+                sample[position] = row
+    return sample
+
+
+def _get_field_names(headers):
+    names, seen = [], []
+    for number, header in enumerate(headers, start=1):
+        count = seen.count(header) + 1
+        seen.append(header)
+        name = '%s%s' % (header, count) if count > 1 else header
+        names.append(name or 'field%s' % number)
+    return names
+
+
+def infer_fields(rows, headers, missing_values, confidence=0.75):
+    """Returns fields of the schema inferred from rows, as `Table.infer` does, column by column."""
+    guesser = TypeGuesser()
+    guesser.missing_values = [value for value in missing_values if value != '']
+    resolver = TypeResolver()
+    fields = []
+    for index, name in enumerate(_get_field_names(headers)):
+        values = [row[index] if index < len(row) else '' for row in rows]
+        field = {'name': name, 'type': config.DEFAULT_FIELD_TYPE, 'format': config.DEFAULT_FIELD_FORMAT}
+        if values:
+            field.update(ColumnTypeCounter(guesser, confidence).update(values).resolve(resolver))
+        fields.append(field)
+    return fields
+
+
+def infer_table_schema(source, missing_values, sample_size, max_rows=None, confidence=0.75, **options):
+    """
+    Infers the schema from the reservoir sample of `sample_size` rows of the first `max_rows` rows of the table.
+    `options` are passed to the tabulator's Stream.
+    """
+    options.setdefault('headers', 1)
+    with Stream(source, **options) as stream:
+        headers = stream.headers or []
+        rows = sample_rows(stream.iter(), sample_size, max_rows=max_rows)
+    missing_values = [value for value in missing_values if value != '']
+    return {'fields': infer_fields(rows, headers, missing_values, confidence=confidence), 'missingValues': missing_values}
+
+
 class Table(TablePre):
 
     def __init__(self, source, schema=None, strict=False, post_cast=[], storage=None, **options):
@@ -32,8 +32,9 @@ from mcod.resources.deserializers import (ChartApiRequest,
                                           TableApiRequest,
                                           TableApiSearchRequest)
 from mcod.resources.documents import ResourceDocument
+from mcod.resources.registries import tabular_data_schemas
 from mcod.resources.serializers import (ChartApiResponse, CommentApiResponse,
-                                        GeoApiResponse, GeoFeatureRecord,
+                                        GeoApiResponse,
                                         ResourceApiResponse,
                                         ResourceRDFResponseSchema,
                                         TableApiResponse,
@@ -187,9 +188,7 @@ class ResourceTableView(JsonAPIView):
 
             if resource.data and resource.data.available:
                 self.search_document = resource.data.doc
-                schema_cls = TableApiResponse
-                _fields = resource.data.get_api_fields()
-                schema_cls.opts.attrs_schema._declared_fields = _fields
+                schema_cls = tabular_data_schemas.get_table_response(resource)
                 self.serializer_schema = partial(schema_cls, many=True)
 
                 _data = super()._get_data(cleaned, id, *args, **kwargs)
@@ -217,7 +216,7 @@ class ResourceTableView(JsonAPIView):
         def _get_queryset(self, cleaned, id, *args, **kwargs):
             resource = self._get_resource_instance(id)
             self.search_document = resource.data.doc
-            self.deserializer.fields["sort"].sort_map = resource.data.get_sort_map()
+            self.deserializer.fields["sort"].sort_map = tabular_data_schemas.get_sort_map(resource)
             self.deserializer.context["index"] = resource.data.doc._index
             return super()._get_queryset(cleaned, *args, **kwargs)
 
@@ -255,9 +254,7 @@ class ResourceTableRowView(JsonAPIView):
             resource = self._get_instance(id, *args, **kwargs)
             self.search_document = resource.data.doc
 
-            schema_cls = TableApiResponse
-            _fields = resource.data.get_api_fields()
-            schema_cls.opts.attrs_schema._declared_fields = _fields
+            schema_cls = tabular_data_schemas.get_table_response(resource)
             self.serializer_schema = partial(schema_cls, many=True)
             if resource.data and resource.data.available:
                 return self.search_document.get(row_id)
@@ -301,9 +298,8 @@ class ResourceGeoView(JsonAPIView):
             if resource.data and resource.data.available:
                 self.search_document = resource.data.doc
 
-                schema_cls = GeoFeatureRecord
-                schema_cls.opts.fields = resource.data.get_api_fields()
-                self.serializer_schema = partial(GeoApiResponse, many=True)
+                schema_cls = tabular_data_schemas.get_geo_response(resource)
+                self.serializer_schema = partial(schema_cls, many=True)
 
                 data = super()._get_data(cleaned, id, *args, **kwargs)
 
@@ -352,7 +348,7 @@ class ResourceGeoView(JsonAPIView):
             if cleaned.get("no_data", False):
                 cleaned["per_page"] = 0
             resource = self._get_resource_instance(id)
-            self.deserializer.fields["sort"].sort_map = resource.data.get_sort_map()
+            self.deserializer.fields["sort"].sort_map = tabular_data_schemas.get_sort_map(resource)
             return super()._get_queryset(cleaned, *args, **kwargs)
 
         def _get_meta(self, cleaned, id, *args, **kwargs):
@@ -470,9 +466,7 @@ class ResourceTableSpecView:
             },
         )
 
-        schema_cls = TableApiResponse
-        _fields = resource.data.get_api_fields()
-        schema_cls.opts.attrs_schema._declared_fields = _fields
+        schema_cls = tabular_data_schemas.get_table_response(resource)
 
         spec.components.schema("Rows", schema_cls=schema_cls, many=True)
         spec.components.schema("Row", schema_cls=schema_cls, many=False)
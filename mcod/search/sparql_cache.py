@@ -0,0 +1,96 @@
+import hashlib
+import math
+import pickle
+import re
+import uuid
+import zlib
+
+from django.core.cache import caches
+from rdflib.query import Result
+
+from mcod import settings
+
+QUERY_WHITESPACE_RE = re.compile(r'("(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|<[^<>\s]*>)|\s+')
+
+
+def normalize_query(query):
+    """Collapses whitespace outside of string literals and IRIs, so formatting of the query doesn't change its key."""
+    return QUERY_WHITESPACE_RE.sub(lambda match: match.group(1) or ' ', query).strip()
+
+
+class SparqlResultCache:
+    """
+    Results of SPARQL queries, stored once per (normalized) query, format and endpoint.
+
+    The serialized result is kept compressed (zlib) and decompressed in chunks for downloads. Rows of SELECT results
+    are also kept in columns (one list of values per variable, pickled and compressed), so pages are serialized
+    from slices of columns without running the query again.
+    """
+    key_prefix = 'sparql_result'
+
+    @property
+    def _cache(self):
+        return caches['default']
+
+    @staticmethod
+    def get_token(query, sparql_format, endpoint=None):
+        digest = hashlib.md5(f'{normalize_query(query)}|{sparql_format}|{endpoint or ""}'.encode('utf-8'))
+        return str(uuid.UUID(digest.hexdigest()))
+
+    def get(self, token):
+        return self._cache.get(f'{self.key_prefix}:{token}')
+
+    def set(self, token, entry):
+        self._cache.set(f'{self.key_prefix}:{token}', entry, timeout=settings.SPARQL_CACHE_TIMEOUT)
+        return entry
+
+    @staticmethod
+    def dump(response, result_format, content_type):
+        """Returns the cache entry of the query result (`response`) serialized to `result_format`."""
+        result = response.serialize(format=result_format, encoding='utf-8')
+        entry = {
+            'type': response.type,
+            'format': result_format,
+            'content_type': content_type if len(result) else None,
+            'count': len(response),
+            'size': len(result),
+            'result': zlib.compress(result),
+        }
+        if response.type == 'SELECT':
+            variables = list(response.vars)
+            columns = [[row.get(var) for row in response.bindings] for var in variables]
+            entry.update(vars=variables, columns=zlib.compress(pickle.dumps(columns, pickle.HIGHEST_PROTOCOL)))
+        return entry
+
+    @staticmethod
+    def get_page(entry, page=1, per_page=20):
+        """
+        Serializes the page of the SELECT result. Like Django's `Paginator.get_page`, number of the page out
+        of range is replaced by the first or the last page. Returns (result, has_previous, has_next).
+        """
+        num_pages = max(math.ceil(entry['count'] / per_page), 1)
+        page = min(max(page, 1), num_pages)
+        start, end = (page - 1) * per_page, page * per_page
+        variables = entry['vars']
+        columns = pickle.loads(zlib.decompress(entry['columns']))
+        result = Result('SELECT')
+        result.vars = variables
+        result.bindings = [
+            {var: value for var, value in zip(variables, row) if value is not None}
+            for row in zip(*(column[start:end] for column in columns))
+        ]
+        return result.serialize(format=entry['format'], encoding='utf-8'), page > 1, page < num_pages
+
+    @staticmethod
+    def iter_result(entry, chunk_size=None):
+        """Generates the serialized result decompressed in chunks."""
+        chunk_size = chunk_size or settings.SPARQL_DOWNLOAD_CHUNK_SIZE
+        data = entry['result']
+        decompressor = zlib.decompressobj()
+        for start in range(0, len(data), chunk_size):
+            chunk = decompressor.decompress(data[start:start + chunk_size])
+            if chunk:
+                yield chunk
+        tail = decompressor.flush()
+        if tail:
+            yield tail
@@ -0,0 +1,46 @@
+from rdflib import Literal, URIRef, Variable
+from rdflib.query import Result
+
+from mcod.search.sparql_cache import SparqlResultCache, normalize_query
+
+
+def _get_select_result(rows):
+    result = Result('SELECT')
+    result.vars = [Variable('s'), Variable('title')]
+    result.bindings = [
+        {Variable('s'): URIRef(f'http://test.mcod/pl/dataset/{number}'), Variable('title'): Literal(f'Title {number}')}
+        if number % 2 else {Variable('s'): URIRef(f'http://test.mcod/pl/dataset/{number}')}
+        for number in range(rows)
+    ]
+    return result
+
+
+def test_query_token_ignores_formatting_of_query():
+    query = 'SELECT ?s WHERE {\n  ?s ?p "a  b" .\n}'
+    assert normalize_query(query) == 'SELECT ?s WHERE { ?s ?p "a  b" . }'
+    assert SparqlResultCache.get_token(query, 'text/csv') == SparqlResultCache.get_token(
+        ' '.join(query.split()).replace('"a b"', '"a  b"'), 'text/csv')
+    assert SparqlResultCache.get_token(query, 'text/csv') != SparqlResultCache.get_token(query, 'text/csv', 'kronika')
+
+
+def test_select_result_pages_are_sliced_from_stored_result():
+    response = _get_select_result(45)
+    entry = SparqlResultCache.dump(response, 'csv', 'text/csv')
+    assert entry['count'] == 45
+
+    page, has_previous, has_next = SparqlResultCache.get_page(entry, page=2, per_page=20)
+    response.bindings = response.bindings[20:40]
+    assert page == response.serialize(format='csv', encoding='utf-8')
+    assert (has_previous, has_next) == (True, True)
+
+    _, has_previous, has_next = SparqlResultCache.get_page(entry, page=10, per_page=20)
+    assert (has_previous, has_next) == (True, False)
+
+
+def test_result_is_downloaded_in_chunks():
+    response = _get_select_result(500)
+    expected = response.serialize(format='xml', encoding='utf-8')
+    entry = SparqlResultCache.dump(response, 'xml', 'application/sparql-results+xml')
+    chunks = list(SparqlResultCache.iter_result(entry, chunk_size=256))
+    assert len(chunks) > 1
+    assert b''.join(chunks) == expected
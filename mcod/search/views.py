@@ -1,18 +1,15 @@
-import hashlib
-import json
 import logging
 import mimetypes
-import uuid
+import types
 from collections import namedtuple
 from functools import partial
 
 import falcon
-from django.core.paginator import Paginator
 from django.utils.translation import gettext_lazy as _
 from elasticsearch_dsl import A, Search
 
 from mcod import settings
-from mcod.api import app_cache as cache, limiter
+from mcod.api import limiter
 from mcod.core.api.handlers import BaseHdlr, RetrieveManyHdlr, SearchHdlr, SubscriptionSearchHdlr
 from mcod.core.api.hooks import login_optional
 from mcod.core.api.rdf.namespaces import NAMESPACES
@@ -32,6 +29,7 @@ from mcod.search.serializers import (
     SparqlNamespaceApiResponse,
     SparqlResponseSchema,
 )
+from mcod.search.sparql_cache import SparqlResultCache
 from mcod.search.utils import get_sparql_limiter_key
 
 logger = logging.getLogger('mcod')
@@ -217,26 +215,25 @@ class SparqlView(BaseView):
         def _get_data(self, cleaned, *args, **kwargs):
             data = cleaned['data']['attributes']
             # https://www.w3.org/TR/2013/REC-sparql11-protocol-20130321/#query-success
-            updated = json.dumps(data)
-            cache_key = hashlib.md5()
-            cache_key.update(updated.encode('utf-8'))
-            cache_key = str(uuid.UUID(cache_key.hexdigest()))
-            cached = cache.get(cache_key)
-            sparql_resp = json.loads(cached) if cached else None
-            if not sparql_resp:
-                sparql_resp = self.make_sparql_request(data)
-                cache.set(cache_key, json.dumps(sparql_resp), timeout=settings.SPARQL_CACHE_TIMEOUT)
-            result = sparql_resp['page_result'] if 'page_result' in sparql_resp else sparql_resp['result']
+            results = SparqlResultCache()
+            token = results.get_token(data['q'], data['format'], data.get('external_sparql_endpoint'))
+            entry = results.get(token)
+            if not entry:
+                entry = results.set(token, self.make_sparql_request(data))
+            if entry['type'] == 'SELECT':
+                result, has_previous, has_next = results.get_page(entry, data.get('page', 1), data.get('per_page', 20))
+            else:
+                result, has_previous, has_next = b''.join(results.iter_result(entry)), False, False
             SparqlResponse = namedtuple(
                 'SparqlResponse', 'id result has_previous has_next content_type download_url count')
             return SparqlResponse(
-                id=cache_key,
-                result=result,
-                has_previous=sparql_resp.get('has_previous', False),
-                has_next=sparql_resp.get('has_next', False),
-                content_type=sparql_resp['content_type'],
-                download_url=f'{settings.API_URL}/sparql/{cache_key}',
-                count=sparql_resp['count'],
+                id=token,
+                result=result.decode('utf-8'),
+                has_previous=has_previous,
+                has_next=has_next,
+                content_type=entry['content_type'],
+                download_url=f'{settings.API_URL}/sparql/{token}',
+                count=entry['count'],
             )
 
         def _get_meta(self, cleaned, *args, **kwargs):
@@ -254,20 +251,7 @@ class SparqlView(BaseView):
                 response = store.query(query, initNs=NAMESPACES)
                 _format = 'xml' if return_format == 'application/rdf+xml' else return_format
                 _format = sparql_format if response.graph else _format
-                result = response.serialize(format=_format, encoding="utf-8")
-                content_type = sparql_format if len(result) else None
-                resp = {'result': result.decode('utf-8'), 'content_type': content_type, 'count': len(response)}
-                if response.type == 'SELECT':
-                    paginator = Paginator(response.bindings, data.get('per_page', 20))
-                    page = paginator.get_page(data.get('page', 1))
-                    response.bindings = page
-                    page_result = response.serialize(format=_format)
-                    resp.update({
-                        'page_result': page_result.decode('utf-8'),
-                        'has_previous': page.has_previous(),
-                        'has_next': page.has_next(),
-                    })
-                return resp
+                return SparqlResultCache.dump(response, _format, sparql_format)
             except Exception as exc:
                 logger.debug(exc)
                 raise falcon.HTTPBadRequest(description=_('Bad request'))
@@ -279,19 +263,22 @@ class SparqlDownloadView(BaseView):
     def on_get(self, request, response, *args, **kwargs):
         self.handle(request, response, self.GET, *args, **kwargs)
 
+    def handle(self, request, response, handler, *args, **kwargs):
+        super().handle(request, response, handler, *args, **kwargs)
+        if isinstance(response.media, types.GeneratorType):
+            response.stream, response.media = response.media, None
+
     class GET(BaseHdlr):
         deserializer_schema = ListingSchema
         serializer_schema = SparqlResponseSchema
 
         def _get_data(self, cleaned, *args, **kwargs):
-            cached = cache.get(str(kwargs['token']))
-            data = json.loads(cached) if cached else None
-            if not data:
+            entry = SparqlResultCache().get(str(kwargs['token']))
+            if not entry:
                 raise falcon.HTTPNotFound
-            result = data.get('result')
-            content_type = data.get('content_type')
-            if result:
-                self.response.context.data = result.encode('utf-8')
+            content_type = entry['content_type']
+            if entry['size']:
+                self.response.context.data = SparqlResultCache.iter_result(entry)
             if content_type:
                 self.response.content_type = content_type
                 ext = self._get_extension_for_content_type(content_type)
@@ -279,6 +279,16 @@ HARVESTER_IMPORTERS = {
     }
 }
 
+# Harvested items are imported in chunks - objects referenced by items of a chunk are fetched in bulk,
+# unchanged datasets are skipped and the search index and RDF store are updated once after the import.
+HARVESTER_BATCHED_IMPORT = env.bool('HARVESTER_BATCHED_IMPORT', default=True)
+HARVESTER_IMPORT_CHUNK_SIZE = env.int('HARVESTER_IMPORT_CHUNK_SIZE', default=200)
+
+# Data sources are fetched conditionally (ETag, Last-Modified, content hash of the last successful import),
+# import of data which didn't change is skipped. Payloads are streamed to disk in chunks of the given size.
+HARVESTER_CONDITIONAL_FETCH = env.bool('HARVESTER_CONDITIONAL_FETCH', default=True)
+HARVESTER_DOWNLOAD_CHUNK_SIZE = env.int('HARVESTER_DOWNLOAD_CHUNK_SIZE', default=1024 * 1024)
+
 HTTP_REQUEST_DEFAULT_HEADERS = {
     'User-Agent': 'Otwarte Dane',
 }
@@ -416,9 +426,29 @@ FUSEKI_URL = env('FUSEKI_URL', default='http://mcod-rdfdb:3030')
 FUSEKI_DATASET = env('FUSEKI_DATASET_1', default='ds')
 SPARQL_QUERY_ENDPOINT = f"{FUSEKI_URL}/{FUSEKI_DATASET}/query"
 SPARQL_UPDATE_ENDPOINT = f"{FUSEKI_URL}/{FUSEKI_DATASET}/update"
+SPARQL_GRAPH_STORE_ENDPOINT = f"{FUSEKI_URL}/{FUSEKI_DATASET}/data"
 SPARQL_USER = env('SPARQL_USER', default='admin')
 SPARQL_PASSWORD = env('ADMIN_PASSWORD', default='Britenet.1')
-SPARQL_CACHE_TIMEOUT = env('SPARQL_CACHE_TIMEOUT', default=60)  # in secs.
+# Results of SPARQL queries are stored once per query, format and endpoint (pages are sliced from the stored result).
+SPARQL_CACHE_TIMEOUT = env.int('SPARQL_CACHE_TIMEOUT', default=60)  # in secs.
+SPARQL_DOWNLOAD_CHUNK_SIZE = env.int('SPARQL_DOWNLOAD_CHUNK_SIZE', default=64 * 1024)
+# Pages of the catalog (/catalog.{format}) are serialized once and served from Redis (with ETags) until datasets,
+# resources or organizations change or CATALOG_CACHE_TIMEOUT (in secs.) passes.
+CATALOG_CACHE_ENABLED = env.bool('CATALOG_CACHE_ENABLED', default=True)
+CATALOG_CACHE_TIMEOUT = env.int('CATALOG_CACHE_TIMEOUT', default=3600)
+# Bulk load (rdf_db --bulk): objects are serialized to N-Triples in chunks by worker processes
+# and sent to the Graph Store endpoint in batches of at least RDF_BULK_LOAD_BATCH_SIZE triples.
+RDF_BULK_LOAD_WORKERS = env.int('RDF_BULK_LOAD_WORKERS', default=4)
+RDF_BULK_LOAD_CHUNK_SIZE = env.int('RDF_BULK_LOAD_CHUNK_SIZE', default=200)
+RDF_BULK_LOAD_BATCH_SIZE = env.int('RDF_BULK_LOAD_BATCH_SIZE', default=100000)
+RDF_BULK_LOAD_TIMEOUT = env.int('RDF_BULK_LOAD_TIMEOUT', default=300)
+RDF_BULK_LOAD_CHECKPOINT_TIMEOUT = env.int('RDF_BULK_LOAD_CHECKPOINT_TIMEOUT', default=7 * 24 * 3600)
+# Graph updates requested by signals are coalesced in a queue flushed at least every MAX_LATENCY seconds
+# (or as soon as MAX_SIZE actions are queued) with one update request per BATCH_SIZE objects.
+RDF_UPDATE_QUEUE_ENABLED = env.bool('RDF_UPDATE_QUEUE_ENABLED', default=True)
+RDF_UPDATE_QUEUE_MAX_LATENCY = env.int('RDF_UPDATE_QUEUE_MAX_LATENCY', default=10)
+RDF_UPDATE_QUEUE_MAX_SIZE = env.int('RDF_UPDATE_QUEUE_MAX_SIZE', default=2000)
+RDF_UPDATE_QUEUE_BATCH_SIZE = env.int('RDF_UPDATE_QUEUE_BATCH_SIZE', default=200)
 REDIS_URL = env('REDIS_URL', default='redis://mcod-redis:6379')
 
 CACHES = {
@@ -729,6 +759,19 @@ ELASTICSEARCH_INDEX_NAMES = OrderedDict({
 })
 
 ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = 'mcod.core.api.search.signals.AsyncSignalProcessor'
+# Updates of documents requested by signals are coalesced in a queue flushed at least every MAX_LATENCY seconds
+# (or as soon as MAX_SIZE objects are queued), instead of a Celery task for each save.
+ES_UPDATE_QUEUE_ENABLED = env.bool('ES_UPDATE_QUEUE_ENABLED', default=True)
+ES_UPDATE_QUEUE_MAX_LATENCY = env.int('ES_UPDATE_QUEUE_MAX_LATENCY', default=10)
+ES_UPDATE_QUEUE_MAX_SIZE = env.int('ES_UPDATE_QUEUE_MAX_SIZE', default=5000)
+# Only one flush of a queue runs at a time - the lock of a flush interrupted without releasing it expires
+# after LOCK_TIMEOUT seconds (the lock is extended after each processed part of the queue).
+QUEUE_FLUSH_LOCK_TIMEOUT = env.int('QUEUE_FLUSH_LOCK_TIMEOUT', default=600)
+
+# Notifications about changes of watched objects are aggregated in a queue (one per watcher and notification type)
+# flushed every MAX_LATENCY seconds, instead of a Celery task for each change.
+WATCHERS_NOTIFICATION_QUEUE_ENABLED = env.bool('WATCHERS_NOTIFICATION_QUEUE_ENABLED', default=True)
+WATCHERS_NOTIFICATION_QUEUE_MAX_LATENCY = env.int('WATCHERS_NOTIFICATION_QUEUE_MAX_LATENCY', default=60)
 
 ELASTICSEARCH_DSL_INDEX_SETTINGS = {
     'number_of_shards': 1,
@@ -752,6 +795,24 @@ ELASTICSEARCH_HISTORIES_IDX_SETTINGS = {
 
 ELASTICSEARCH_INDEX_PREFIX = ''
 
+RESOURCE_DATA_INDEXING_CHUNK_SIZE = env.int('RESOURCE_DATA_INDEXING_CHUNK_SIZE', default=500)
+RESOURCE_DATA_INDEXING_THREAD_COUNT = env.int('RESOURCE_DATA_INDEXING_THREAD_COUNT', default=4)
+RESOURCE_DATA_INDEXING_CHECKPOINT_TIMEOUT = env.int('RESOURCE_DATA_INDEXING_CHECKPOINT_TIMEOUT', default=7 * 24 * 3600)
+# Settings of resource's data index for the time of bulk load, restored before the alias is switched.
+RESOURCE_DATA_BUILD_INDEX_SETTINGS = {
+    'refresh_interval': '-1',
+    'number_of_replicas': 0,
+}
+RESOURCE_DATA_INDEX_GENERATIONS_TO_KEEP = env.int('RESOURCE_DATA_INDEX_GENERATIONS_TO_KEEP', default=0)
+TABULAR_DATA_SCHEMAS_CACHE_SIZE = env.int('TABULAR_DATA_SCHEMAS_CACHE_SIZE', default=500)
+# Types of columns are inferred from the uniform sample of rows, drawn from the first TYPE_INFERENCE_MAX_ROWS rows.
+TYPE_INFERENCE_SAMPLE_SIZE = env.int('TYPE_INFERENCE_SAMPLE_SIZE', default=5000)
+TYPE_INFERENCE_MAX_ROWS = env.int('TYPE_INFERENCE_MAX_ROWS', default=20000)
+RESOURCE_DATA_METADATA_CACHE_TIMEOUT = env.int('RESOURCE_DATA_METADATA_CACHE_TIMEOUT', default=7 * 24 * 3600)
+# Metadata of resource's data index is kept in memory of the process for a short time, Redis is the shared source.
+RESOURCE_DATA_METADATA_LOCAL_CACHE_TIMEOUT = env.int('RESOURCE_DATA_METADATA_LOCAL_CACHE_TIMEOUT', default=60)
+RESOURCE_DATA_METADATA_LOCAL_CACHE_SIZE = env.int('RESOURCE_DATA_METADATA_LOCAL_CACHE_SIZE', default=1000)
+
 CELERY_BROKER_URL = 'amqp://%s' % str(env('RABBITMQ_HOST', default='mcod-rabbitmq:5672'))
 
 CELERY_RESULT_BACKEND = 'django-db'
@@ -777,6 +838,7 @@ CELERY_TASK_QUEUES = {
 CELERY_TASK_ROUTES = {
     'mcod.core.api.search.tasks.update_document_task': {'queue': 'indexing'},
     'mcod.core.api.search.tasks.update_with_related_task': {'queue': 'indexing'},
+    'mcod.core.api.search.tasks.flush_index_update_queue_task': {'queue': 'indexing'},
     'mcod.core.api.search.tasks.delete_document_task': {'queue': 'indexing'},
     'mcod.core.api.search.tasks.delete_with_related_task': {'queue': 'indexing'},
     'mcod.core.api.search.tasks.delete_related_documents_task': {'queue': 'indexing'},
@@ -784,6 +846,7 @@ CELERY_TASK_ROUTES = {
     'mcod.core.api.search.tasks.bulk_delete_documents_task': {'queue': 'indexing'},
     'mcod.resources.tasks.process_resource_data_indexing_task': {'queue': 'indexing_data'},
     'mcod.resources.tasks.check_link_protocol': {'queue': 'periodic'},
+    'mcod.resources.tasks.validate_links_task': {'queue': 'periodic'},
     'mcod.resources.tasks.process_resource_from_url_task': {'queue': 'resources'},
     'mcod.resources.tasks.process_resource_file_task': {'queue': 'resources'},
     'mcod.resources.tasks.process_resource_res_file_task': {'queue': 'resources'},
@@ -796,12 +859,14 @@ CELERY_TASK_ROUTES = {
     'mcod.harvester.tasks.import_data_task': {'queue': 'harvester'},
     'mcod.harvester.tasks.validate_xml_url_task': {'queue': 'harvester'},
     'mcod.datasets.tasks.send_dataset_comment': {'queue': 'notifications'},
+    'mcod.datasets.tasks.create_language_catalog_metadata_file_task': {'queue': 'periodic'},
     'mcod.newsletter.tasks.remove_inactive_subscription': {'queue': 'newsletter'},
     'mcod.newsletter.tasks.send_newsletter': {'queue': 'newsletter'},
     'mcod.newsletter.tasks.send_newsletter_mail': {'queue': 'newsletter'},
     'mcod.newsletter.tasks.send_subscription_confirm_mail': {'queue': 'newsletter'},
 
     'mcod.reports.tasks.create_resources_report_task': {'queue': 'periodic'},
+    'mcod.reports.tasks.refresh_materialized_views_task': {'queue': 'periodic'},
 
     'mcod.schedules.tasks.send_admin_notification_task': {'queue': 'notifications'},
     'mcod.schedules.tasks.send_schedule_notifications_task': {'queue': 'notifications'},
@@ -822,6 +887,7 @@ CELERY_TASK_ROUTES = {
     'mcod.watchers.tasks.remove_user_notifications_task': {'queue': 'watchers'},
     'mcod.watchers.tasks.update_notifications_task': {'queue': 'watchers'},
     'mcod.watchers.tasks.model_watcher_updated_task': {'queue': 'watchers'},
+    'mcod.watchers.tasks.flush_notification_queue_task': {'queue': 'watchers'},
     'mcod.watchers.tasks.update_query_watchers_task': {'queue': 'watchers'},
     'mcod.watchers.tasks.query_watcher_updated_task': {'queue': 'watchers'},
     'mcod.watchers.tasks.send_report_from_subscriptions': {'queue': 'watchers'},
@@ -832,10 +898,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'mcod.counters.tasks.save_counters',
         'schedule': 120,
     },
+    'flush-index-update-queue': {
+        'task': 'mcod.core.api.search.tasks.flush_index_update_queue_task',
+        'schedule': ES_UPDATE_QUEUE_MAX_LATENCY,
+    },
+    'flush-graph-update-queue': {
+        'task': 'mcod.core.api.rdf.tasks.flush_graph_update_queue_task',
+        'schedule': RDF_UPDATE_QUEUE_MAX_LATENCY,
+    },
     'every-5-minutes': {
         'task': 'mcod.searchhistories.tasks.save_searchhistories_task',
         'schedule': 300,
     },
+    'flush-notification-queue': {
+        'task': 'mcod.watchers.tasks.flush_notification_queue_task',
+        'schedule': WATCHERS_NOTIFICATION_QUEUE_MAX_LATENCY,
+    },
     'update-query-watchers': {
         'task': 'mcod.watchers.tasks.update_query_watchers_task',
         'schedule': crontab(minute=0, hour=22)
@@ -855,7 +933,11 @@ CELERY_BEAT_SCHEDULE = {
     'deactivate-accepted-dataset-submissions': {
         'task': 'mcod.suggestions.tasks.deactivate_accepted_dataset_submissions',
         'schedule': crontab(minute=0, hour=5)
-    }
+    },
+    'refresh-materialized-views': {
+        'task': 'mcod.reports.tasks.refresh_materialized_views_task',
+        'schedule': env.int('MATERIALIZED_VIEWS_REFRESH_INTERVAL', default=3600),
+    },
 }
 if env('ENABLE_MONTHLY_REPORTS', default='no') in ['yes', '1', 'true']:
     CELERY_BEAT_SCHEDULE.update({
@@ -1196,6 +1278,20 @@ ARCHIVE_CONTENT_TYPES = {
 }
 
 ARCHIVE_EXTENSIONS = {'bz', 'bz2', 'gz', 'rar', 'tar', 'zip', '7z'}
+# Archives are rejected before extraction if their uncompressed size or compression ratio is higher.
+ARCHIVE_MAX_UNCOMPRESSED_SIZE = env.int('ARCHIVE_MAX_UNCOMPRESSED_SIZE', default=10 * 1024 ** 3)
+ARCHIVE_MAX_COMPRESSION_RATIO = env.int('ARCHIVE_MAX_COMPRESSION_RATIO', default=250)
+# Number of archives which extracted members are kept (and reused) by the process.
+ARCHIVE_EXTRACTION_CACHE_SIZE = env.int('ARCHIVE_EXTRACTION_CACHE_SIZE', default=4)
+# Total size of extracted members kept by the process, above it the least recently used archives are cleaned up.
+ARCHIVE_EXTRACTION_CACHE_MAX_BYTES = env.int('ARCHIVE_EXTRACTION_CACHE_MAX_BYTES', default=2 * 1024 ** 3)
+# Beginning of the analyzed file read once and shared by detectors (e.g. the encoding detection).
+FILE_ANALYSIS_PREFIX_SIZE = env.int('FILE_ANALYSIS_PREFIX_SIZE', default=64 * 1024)
+# Number of threads running independent detectors (geodata, NetCDF) of the analyzed file concurrently.
+FILE_ANALYSIS_WORKERS = env.int('FILE_ANALYSIS_WORKERS', default=4)
+# Results of the file analysis are cached by the content hash of the file.
+FILE_ANALYSIS_CACHE_ENABLED = env.bool('FILE_ANALYSIS_CACHE_ENABLED', default=True)
+FILE_ANALYSIS_CACHE_TIMEOUT = env.int('FILE_ANALYSIS_CACHE_TIMEOUT', default=7 * 24 * 60 * 60)
 ALLOWED_CONTENT_TYPES = [x[1] for x in SUPPORTED_CONTENT_TYPES] + list(ARCHIVE_CONTENT_TYPES)
 ALLOWED_SUPPLEMENT_MIMETYPES = env.list(
     'ALLOWED_SUPPLEMENT_MIMETYPES',
@@ -1237,6 +1333,7 @@ COUNTED_MODELS = {
     'resources.Resource': {'status': 'published'},
     'cms.NewsPage': {'live': True},
 }
+COUNTERS_SAVE_CHUNK_SIZE = env.int('COUNTERS_SAVE_CHUNK_SIZE', default=1000)
 SEARCH_PATH = '/search'
 
 JSONAPI_SCHEMA_PATH = str(DATA_DIR.path('jsonapi.config.json'))
@@ -1473,6 +1570,13 @@ GEOCODER_URL = env('GEOCODER_URL', default='http://geocoder.mcod.local')
 GEOCODER_USER = env('GEOCODER_USER', default='geouser')
 GEOCODER_PASS = env('GEOCODER_PASS', default='1234')
 PLACEHOLDER_URL = env('PLACEHOLDER_URL', default='http://placeholder.mcod.local')
+GEOCODER_CACHE_BACKEND = env('GEOCODER_CACHE_BACKEND', default='redis')  # redis or sqlite
+GEOCODER_CACHE_TIMEOUT = env.int('GEOCODER_CACHE_TIMEOUT', default=30 * 24 * 3600)
+GEOCODER_CACHE_NEGATIVE_TIMEOUT = env.int('GEOCODER_CACHE_NEGATIVE_TIMEOUT', default=24 * 3600)
+GEOCODER_CACHE_SQLITE_PATH = env('GEOCODER_CACHE_SQLITE_PATH', default=f'{DATABASE_DIR}/geocoding.sqlite3')
+GEOCODER_CACHE_MAX_ENTRIES = env.int('GEOCODER_CACHE_MAX_ENTRIES', default=1000000)
+GEOCODER_LOCAL_CACHE_SIZE = env.int('GEOCODER_LOCAL_CACHE_SIZE', default=10000)
+GEOCODER_MAX_WORKERS = env.int('GEOCODER_MAX_WORKERS', default=8)
 
 MAX_TAG_LENGTH = 100
 
@@ -1485,6 +1589,17 @@ EXPORT_FORMAT_TO_MIMETYPE = {
     'xlsx': 'application/vnd.ms-excel',
     'xml': 'application/xml',
 }
+# Number of objects fetched from the database and serialized at once during the streamed CSV/XLSX export.
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=500)
+# Number of rows fetched from the database (server-side cursor) and written at once by CSV report tasks.
+REPORTS_CHUNK_SIZE = env.int('REPORTS_CHUNK_SIZE', default=2000)
+# Links of resources are validated in batches, each batch by a pool of threads limited in total and per host.
+LINK_VALIDATION_BATCH_SIZE = env.int('LINK_VALIDATION_BATCH_SIZE', default=1000)
+LINK_VALIDATION_MAX_WORKERS = env.int('LINK_VALIDATION_MAX_WORKERS', default=32)
+LINK_VALIDATION_MAX_PER_HOST = env.int('LINK_VALIDATION_MAX_PER_HOST', default=4)
+# Search query watchers are reloaded by a pool of threads sending requests to the internal API, chunk by chunk.
+QUERY_WATCHERS_RELOAD_WORKERS = env.int('QUERY_WATCHERS_RELOAD_WORKERS', default=8)
+QUERY_WATCHERS_RELOAD_CHUNK_SIZE = env.int('QUERY_WATCHERS_RELOAD_CHUNK_SIZE', default=500)
 
 RDF_FORMAT_TO_MIMETYPE = {
     'jsonld': 'application/ld+json',
@@ -1640,6 +1755,9 @@ CKAN_LICENSES_WHITELIST = {
 }
 
 CSV_CATALOG_BATCH_SIZE = env('CSV_CATALOG_BATCH_SIZE', default=20000)
+CATALOG_METADATA_CHUNK_SIZE = env.int('CATALOG_METADATA_CHUNK_SIZE', default=500)
+# Catalog metadata files (katalog.csv/xml) are regenerated only if datasets, resources or institutions were modified.
+CATALOG_METADATA_SKIP_UNMODIFIED = env.bool('CATALOG_METADATA_SKIP_UNMODIFIED', default=True)
 
 DISCOURSE_FORUM_ENABLED = env('DISCOURSE_FORUM_ENABLED', default=True)
 
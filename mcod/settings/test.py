@@ -105,6 +105,13 @@ REPORTS_MEDIA = '%s%s' % (MEDIA_URL, 'reports')
 RESOURCES_URL = '%s%s' % (MEDIA_URL, 'resources')
 SHOWCASES_URL = '%s%s' % (MEDIA_URL, 'showcases')
 
+ES_UPDATE_QUEUE_ENABLED = False
+WATCHERS_NOTIFICATION_QUEUE_ENABLED = False
+RDF_UPDATE_QUEUE_ENABLED = False
+CATALOG_CACHE_ENABLED = False
+FILE_ANALYSIS_CACHE_ENABLED = False
+QUERY_WATCHERS_RELOAD_WORKERS = 1  # requests to the API are patched with the in-process test client.
+
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_DEFAULT_QUEUE = 'mcod'
 CELERY_TASK_QUEUES = {
@@ -1,3 +1,6 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from operator import itemgetter
 from urllib.parse import parse_qsl, urlsplit, urlunsplit
 
@@ -19,12 +22,16 @@ from model_utils import FieldTracker
 from mcod.core.api.search.tasks import update_document_task
 from mcod.core.db.mixins import ApiMixin
 from mcod.core.db.models import TimeStampedModel
+from mcod.core.utils import iter_in_chunks
 from mcod.core.versioning import VERSIONS
+from mcod.watchers.notification_queue import notify_watcher_subscribers
 from mcod.watchers.signals import query_watcher_created
-from mcod.watchers.tasks import model_watcher_updated_task, query_watcher_updated_task
+from mcod.watchers.tasks import query_watcher_updated_task, query_watchers_updated_task
 
 CURRENT_VERSION = max(VERSIONS)
 
+logger = logging.getLogger('mcod')
+
 OBJECT_NAME_TO_MODEL = {
     'application': 'applications.Application',
     'category': 'categories.Category',
@@ -205,12 +212,7 @@ class ModelWatcherManager(models.Manager):
             )
             if notify_subscribers and (obj_state == 'removed' or watcher.is_active):
                 _type = OBJ_STATE_2_NOTIFICATION_TYPES[obj_state]
-
-                model_watcher_updated_task.s(
-                    watcher.id,
-                    _type,
-                    prev_value
-                ).apply_async()
+                notify_watcher_subscribers(watcher.id, _type, prev_value)
 
             return True
 
@@ -268,34 +270,83 @@ class SearchQueryWatcherManager(models.Manager):
 
         return _headers
 
-    def reload(self):
-        query = self.filter(object_name='query', is_active=True, ref_field__isnull=False)
-        for watcher in query:
-            int_url, ext_url = urlsplit(settings.API_URL_INTERNAL), urlsplit(watcher.object_ident)
-            ext_url = ext_url._replace(scheme=int_url.scheme)._replace(netloc=int_url.netloc)
-            _url = urlunsplit(ext_url)
-            _headers = watcher.customfields.get('headers') or {}
-            headers = {
-                'User-Agent': 'mcod-internal',
-                'Accept-Language': _headers.get('lang') or settings.LANGUAGE_CODE,
-                'X-API-VERSION': _headers.get('api_version') or str(CURRENT_VERSION)
-            }
-            response = requests.get(_url, headers=headers, verify=False, timeout=(3.0, 5.0))
-            if response.status_code != 200:
-                continue
+    def _get_internal_request(self, watcher):
+        """Returns the normalized url of the internal API and headers of the watcher's query."""
+        int_url, ext_url = urlsplit(settings.API_URL_INTERNAL), urlsplit(watcher.object_ident)
+        ext_url = ext_url._replace(scheme=int_url.scheme)._replace(netloc=int_url.netloc)
+        _headers = watcher.customfields.get('headers') or {}
+        headers = {
+            'User-Agent': 'mcod-internal',
+            'Accept-Language': _headers.get('lang') or settings.LANGUAGE_CODE,
+            'X-API-VERSION': _headers.get('api_version') or str(CURRENT_VERSION)
+        }
+        return self._normalize_url(urlunsplit(ext_url)), tuple(sorted(headers.items()))
 
+    @staticmethod
+    def _fetch(request):
+        url, headers = request
+        try:
+            response = requests.get(url, headers=dict(headers), verify=False, timeout=(3.0, 5.0))
+        except requests.RequestException as exc:
+            logger.debug(f'Query watchers reload - request {url} failed: {exc}')
+            return None
+        if response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _get_changes(watchers, data):
+        """Returns watchers with changed ref_value (already set) and (watcher_id, type, prev_value) notifications."""
+        changed, notifications = [], []
+        for watcher in watchers:
             try:
-                field_value = dpath.util.get(response.json(), watcher.ref_field)
-                new_value = int(field_value)
+                new_value = int(dpath.util.get(data, watcher.ref_field))
                 old_value = int(watcher.ref_value)
-
-                if new_value != old_value:
-                    obj_state = 'incresed' if new_value > old_value else 'decresed'
-                    SearchQueryWatcher.objects.update_from_url(watcher.object_ident, new_value, headers=headers,
-                                                               obj_state=obj_state,
-                                                               notify_subscribers=True)
-            except (KeyError, ValueError, InvalidRefValue):
+            except (KeyError, ValueError, TypeError):
                 continue
+            if new_value != old_value:
+                obj_state = 'incresed' if new_value > old_value else 'decresed'
+                watcher.ref_value = str(new_value)
+                watcher.last_ref_change = now()
+                changed.append(watcher)
+                notifications.append((watcher.id, OBJ_STATE_2_NOTIFICATION_TYPES[obj_state], old_value))
+        return changed, notifications
+
+    def reload(self):
+        """
+        Refreshes results counts of active search query watchers. Watchers of the same query (normalized url
+        and headers) share one request, requests are sent concurrently by a bounded pool of threads
+        (or one by one, if `QUERY_WATCHERS_RELOAD_WORKERS` is 1).
+        Changed watchers are saved in bulk and notifications are created by tasks handling batches of watchers.
+        """
+        query = self.filter(object_name='query', is_active=True, ref_field__isnull=False)
+        requests_watchers = defaultdict(list)
+        for watcher in query.iterator():
+            requests_watchers[self._get_internal_request(watcher)].append(watcher)
+        stats = {'watchers': 0, 'requests': len(requests_watchers), 'changed': 0}
+        workers = settings.QUERY_WATCHERS_RELOAD_WORKERS
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for chunk in iter_in_chunks(requests_watchers, settings.QUERY_WATCHERS_RELOAD_CHUNK_SIZE):
+                changed, notifications = [], []
+                for request, data in zip(chunk, (executor.map if executor else map)(self._fetch, chunk)):
+                    stats['watchers'] += len(requests_watchers[request])
+                    if data is not None:
+                        _changed, _notifications = self._get_changes(requests_watchers[request], data)
+                        changed.extend(_changed)
+                        notifications.extend(_notifications)
+                self.bulk_update(changed, ['ref_value', 'last_ref_change'])
+                if notifications:
+                    query_watchers_updated_task.s(notifications).apply_async()
+                stats['changed'] += len(changed)
+        finally:
+            if executor:
+                executor.shutdown()
+        logger.info(f'Query watchers reloaded: {stats}')
+        return stats
 
     def create_from_url(self, url, objects_count, headers=None):
         _headers = self._prepare_headers(headers)
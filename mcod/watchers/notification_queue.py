@@ -0,0 +1,106 @@
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+
+from mcod.lib.queues import RedisSetQueue
+
+logger = logging.getLogger('mcod')
+
+
+class NotificationQueue(RedisSetQueue):
+    """
+    Aggregates notifications about changes of watched objects.
+
+    Watcher changes are added as (watcher_id, notification_type) members to a Redis set, so repeated changes
+    of the same object within the window (`WATCHERS_NOTIFICATION_QUEUE_MAX_LATENCY` seconds) produce
+    one notification per subscription. Flush (periodic task) atomically takes the set and creates notifications
+    for all subscriptions of queued watchers with a single INSERT ... SELECT joined against subscriptions.
+    The taken set is removed within the transaction of the INSERT, so it's never flushed twice.
+    """
+    key = 'watchers_notification_queue'
+    stats_key = 'watchers_notification_queue:stats'
+
+    @staticmethod
+    def _member(watcher_id, notification_type):
+        return f'{watcher_id}:{notification_type}'
+
+    @staticmethod
+    def _parse_member(member):
+        watcher_id, notification_type = member.decode().split(':')
+        return int(watcher_id), notification_type
+
+    def push(self, watcher_id, notification_type):
+        with self.con.pipeline() as pipe:
+            pipe.sadd(self.key, self._member(watcher_id, notification_type))
+            pipe.hincrby(self.stats_key, 'enqueued', 1)
+            added, _ = pipe.execute()
+        if not added:
+            self.con.hincrby(self.stats_key, 'coalesced', 1)
+
+    def push_on_commit(self, watcher_id, notification_type):
+        transaction.on_commit(lambda: self.push(watcher_id, notification_type))
+
+    @staticmethod
+    def create_notifications(changes):
+        """
+        Creates notifications of (watcher_id, notification_type) changes for all subscriptions of the watchers.
+        Notifications of inactive watchers are created only for removed objects. Returns number of notifications.
+        """
+        if not changes:
+            return 0
+        notification_model = apps.get_model('watchers', 'Notification')
+        subscription_model = apps.get_model('watchers', 'Subscription')
+        watcher_model = apps.get_model('watchers', 'Watcher')
+        watcher_ids, types = zip(*changes)
+        sql = f"""
+            INSERT INTO {notification_model._meta.db_table}
+                (created, modified, subscription_id, notification_type, status, ref_value)
+            SELECT NOW(), NOW(), s.id, c.notification_type, 'new', w.ref_value
+            FROM unnest(%s::int[], %s::text[]) AS c(watcher_id, notification_type)
+            JOIN {watcher_model._meta.db_table} w ON w.id = c.watcher_id
+            JOIN {subscription_model._meta.db_table} s ON s.watcher_id = w.id
+            WHERE w.is_active OR c.notification_type = 'object_removed'
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(watcher_ids), list(types)])
+            return cursor.rowcount
+
+    def flush(self):
+        stats = {'changes': 0, 'notifications': 0}
+        with self.flush_lock() as locked:
+            if not locked:
+                logger.debug('Watchers notification queue is flushed by another worker.')
+                return stats
+            for taken_set in self._take():
+                changes = [self._parse_member(member) for member in self.con.smembers(taken_set)]
+                with transaction.atomic():
+                    stats['notifications'] += self.create_notifications(changes)
+                    self._done(taken_set)
+                stats['changes'] += len(changes)
+                self.extend_lock()
+        if stats['changes']:
+            with self.con.pipeline() as pipe:
+                pipe.hincrby(self.stats_key, 'changes', stats['changes'])
+                pipe.hincrby(self.stats_key, 'notifications', stats['notifications'])
+                pipe.hincrby(self.stats_key, 'flushes', 1)
+                pipe.execute()
+            logger.info(f'Watchers notification queue flushed: {stats}')
+        return stats
+
+    def get_stats(self):
+        """
+        Totals: watcher changes enqueued, coalesced (already queued within the window), unique changes flushed,
+        notifications created and number of flushes.
+        """
+        return {key.decode(): int(value) for key, value in self.con.hgetall(self.stats_key).items()}
+
+
+def notify_watcher_subscribers(watcher_id, notification_type, prev_value):
+    """Creates notifications of the watcher's change - through the queue or, if it's disabled, by a task."""
+    if settings.WATCHERS_NOTIFICATION_QUEUE_ENABLED:
+        NotificationQueue().push_on_commit(watcher_id, notification_type)
+    else:
+        from mcod.watchers.tasks import model_watcher_updated_task
+        model_watcher_updated_task.s(watcher_id, notification_type, prev_value).apply_async()
@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.utils.timezone import datetime, timedelta
 
 from mcod.core.tasks import extended_shared_task
+from mcod.watchers.notification_queue import NotificationQueue, notify_watcher_subscribers
 
 
 @extended_shared_task
@@ -26,11 +27,7 @@ def update_model_watcher_task(app_name, model_name, instance_id, obj_state='upda
             prev_value = instance.tracker.previous('ref_value')
             _type = OBJ_STATE_2_NOTIFICATION_TYPES[obj_state]
             watcher = ModelWatcher.objects.get_from_instance(instance)
-            model_watcher_updated_task.s(
-                watcher.id,
-                _type,
-                prev_value
-            ).apply_async()
+            notify_watcher_subscribers(watcher.id, _type, prev_value)
         else:
             ModelWatcher.objects.update_from_instance(instance, obj_state=obj_state)
     except ModelWatcher.DoesNotExist:
@@ -82,6 +79,11 @@ def model_watcher_updated_task(watcher_id, notification_type, prev_value):
     return {}
 
 
+@extended_shared_task
+def flush_notification_queue_task():
+    return NotificationQueue().flush()
+
+
 @extended_shared_task
 def update_query_watchers_task():
     SearchQueryWatcher = apps.get_model('watchers', 'SearchQueryWatcher')
@@ -103,6 +105,24 @@ def query_watcher_updated_task(watcher_id, notification_type, prev_value):
     return {}
 
 
+@extended_shared_task
+def query_watchers_updated_task(updates):
+    """Creates notifications for subscriptions of many query watchers - `updates` are (watcher_id, type, prev_value)."""
+    SearchQueryWatcher = apps.get_model('watchers', 'SearchQueryWatcher')
+    Subscription = apps.get_model('watchers', 'Subscription')
+    Notification = apps.get_model('watchers', 'Notification')
+    types = {watcher_id: notification_type for watcher_id, notification_type, prev_value in updates}
+    watchers = SearchQueryWatcher.objects.filter(pk__in=types, is_active=True).in_bulk()
+    notifications = [Notification(
+        subscription=subscription,
+        notification_type=types[subscription.watcher_id], status='new',
+        ref_value=watchers[subscription.watcher_id].ref_value)
+        for subscription in Subscription.objects.filter(watcher_id__in=watchers).iterator()
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return {'notifications': len(notifications)}
+
+
 @extended_shared_task
 def send_report_from_subscriptions():
     User = get_user_model()
@@ -0,0 +1,58 @@
+import pytest
+
+from mcod.users.factories import UserFactory
+from mcod.watchers.factories import ModelWatcherFactory
+from mcod.watchers.models import Notification, Subscription
+from mcod.watchers.notification_queue import NotificationQueue
+
+
+@pytest.fixture
+def queue():
+    _queue = NotificationQueue()
+    _queue.con.delete(_queue.key, _queue.stats_key, _queue.taken_key)
+    yield _queue
+    _queue.con.delete(_queue.key, _queue.stats_key, _queue.taken_key)
+
+
+def test_notification_queue_coalesces_changes(queue):
+    for notification_type in ('object_updated', 'object_updated', 'object_removed', 'object_updated'):
+        queue.push(1, notification_type)
+    queue.push(2, 'object_updated')
+
+    members = {queue._parse_member(member) for member in queue.con.smembers(queue.key)}
+    assert members == {(1, 'object_updated'), (1, 'object_removed'), (2, 'object_updated')}
+    assert queue.get_stats() == {'enqueued': 5, 'coalesced': 2}
+
+
+@pytest.mark.django_db
+def test_notification_queue_flush_creates_notifications_once(queue):
+    active, inactive = ModelWatcherFactory.create(), ModelWatcherFactory.create(is_active=False)
+    users = UserFactory.create_batch(2)
+    for watcher in (active, inactive):
+        for user in users:
+            Subscription.objects.create(watcher=watcher, user=user, name=f'{watcher.object_ident} {user.email}')
+    for watcher in (active, inactive):
+        for notification_type in ('object_updated', 'object_removed'):
+            queue.push(watcher.id, notification_type)
+
+    assert queue.flush() == {'changes': 4, 'notifications': 6}
+    notifications = Notification.objects.values_list('subscription__watcher_id', 'notification_type')
+    assert sorted(notifications) == sorted(
+        [(active.id, 'object_updated')] * 2 + [(active.id, 'object_removed')] * 2 +
+        [(inactive.id, 'object_removed')] * 2)
+    assert not queue.con.exists(queue.key)
+    assert not queue.con.smembers(queue.taken_key)
+    assert queue.flush() == {'changes': 0, 'notifications': 0}
+    assert Notification.objects.count() == 6
+
+
+@pytest.mark.django_db
+def test_notification_queue_is_flushed_by_one_worker_at_a_time(queue):
+    watcher = ModelWatcherFactory.create()
+    Subscription.objects.create(watcher=watcher, user=UserFactory.create(), name='subscription')
+    queue.push(watcher.id, 'object_updated')
+    with queue.flush_lock() as locked:
+        assert locked
+        assert NotificationQueue().flush() == {'changes': 0, 'notifications': 0}
+    assert not Notification.objects.exists()
+    assert queue.flush() == {'changes': 1, 'notifications': 1}
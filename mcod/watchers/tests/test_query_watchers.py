@@ -0,0 +1,45 @@
+import pytest
+
+from mcod.users.factories import UserFactory
+from mcod.watchers.factories import SearchQueryWatcherFactory
+from mcod.watchers.models import Notification, SearchQueryWatcher, Subscription
+from mcod.watchers.tasks import query_watchers_updated_task
+
+
+def create_query_watcher(url, ref_value=3):
+    return SearchQueryWatcherFactory.create(
+        object_name='query', object_ident=url, ref_field='/meta/count', ref_value=ref_value,
+        customfields={'headers': {'lang': 'pl', 'api_version': '1.4'}})
+
+
+@pytest.mark.django_db
+def test_reload_sends_one_request_for_watchers_of_the_same_query(mocker):
+    watchers = [
+        create_query_watcher('http://api.test.mcod/datasets?q=water&page=1'),
+        create_query_watcher('http://api.test.mcod/datasets?page=1&q=water'),
+    ]
+    get = mocker.patch('mcod.watchers.models.requests.get', return_value=mocker.Mock(
+        status_code=200, json=mocker.Mock(return_value={'meta': {'count': 5}})))
+    task = mocker.patch('mcod.watchers.models.query_watchers_updated_task')
+
+    assert SearchQueryWatcher.objects.reload() == {'watchers': 2, 'requests': 1, 'changed': 2}
+    assert get.call_count == 1
+    notifications = task.s.call_args[0][0]
+    assert sorted(notifications) == sorted((watcher.id, 'result_count_incresed', 3) for watcher in watchers)
+    assert set(SearchQueryWatcher.objects.values_list('ref_value', flat=True)) == {'5'}
+
+
+@pytest.mark.django_db
+def test_query_watchers_updated_task_creates_notification_for_each_subscription():
+    changed = create_query_watcher('http://api.test.mcod/datasets?q=water', ref_value=5)
+    unchanged = create_query_watcher('http://api.test.mcod/datasets?q=fire')
+    users = UserFactory.create_batch(2)
+    for watcher in (changed, unchanged):
+        for user in users:
+            Subscription.objects.create(watcher=watcher, user=user, name=f'{watcher.object_ident} {user.email}')
+
+    assert query_watchers_updated_task([(changed.id, 'result_count_incresed', 3)]) == {'notifications': 2}
+    notifications = Notification.objects.values_list(
+        'subscription__user_id', 'subscription__watcher_id', 'notification_type', 'ref_value')
+    assert sorted(notifications) == sorted(
+        (user.id, changed.id, 'result_count_incresed', '5') for user in users)